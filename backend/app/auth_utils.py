@@ -1,13 +1,38 @@
 from passlib.context import CryptContext
 from datetime import datetime, timedelta, timezone
-from typing import Optional
+from typing import Optional, Dict, Any
 from jose import JWTError, jwt
 from pydantic import BaseModel
 import os
+import time
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from .cache_utils import TTLCache
 
 # Configuração do Hashing de Senha
 # Usaremos bcrypt como o esquema de hashing
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# O custo (rounds) do bcrypt é configurável; 12 é o padrão do passlib.
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=BCRYPT_ROUNDS)
+
+# Pool dedicado para o hashing/verificação de senhas.
+# O bcrypt leva ~100-300 ms e libera o GIL, então rodá-lo em threads evita
+# bloquear o event loop durante o login. O número de tarefas pendentes é limitado:
+# acima do limite, as funções assíncronas levantam PasswordHasherBusyError (-> 503).
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", "4"))
+PASSWORD_HASH_MAX_PENDING = int(os.getenv("PASSWORD_HASH_MAX_PENDING", "32"))
+
+_password_hash_executor = ThreadPoolExecutor(
+    max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix="password-hash"
+)
+_password_hash_pending = 0
+_password_hash_lock = threading.Lock()
+
+class PasswordHasherBusyError(Exception):
+    """Levantada quando a fila do pool de hashing de senhas está cheia."""
+    pass
 
 # Configurações do Token JWT
 # Estes devem vir de variáveis de ambiente em produção!
@@ -15,6 +40,14 @@ SECRET_KEY = os.getenv("SECRET_KEY", "uma-chave-secreta-muito-forte-e-dificil-de
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 60 * 24 # Token expira em 24 horas
 
+# Cache de tokens já verificados: evita refazer a verificação HMAC e o parse do JSON
+# para um token que é reutilizado a cada requisição durante uma sessão.
+# As entradas expiram no "exp" do próprio token.
+TOKEN_CACHE_ENABLED = os.getenv("TOKEN_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+TOKEN_CACHE_MAX_SIZE = int(os.getenv("TOKEN_CACHE_MAX_SIZE", "4096"))
+
+token_cache = TTLCache(max_size=TOKEN_CACHE_MAX_SIZE, ttl_seconds=ACCESS_TOKEN_EXPIRE_MINUTES * 60)
+
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verifica se a senha em texto plano corresponde à senha com hash."""
     return pwd_context.verify(plain_password, hashed_password)
@@ -23,6 +56,37 @@ def get_password_hash(password: str) -> str:
     """Gera o hash de uma senha."""
     return pwd_context.hash(password)
 
+async def _run_in_password_pool(func, *args):
+    """Executa `func` no pool de hashing, respeitando o limite de tarefas pendentes."""
+    global _password_hash_pending
+    with _password_hash_lock:
+        if _password_hash_pending >= PASSWORD_HASH_MAX_PENDING:
+            raise PasswordHasherBusyError("Pool de hashing de senhas saturado")
+        _password_hash_pending += 1
+    try:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_password_hash_executor, func, *args)
+    finally:
+        with _password_hash_lock:
+            _password_hash_pending -= 1
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """Versão assíncrona de verify_password, executada no pool de hashing."""
+    return await _run_in_password_pool(verify_password, plain_password, hashed_password)
+
+async def get_password_hash_async(password: str) -> str:
+    """Versão assíncrona de get_password_hash, executada no pool de hashing."""
+    return await _run_in_password_pool(get_password_hash, password)
+
+def get_password_pool_stats() -> Dict[str, Any]:
+    """Retorna o estado atual do pool de hashing de senhas."""
+    return {
+        "workers": PASSWORD_HASH_WORKERS,
+        "max_pending": PASSWORD_HASH_MAX_PENDING,
+        "pending": _password_hash_pending,
+        "bcrypt_rounds": BCRYPT_ROUNDS,
+    }
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """Cria um novo token de acesso JWT."""
     to_encode = data.copy()
@@ -34,19 +98,60 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
+def _decode_token_uncached(token: str) -> Optional[Dict[str, Any]]:
+    """Verifica e decodifica o token com jose. Retorna as claims ou None se inválido."""
+    try:
+        return jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    except JWTError:
+        return None
+
+def decode_access_token_claims(token: str) -> Optional[Dict[str, Any]]:
+    """
+    Retorna as claims de um token válido, usando o cache de tokens já verificados.
+    Tokens inválidos não são cacheados.
+    """
+    if not TOKEN_CACHE_ENABLED:
+        return _decode_token_uncached(token)
+
+    claims = token_cache.get(token)
+    if claims is not None:
+        exp = claims.get("exp")
+        # O TTL da entrada já segue o "exp", mas conferimos de novo por segurança.
+        if exp is None or exp > time.time():
+            return claims
+        token_cache.invalidate(token)
+
+    claims = _decode_token_uncached(token)
+    if claims is None:
+        return None
+
+    exp = claims.get("exp")
+    ttl = None
+    if exp is not None:
+        ttl = min(float(exp) - time.time(), token_cache.ttl_seconds)
+        if ttl <= 0:
+            return claims
+    token_cache.set(token, claims, ttl_seconds=ttl)
+    return claims
+
+def get_token_cache_stats() -> Dict[str, Any]:
+    """Retorna as estatísticas do cache de tokens verificados."""
+    stats = token_cache.stats()
+    stats["enabled"] = TOKEN_CACHE_ENABLED
+    return stats
+
 def decode_access_token(token: str) -> Optional[str]:
     """
     Decodifica o token de acesso.
     Retorna o email (ou identificador) do usuário se o token for válido, senão None.
     """
-    try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        email: Optional[str] = payload.get("sub") # "sub" é o nome padrão para o sujeito do token
-        if email is None:
-            return None
-        return email
-    except JWTError:
+    payload = decode_access_token_claims(token)
+    if payload is None:
+        return None
+    email: Optional[str] = payload.get("sub") # "sub" é o nome padrão para o sujeito do token
+    if email is None:
         return None
+    return email
 
 # Para usar nas dependências do FastAPI para proteger rotas
 class TokenData(BaseModel):
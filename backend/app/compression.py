@@ -0,0 +1,151 @@
+# backend/app/compression.py
+import io
+import os
+from typing import List, Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.middleware.gzip import GZipMiddleware, GZipResponder
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+# Compressão das respostas HTTP, negociada pelo Accept-Encoding. O trabalho é feito pelo
+# GZipMiddleware do Starlette; aqui ficam só a negociação (com q-values), os compressores
+# br/zstd no lugar do arquivo gzip, o ETag fraco e os tipos que não são comprimidos.
+# gzip está sempre disponível; brotli ("br") e zstd são usados apenas se os pacotes
+# opcionais `brotli` / `zstandard` estiverem instalados (pip install brotli zstandard).
+# Respostas menores que COMPRESSION_MINIMUM_SIZE bytes saem sem compressão; respostas em
+# streaming (ex: exportação CSV/NDJSON) são comprimidas bloco a bloco.
+try:
+    import brotli
+except ImportError: # Dependência opcional
+    brotli = None
+
+try:
+    import zstandard
+except ImportError: # Dependência opcional
+    zstandard = None
+
+COMPRESSION_ENABLED = os.getenv("COMPRESSION_ENABLED", "true").lower() in ("1", "true", "yes")
+COMPRESSION_MINIMUM_SIZE = int(os.getenv("COMPRESSION_MINIMUM_SIZE", "1024"))
+# Ordem de preferência do servidor; codificações indisponíveis são ignoradas
+COMPRESSION_ENCODINGS = [
+    encoding.strip().lower()
+    for encoding in os.getenv("COMPRESSION_ENCODINGS", "br,zstd,gzip").split(",")
+    if encoding.strip()
+]
+COMPRESSION_GZIP_LEVEL = int(os.getenv("COMPRESSION_GZIP_LEVEL", "6"))
+COMPRESSION_BROTLI_QUALITY = int(os.getenv("COMPRESSION_BROTLI_QUALITY", "4"))
+COMPRESSION_ZSTD_LEVEL = int(os.getenv("COMPRESSION_ZSTD_LEVEL", "3"))
+
+# Tipos que já são comprimidos ou que não devem ser acumulados
+_SKIPPED_CONTENT_TYPES = ("image/", "video/", "audio/", "application/zip", "application/gzip", "text/event-stream")
+
+
+def available_encodings(preferred: List[str]) -> List[str]:
+    """Filtra as codificações pedidas às suportadas neste ambiente (mantendo a ordem)."""
+    supported = {"gzip": True, "br": brotli is not None, "zstd": zstandard is not None}
+    return [encoding for encoding in preferred if supported.get(encoding)]
+
+def choose_encoding(accept_encoding: str, encodings: List[str]) -> Optional[str]:
+    """Escolhe, na ordem de preferência do servidor, a primeira codificação aceita pelo cliente (q > 0)."""
+    accepted = {}
+    for item in accept_encoding.split(","):
+        name, _, params = item.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        if name:
+            accepted[name.strip().lower()] = quality
+    for encoding in encodings:
+        quality = accepted.get(encoding, accepted.get("*", 0.0))
+        if quality > 0:
+            return encoding
+    return None
+
+
+class _StreamCompressorFile:
+    """
+    Substitui o gzip.GzipFile do GZipResponder para br/zstd: escreve o resultado da
+    compressão no mesmo buffer que o GZipResponder esvazia a cada bloco.
+    """
+
+    def __init__(self, encoding: str, fileobj: io.BytesIO):
+        self.fileobj = fileobj
+        if encoding == "br":
+            compressor = brotli.Compressor(quality=COMPRESSION_BROTLI_QUALITY)
+            self._compress, self._finish = compressor.process, compressor.finish
+        elif encoding == "zstd":
+            compressor = zstandard.ZstdCompressor(level=COMPRESSION_ZSTD_LEVEL).compressobj()
+            self._compress, self._finish = compressor.compress, compressor.flush
+        else:
+            raise ValueError(f"Codificação não suportada: {encoding}")
+
+    def write(self, data: bytes) -> None:
+        self.fileobj.write(self._compress(data))
+
+    def close(self) -> None:
+        self.fileobj.write(self._finish())
+
+
+class CompressionMiddleware(GZipMiddleware):
+    """GZipMiddleware do Starlette com negociação de gzip / br / zstd."""
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: int = COMPRESSION_MINIMUM_SIZE,
+        encodings: Optional[List[str]] = None
+    ):
+        super().__init__(app, minimum_size=minimum_size, compresslevel=COMPRESSION_GZIP_LEVEL)
+        self.encodings = available_encodings(encodings if encodings is not None else COMPRESSION_ENCODINGS)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        encoding = None
+        if scope["type"] == "http" and self.encodings:
+            encoding = choose_encoding(Headers(scope=scope).get("accept-encoding", ""), self.encodings)
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+        responder = _CompressedResponder(self.app, self.minimum_size, self.compresslevel, encoding)
+        await responder(scope, receive, send)
+
+
+class _CompressedResponder(GZipResponder):
+    def __init__(self, app: ASGIApp, minimum_size: int, compresslevel: int, encoding: str):
+        super().__init__(app, minimum_size, compresslevel=compresslevel)
+        self.encoding = encoding
+        if encoding != "gzip":
+            self.gzip_file = _StreamCompressorFile(encoding, self.gzip_buffer)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        # O GZipResponder envia as mensagens por self.send: o cabeçalho de início é
+        # ajustado no caminho (codificação negociada e ETag fraco)
+        async def send_adjusting_headers(message: Message) -> None:
+            if message["type"] == "http.response.start" and not self.content_encoding_set:
+                headers = MutableHeaders(raw=message["headers"])
+                if "content-encoding" in headers:
+                    headers["Content-Encoding"] = self.encoding
+                    # O corpo comprimido é outra representação: o ETag forte passa a fraco
+                    # (como o nginx); If-None-Match continua funcionando, pois a comparação
+                    # nos routers é fraca
+                    etag = headers.get("etag")
+                    if etag and not etag.startswith("W/"):
+                        headers["ETag"] = f"W/{etag}"
+            await send(message)
+
+        await super().__call__(scope, receive, send_adjusting_headers)
+
+    async def send_with_gzip(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            # Respostas sem corpo ou já comprimidas seguem sem compressão (como as que
+            # já trazem Content-Encoding no GZipResponder)
+            status = message["status"]
+            content_type = Headers(raw=message["headers"]).get("content-type", "")
+            if status < 200 or status in (204, 304) or content_type.startswith(_SKIPPED_CONTENT_TYPES):
+                self.initial_message = message
+                self.content_encoding_set = True
+                return
+        await super().send_with_gzip(message)
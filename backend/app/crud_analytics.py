@@ -0,0 +1,345 @@
+# backend/app/crud_analytics.py
+from collections import Counter
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from sqlalchemy import case, delete, distinct, func, insert, select, update
+from sqlalchemy.engine import Connection
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from . import models_db, schemas
+
+# Agregados de análise por história (ver models_db.StoryAnalytics*):
+#   - resumo: número de execuções, execuções concluídas (com end_time), soma das durações;
+#   - distribuição de respostas: contagem por (questão, opção); múltipla escolha conta cada opção;
+#   - visitas por página: número de execuções que passaram pela página;
+#   - histograma de durações: contagem por faixa de duração (DURATION_BUCKETS_MINUTES).
+# Os agregados são atualizados na mesma transação que grava as execuções
+# (crud_executions), com um UPSERT por chave (count = count + delta).
+# rebuild_story_analytics recalcula tudo com GROUP BYs sobre story_executions e as tabelas
+# normalizadas execution_answers / execution_page_visits (backfill / correção).
+
+# Limites inferiores (em minutos) das faixas do histograma; a última faixa é aberta.
+DURATION_BUCKETS_MINUTES = (0, 1, 2, 5, 10, 15, 30, 60)
+
+DbLike = Union[Session, Connection]
+
+# Parâmetros por comando SQL nos UPSERTs de múltiplas linhas: limite do SQLite padrão
+# (32766) e abaixo do asyncpg (32767). As linhas são divididas em lotes que cabem nele.
+MAX_BIND_PARAMETERS = 32766
+
+
+def answer_options(value: Any) -> List[str]:
+    """
+    Opções escolhidas em uma resposta: a própria opção (escolha única) ou cada opção da
+    lista (múltipla escolha), como strings, sem vazias nem repetidas.
+    Mesma regra das linhas de execution_answers (ver crud_executions).
+    """
+    options = []
+    for option_id in (value if isinstance(value, list) else [value]):
+        if option_id is None or option_id == "":
+            continue
+        option_id = str(option_id)
+        if option_id not in options:
+            options.append(option_id)
+    return options
+
+def duration_bucket(duration_minutes: Optional[float]) -> int:
+    """Limite inferior da faixa do histograma em que a duração se encaixa."""
+    duration = max(duration_minutes or 0, 0)
+    bucket = DURATION_BUCKETS_MINUTES[0]
+    for start in DURATION_BUCKETS_MINUTES:
+        if duration < start:
+            break
+        bucket = start
+    return bucket
+
+
+class AnalyticsDelta:
+    """Incrementos acumulados (em memória) para um conjunto de execuções."""
+
+    def __init__(self):
+        self.summary: Dict[int, List[int]] = {}   # story_id -> [execuções, concluídas, minutos]
+        self.answers: Counter = Counter()          # (story_id, question_id, option_id)
+        self.page_visits: Counter = Counter()      # (story_id, page_id)
+        self.durations: Counter = Counter()        # (story_id, bucket_start_minutes)
+
+    def __bool__(self) -> bool:
+        return bool(self.summary)
+
+    def add(
+        self,
+        story_id: int,
+        answers: Dict[str, Any],
+        pages_visited: List[Any],
+        duration_minutes: Optional[float],
+        completed: bool
+    ) -> None:
+        # Mesmo arredondamento da coluna story_executions.duration_minutes
+        duration = int(round(duration_minutes or 0))
+        totals = self.summary.setdefault(story_id, [0, 0, 0])
+        totals[0] += 1
+        totals[1] += 1 if completed else 0
+        totals[2] += duration
+
+        for question_id, value in answers.items():
+            for option_id in answer_options(value):
+                self.answers[(story_id, str(question_id), option_id)] += 1
+        for page_id in {str(page_id) for page_id in pages_visited}:
+            self.page_visits[(story_id, page_id)] += 1
+        self.durations[(story_id, duration_bucket(duration))] += 1
+
+    def add_execution(self, execution_data: schemas.StoryExecutionCreate) -> None:
+        """Acumula uma execução recebida pela API (já validada)."""
+        self.add(
+            execution_data.story_id,
+            execution_data.answers,
+            execution_data.pages_visited,
+            execution_data.duration_minutes,
+            execution_data.end_time is not None,
+        )
+
+
+def _upsert_counts(db: DbLike, table, key_columns: Tuple[str, ...], value_columns: Tuple[str, ...], rows: List[Dict[str, Any]]) -> None:
+    """
+    Soma os valores de `rows` às linhas existentes (mesma chave) ou as insere.
+    Usa INSERT ... ON CONFLICT DO UPDATE no SQLite e no PostgreSQL, em lotes de até
+    MAX_BIND_PARAMETERS parâmetros; nos demais bancos, UPDATE seguido de INSERT quando
+    nenhuma linha foi atualizada.
+    """
+    if not rows:
+        return
+    dialect_name = db.get_bind().dialect.name if isinstance(db, Session) else db.dialect.name
+    if dialect_name in ("sqlite", "postgresql"):
+        if dialect_name == "sqlite":
+            from sqlalchemy.dialects.sqlite import insert as dialect_insert
+        else:
+            from sqlalchemy.dialects.postgresql import insert as dialect_insert
+        batch_size = max(1, MAX_BIND_PARAMETERS // (len(key_columns) + len(value_columns)))
+        for start in range(0, len(rows), batch_size):
+            stmt = dialect_insert(table).values(rows[start:start + batch_size])
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[table.c[name] for name in key_columns],
+                set_={name: table.c[name] + stmt.excluded[name] for name in value_columns},
+            )
+            db.execute(stmt)
+        return
+
+    for row in rows:
+        where = [table.c[name] == row[name] for name in key_columns]
+        result = db.execute(
+            update(table).where(*where).values({name: table.c[name] + row[name] for name in value_columns})
+        )
+        if result.rowcount == 0:
+            db.execute(insert(table).values(row))
+
+def apply_analytics_delta(db: DbLike, delta: AnalyticsDelta) -> None:
+    """
+    Aplica os incrementos aos agregados. Não faz commit: deve ser chamada na mesma
+    transação que grava as execuções.
+    """
+    if not delta:
+        return
+    _upsert_counts(
+        db, models_db.StoryAnalyticsSummary.__table__,
+        ("story_id",), ("executions_count", "completed_count", "total_duration_minutes"),
+        [
+            {"story_id": story_id, "executions_count": executions, "completed_count": completed, "total_duration_minutes": minutes}
+            for story_id, (executions, completed, minutes) in delta.summary.items()
+        ],
+    )
+    _upsert_counts(
+        db, models_db.StoryAnswerCount.__table__, ("story_id", "question_id", "option_id"), ("count",),
+        [
+            {"story_id": story_id, "question_id": question_id, "option_id": option_id, "count": count}
+            for (story_id, question_id, option_id), count in delta.answers.items()
+        ],
+    )
+    _upsert_counts(
+        db, models_db.StoryPageVisitCount.__table__, ("story_id", "page_id"), ("count",),
+        [
+            {"story_id": story_id, "page_id": page_id, "count": count}
+            for (story_id, page_id), count in delta.page_visits.items()
+        ],
+    )
+    _upsert_counts(
+        db, models_db.StoryDurationBucket.__table__, ("story_id", "bucket_start_minutes"), ("count",),
+        [
+            {"story_id": story_id, "bucket_start_minutes": bucket, "count": count}
+            for (story_id, bucket), count in delta.durations.items()
+        ],
+    )
+
+_AGGREGATE_TABLES = (
+    models_db.StoryAnalyticsSummary.__table__,
+    models_db.StoryAnswerCount.__table__,
+    models_db.StoryPageVisitCount.__table__,
+    models_db.StoryDurationBucket.__table__,
+)
+
+def delete_story_analytics(db: DbLike, story_id: Optional[int] = None) -> None:
+    """Apaga os agregados de uma história (ou de todas, se story_id for None). Não faz commit."""
+    for table in _AGGREGATE_TABLES:
+        stmt = delete(table)
+        if story_id is not None:
+            stmt = stmt.where(table.c.story_id == story_id)
+        db.execute(stmt)
+
+def _duration_bucket_expression(duration_column):
+    """Expressão SQL equivalente a duration_bucket (CASE sobre os limites das faixas)."""
+    duration = func.coalesce(duration_column, 0)
+    return case(
+        *[(duration >= start, start) for start in reversed(DURATION_BUCKETS_MINUTES[1:])],
+        else_=DURATION_BUCKETS_MINUTES[0],
+    )
+
+def rebuild_story_analytics(db: DbLike, story_id: Optional[int] = None) -> int:
+    """
+    Recalcula os agregados (de uma história ou de todas) com INSERT ... SELECT ... GROUP BY
+    sobre story_executions e as tabelas normalizadas (execution_answers / execution_page_visits),
+    sem decodificar JSON. Usada pelas migrações de backfill; também serve de rollup para
+    corrigir divergências. Não faz commit. Retorna o número de execuções consideradas.
+    """
+    executions = models_db.StoryExecution.__table__
+    answers = models_db.ExecutionAnswer.__table__
+    visits = models_db.ExecutionPageVisit.__table__
+
+    def for_story(stmt, table):
+        return stmt.where(table.c.story_id == story_id) if story_id is not None else stmt
+
+    delete_story_analytics(db, story_id)
+
+    summary_select = for_story(
+        select(
+            executions.c.story_id,
+            func.count(),
+            func.count(executions.c.end_time),
+            func.coalesce(func.sum(executions.c.duration_minutes), 0),
+        ),
+        executions,
+    ).group_by(executions.c.story_id)
+    db.execute(insert(models_db.StoryAnalyticsSummary.__table__).from_select(
+        ["story_id", "executions_count", "completed_count", "total_duration_minutes"], summary_select
+    ))
+
+    answers_select = for_story(
+        select(answers.c.story_id, answers.c.question_id, answers.c.option_id, func.count()), answers
+    ).group_by(answers.c.story_id, answers.c.question_id, answers.c.option_id)
+    db.execute(insert(models_db.StoryAnswerCount.__table__).from_select(
+        ["story_id", "question_id", "option_id", "count"], answers_select
+    ))
+
+    visits_select = for_story(
+        select(visits.c.story_id, visits.c.client_page_id, func.count(distinct(visits.c.execution_id))), visits
+    ).group_by(visits.c.story_id, visits.c.client_page_id)
+    db.execute(insert(models_db.StoryPageVisitCount.__table__).from_select(
+        ["story_id", "page_id", "count"], visits_select
+    ))
+
+    bucket = _duration_bucket_expression(executions.c.duration_minutes).label("bucket")
+    durations_select = for_story(select(executions.c.story_id, bucket, func.count()), executions)\
+        .group_by(executions.c.story_id, bucket)
+    db.execute(insert(models_db.StoryDurationBucket.__table__).from_select(
+        ["story_id", "bucket_start_minutes", "count"], durations_select
+    ))
+
+    return db.execute(for_story(select(func.count()).select_from(executions), executions)).scalar_one()
+
+def _is_story_owner(db: Session, story_id: int, creator_id: int) -> bool:
+    owner_id = db.query(models_db.Story.creator_id)\
+                 .filter(models_db.Story.id == story_id)\
+                 .scalar()
+    return owner_id is not None and owner_id == creator_id
+
+def get_story_analytics(db: Session, story_id: int, creator_id: int) -> Optional[schemas.StoryAnalytics]:
+    """
+    Monta a análise da história apenas a partir das tabelas de agregados
+    (custo proporcional ao número de questões/opções e páginas, não de execuções).
+    Retorna None se a história não existir ou não pertencer a `creator_id`.
+    """
+    if not _is_story_owner(db, story_id, creator_id):
+        return None
+
+    summary = db.get(models_db.StoryAnalyticsSummary, story_id)
+    executions_count = summary.executions_count if summary else 0
+    completed_count = summary.completed_count if summary else 0
+
+    questions: Dict[str, List[schemas.AnalyticsOptionCount]] = {}
+    answer_rows = db.query(models_db.StoryAnswerCount)\
+                    .filter(models_db.StoryAnswerCount.story_id == story_id)\
+                    .order_by(models_db.StoryAnswerCount.question_id, models_db.StoryAnswerCount.count.desc())\
+                    .all()
+    for row in answer_rows:
+        questions.setdefault(row.question_id, []).append(
+            schemas.AnalyticsOptionCount(option_id=row.option_id, count=row.count)
+        )
+
+    page_rows = db.query(models_db.StoryPageVisitCount)\
+                  .filter(models_db.StoryPageVisitCount.story_id == story_id)\
+                  .order_by(models_db.StoryPageVisitCount.count.desc(), models_db.StoryPageVisitCount.page_id)\
+                  .all()
+    duration_counts = dict(
+        db.query(models_db.StoryDurationBucket.bucket_start_minutes, models_db.StoryDurationBucket.count)
+          .filter(models_db.StoryDurationBucket.story_id == story_id)
+          .all()
+    )
+    bucket_ends = list(DURATION_BUCKETS_MINUTES[1:]) + [None]
+
+    return schemas.StoryAnalytics(
+        story_id=story_id,
+        executions_count=executions_count,
+        completed_count=completed_count,
+        completion_rate=(completed_count / executions_count) if executions_count else 0.0,
+        average_duration_minutes=(summary.total_duration_minutes / executions_count) if executions_count else None,
+        questions=[
+            schemas.AnalyticsQuestion(question_id=question_id, total_answers=sum(o.count for o in options), options=options)
+            for question_id, options in questions.items()
+        ],
+        page_visits=[schemas.AnalyticsPageVisits(page_id=row.page_id, count=row.count) for row in page_rows],
+        duration_histogram=[
+            schemas.AnalyticsDurationBucket(
+                start_minutes=start, end_minutes=end, count=duration_counts.get(start, 0)
+            )
+            for start, end in zip(DURATION_BUCKETS_MINUTES, bucket_ends)
+        ],
+    )
+
+def get_story_last_pages(db: Session, story_id: int, creator_id: int) -> Optional[List[schemas.AnalyticsLastPage]]:
+    """
+    Em que página os jogadores terminam (ou abandonam) a história: contagem, por página,
+    das execuções cuja última página visitada foi ela, com GROUP BYs sobre
+    execution_page_visits. Retorna None se a história não existir ou não pertencer a `creator_id`.
+    """
+    if not _is_story_owner(db, story_id, creator_id):
+        return None
+
+    visits = models_db.ExecutionPageVisit.__table__
+    executions = models_db.StoryExecution.__table__
+    last_seq = select(visits.c.execution_id, func.max(visits.c.seq).label("last_seq"))\
+        .where(visits.c.story_id == story_id)\
+        .group_by(visits.c.execution_id)\
+        .subquery()
+    stmt = select(
+            visits.c.client_page_id,
+            func.count().label("executions"),
+            func.sum(case((executions.c.end_time.is_(None), 1), else_=0)).label("not_completed"),
+        )\
+        .join(last_seq, (visits.c.execution_id == last_seq.c.execution_id) & (visits.c.seq == last_seq.c.last_seq))\
+        .join(executions, executions.c.id == visits.c.execution_id)\
+        .group_by(visits.c.client_page_id)\
+        .order_by(func.count().desc(), visits.c.client_page_id)
+    return [
+        schemas.AnalyticsLastPage(page_id=row.client_page_id, executions=row.executions, not_completed=row.not_completed or 0)
+        for row in db.execute(stmt)
+    ]
+
+
+# --- VARIANTES ASSÍNCRONAS (AsyncSession) ---
+
+async def get_story_analytics_async(db: AsyncSession, story_id: int, creator_id: int) -> Optional[schemas.StoryAnalytics]:
+    """Versão assíncrona de get_story_analytics."""
+    return await db.run_sync(lambda s: get_story_analytics(s, story_id, creator_id))
+
+async def get_story_last_pages_async(db: AsyncSession, story_id: int, creator_id: int) -> Optional[List[schemas.AnalyticsLastPage]]:
+    """Versão assíncrona de get_story_last_pages."""
+    return await db.run_sync(lambda s: get_story_last_pages(s, story_id, creator_id))
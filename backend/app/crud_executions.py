@@ -1,11 +1,83 @@
 # backend/app/crud_executions.py
-import json
+import orjson
 from sqlalchemy.orm import Session
-from sqlalchemy import desc # Para ordenar
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import desc, or_, and_, insert, select # Para ordenar e para a paginação por cursor
+import base64
 import datetime 
-from typing import List 
+import os
+from typing import List, Optional, Tuple, Dict, Any, Iterable, AsyncIterator
 
-from . import models_db, schemas # Para os modelos de banco e esquemas Pydantic
+from . import crud_analytics, models_db, schemas # Para os modelos de banco e esquemas Pydantic
+from .cache_utils import TTLCache
+from .database import AsyncSessionLocal
+
+# Cache da contagem total de execuções por criador (usada pelo dashboard).
+# A contagem refaz o JOIN inteiro; com o cache, ela é recalculada no máximo
+# uma vez a cada EXECUTIONS_COUNT_CACHE_TTL_SECONDS (0 desativa o cache).
+EXECUTIONS_COUNT_CACHE_TTL_SECONDS = float(os.getenv("EXECUTIONS_COUNT_CACHE_TTL_SECONDS", "30"))
+executions_count_cache = TTLCache(max_size=1024, ttl_seconds=EXECUTIONS_COUNT_CACHE_TTL_SECONDS)
+
+# Cursor da paginação por chave: posição (start_time, id) do último item da página anterior
+ExecutionsCursor = Tuple[datetime.datetime, int]
+
+def encode_executions_cursor(start_time: datetime.datetime, execution_id: int) -> str:
+    """Codifica a posição (start_time, id) de uma execução em um cursor opaco (base64 url-safe)."""
+    raw = f"{start_time.isoformat()}|{execution_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+def decode_executions_cursor(cursor: str) -> ExecutionsCursor:
+    """Decodifica um cursor gerado por encode_executions_cursor. Levanta ValueError se inválido."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        start_time_str, id_str = base64.urlsafe_b64decode(padded.encode()).decode().split("|")
+        return datetime.datetime.fromisoformat(start_time_str), int(id_str)
+    except Exception as e:
+        raise ValueError(f"Cursor inválido: {cursor}") from e
+
+def _execution_row(
+    execution_data: schemas.StoryExecutionCreate,
+    player_user_id: int,
+    creator_id: Optional[int]
+) -> Dict[str, Any]:
+    """Converte os dados validados de uma execução nos valores das colunas de story_executions."""
+    return {
+        "story_id": execution_data.story_id,
+        "player_user_id": player_user_id,
+        "creator_id": creator_id,
+        "start_time": execution_data.start_time,
+        "end_time": execution_data.end_time,
+        "duration_minutes": int(round(execution_data.duration_minutes)),
+        "answers_json": orjson.dumps(execution_data.answers).decode(),
+        "pages_visited_json": orjson.dumps(execution_data.pages_visited).decode(),
+        "story_title_at_play": execution_data.story_title_at_play,
+        "player_name_at_play": execution_data.player_name_at_play,
+    }
+
+def _execution_detail_rows(
+    execution_id: int,
+    story_id: int,
+    answers: Dict[str, Any],
+    pages_visited: List[Any]
+) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """Linhas de execution_answers e execution_page_visits (ver models_db.ExecutionAnswer) de uma execução."""
+    answer_rows = [
+        {"execution_id": execution_id, "question_id": str(question_id), "option_id": option_id, "story_id": story_id}
+        for question_id, value in answers.items()
+        for option_id in crud_analytics.answer_options(value)
+    ]
+    visit_rows = [
+        {"execution_id": execution_id, "seq": seq, "client_page_id": str(page_id), "story_id": story_id}
+        for seq, page_id in enumerate(pages_visited)
+    ]
+    return answer_rows, visit_rows
+
+def _insert_execution_details(db: Session, answer_rows: List[Dict[str, Any]], visit_rows: List[Dict[str, Any]]) -> None:
+    """Insere as linhas normalizadas (executemany, agrupado em INSERTs de múltiplas linhas). Não faz commit."""
+    if answer_rows:
+        db.execute(insert(models_db.ExecutionAnswer.__table__), answer_rows)
+    if visit_rows:
+        db.execute(insert(models_db.ExecutionPageVisit.__table__), visit_rows)
 
 def create_story_execution(
     db: Session, 
@@ -24,34 +96,176 @@ def create_story_execution(
         O objeto StoryExecution criado, recuperado do banco de dados.
     """
 
-    answers_as_json_string = json.dumps(execution_data.answers)
-    pages_visited_as_json_string = json.dumps(execution_data.pages_visited)
+    # creator_id desnormalizado (ver models_db.StoryExecution.creator_id)
+    creator_id = db.query(models_db.Story.creator_id)\
+                   .filter(models_db.Story.id == execution_data.story_id)\
+                   .scalar()
 
     db_execution = models_db.StoryExecution(
-        story_id=execution_data.story_id,
-        player_user_id=player_user_id,
-        start_time=execution_data.start_time,
-        end_time=execution_data.end_time,
-        duration_minutes=int(round(execution_data.duration_minutes)),
-        answers_json=answers_as_json_string,
-        pages_visited_json=pages_visited_as_json_string,
-        story_title_at_play=execution_data.story_title_at_play,
-        player_name_at_play=execution_data.player_name_at_play
+        **_execution_row(execution_data, player_user_id, creator_id)
     )
     
     db.add(db_execution)
+    db.flush() # Gera o ID, usado pelas linhas normalizadas
+    _insert_execution_details(db, *_execution_detail_rows(
+        db_execution.id, execution_data.story_id, execution_data.answers, execution_data.pages_visited
+    ))
+    # Agregados de análise da história, na mesma transação (ver crud_analytics)
+    delta = crud_analytics.AnalyticsDelta()
+    delta.add_execution(execution_data)
+    crud_analytics.apply_analytics_delta(db, delta)
     db.commit()
     db.refresh(db_execution)
+    executions_count_cache.invalidate(creator_id) # O total do dashboard deste criador mudou
     
     print(f"CRUD: Execução de história ID {db_execution.id} para história ID {db_execution.story_id} salva.") # Debug
     return db_execution
 
-# --- FUNÇÃO ADICIONADA PARA BUSCAR EXECUÇÕES PARA O DASHBOARD DO CRIADOR ---
+def create_story_executions_batch(
+    db: Session,
+    executions: Iterable[Tuple[schemas.StoryExecutionCreate, int]]
+) -> int:
+    """
+    Salva várias execuções em uma única transação, com um INSERT de múltiplas linhas.
+    O creator_id de todas as histórias envolvidas é resolvido em uma única consulta.
+
+    Args:
+        db: A sessão do banco de dados SQLAlchemy.
+        executions: Pares (dados da execução, player_user_id).
+
+    Returns:
+        O número de execuções inseridas.
+    """
+    executions = list(executions)
+    if not executions:
+        return 0
+
+    creator_by_story = _creators_by_story(db, {execution_data.story_id for execution_data, _ in executions})
+    return _insert_executions(db, [
+        (_execution_row(execution_data, player_user_id, creator_by_story.get(execution_data.story_id)), execution_data)
+        for execution_data, player_user_id in executions
+    ])
+
+def import_story_executions_chunk(
+    db: Session,
+    items: List[Tuple[int, schemas.StoryExecutionCreate]],
+    player_user_id: int
+) -> Tuple[int, List[Tuple[int, str]]]:
+    """
+    Importa um bloco de execuções (já validadas) em uma única transação.
+    Execuções de histórias inexistentes não são inseridas e são reportadas como erro.
+
+    Args:
+        db: A sessão do banco de dados SQLAlchemy.
+        items: Pares (número da linha no arquivo importado, dados da execução).
+        player_user_id: O ID do usuário que está importando (gravado como jogador).
+
+    Returns:
+        (número de execuções inseridas, lista de (linha, mensagem de erro)).
+    """
+    creator_by_story = _creators_by_story(db, {execution_data.story_id for _, execution_data in items})
+    to_insert, errors = [], []
+    for line_number, execution_data in items:
+        if execution_data.story_id not in creator_by_story:
+            errors.append((line_number, f"História ID {execution_data.story_id} não encontrada."))
+            continue
+        to_insert.append(
+            (_execution_row(execution_data, player_user_id, creator_by_story[execution_data.story_id]), execution_data)
+        )
+    return _insert_executions(db, to_insert), errors
+
+def _creators_by_story(db: Session, story_ids: Iterable[int]) -> Dict[int, int]:
+    """Resolve, em uma única consulta, o creator_id de cada história."""
+    return dict(
+        db.query(models_db.Story.id, models_db.Story.creator_id)
+          .filter(models_db.Story.id.in_(set(story_ids)))
+          .all()
+    )
+
+def _insert_executions(
+    db: Session,
+    items: List[Tuple[Dict[str, Any], schemas.StoryExecutionCreate]]
+) -> int:
+    """
+    Insere as execuções (pares (linha de story_executions, dados validados)) com INSERTs de
+    múltiplas linhas (SQLAlchemy Core, RETURNING id na ordem dos parâmetros), grava as linhas
+    normalizadas e os incrementos dos agregados de análise na mesma transação, e faz commit.
+    """
+    if not items:
+        return 0
+    table = models_db.StoryExecution.__table__
+    execution_ids = db.execute(
+        insert(table).returning(table.c.id, sort_by_parameter_order=True),
+        [row for row, _ in items]
+    ).scalars().all()
+
+    answer_rows, visit_rows = [], []
+    delta = crud_analytics.AnalyticsDelta()
+    for execution_id, (_, execution_data) in zip(execution_ids, items):
+        answers, visits = _execution_detail_rows(
+            execution_id, execution_data.story_id, execution_data.answers, execution_data.pages_visited
+        )
+        answer_rows.extend(answers)
+        visit_rows.extend(visits)
+        delta.add_execution(execution_data)
+    _insert_execution_details(db, answer_rows, visit_rows)
+    crud_analytics.apply_analytics_delta(db, delta)
+    db.commit()
+
+    for creator_id in {row["creator_id"] for row, _ in items}:
+        executions_count_cache.invalidate(creator_id)
+    return len(items)
+
+def _decode_json(raw: Optional[str], expected_type: type):
+    if not raw:
+        return expected_type()
+    try:
+        value = orjson.loads(raw)
+    except orjson.JSONDecodeError:
+        return expected_type()
+    return value if isinstance(value, expected_type) else expected_type()
+
+def backfill_execution_details(db, batch_size: int = 1000) -> int:
+    """
+    Preenche execution_answers / execution_page_visits a partir das colunas JSON das execuções
+    que ainda não têm linhas normalizadas (idempotente; usada pela migração de backfill).
+    `db` pode ser uma Session ou uma Connection. Não faz commit.
+    Retorna o número de execuções processadas.
+    """
+    executions = models_db.StoryExecution.__table__
+    answers = models_db.ExecutionAnswer.__table__
+    visits = models_db.ExecutionPageVisit.__table__
+    missing = select(
+            executions.c.id, executions.c.story_id, executions.c.answers_json, executions.c.pages_visited_json
+        )\
+        .where(~select(answers.c.execution_id).where(answers.c.execution_id == executions.c.id).exists())\
+        .where(~select(visits.c.execution_id).where(visits.c.execution_id == executions.c.id).exists())\
+        .order_by(executions.c.id)\
+        .limit(batch_size)
+
+    processed, last_id = 0, 0
+    while True:
+        # Paginação por chave (id): cada lote é lido por completo antes das escritas
+        batch = db.execute(missing.where(executions.c.id > last_id)).all()
+        if not batch:
+            return processed
+        answer_rows, visit_rows = [], []
+        for row in batch:
+            row_answers, row_visits = _execution_detail_rows(
+                row.id, row.story_id, _decode_json(row.answers_json, dict), _decode_json(row.pages_visited_json, list)
+            )
+            answer_rows.extend(row_answers)
+            visit_rows.extend(row_visits)
+        _insert_execution_details(db, answer_rows, visit_rows)
+        processed += len(batch)
+        last_id = batch[-1].id
+
 def get_story_executions_for_creator(
     db: Session, 
     creator_id: int, 
     skip: int = 0, 
-    limit: int = 100
+    limit: int = 100,
+    after: Optional[ExecutionsCursor] = None
 ) -> List[models_db.StoryExecution]:
     """
     Busca todas as execuções de histórias para todas as histórias
@@ -60,23 +274,77 @@ def get_story_executions_for_creator(
     Args:
         db: A sessão do banco de dados SQLAlchemy.
         creator_id: O ID do usuário criador das histórias.
-        skip: Número de registros a pular (para paginação).
+        skip: Número de registros a pular (para paginação por OFFSET; ignorado se `after` for passado).
         limit: Número máximo de registros a retornar (para paginação).
+        after: Cursor (start_time, id) do último item da página anterior. Com ele, a página
+            é obtida por chave (WHERE (start_time, id) < cursor), sem percorrer e descartar
+            as linhas das páginas anteriores.
 
     Returns:
-        Uma lista de objetos StoryExecution.
-    """
-    # Certifique-se de que a linha 'return' está indentada corretamente
-    # em relação à linha 'def' acima (4 espaços, por exemplo).
-    # E que todas as linhas continuadas (com '\' ou dentro de parênteses)
-    # também estão indentadas consistentemente.
-    return db.query(models_db.StoryExecution)\
-             .join(models_db.Story, models_db.StoryExecution.story_id == models_db.Story.id)\
-             .filter(models_db.Story.creator_id == creator_id)\
-             .order_by(desc(models_db.StoryExecution.start_time))\
-             .offset(skip)\
-             .limit(limit)\
-             .all()
+        Uma lista de objetos StoryExecution, da mais recente para a mais antiga.
+    """
+    # Consulta em uma única tabela (creator_id desnormalizado), sem JOIN com stories
+    query = db.query(models_db.StoryExecution)
+    return _creator_executions_page(query, creator_id, skip, limit, after).all()
+
+def _creator_executions_page(query, creator_id: int, skip: int, limit: int, after: Optional[ExecutionsCursor]):
+    """Aplica à consulta o filtro do criador, a ordenação e a paginação (OFFSET ou cursor) do dashboard."""
+    query = query.filter(models_db.StoryExecution.creator_id == creator_id)
+
+    # O id desempata execuções com o mesmo start_time (ordem total, necessária para o cursor)
+    query = query.order_by(desc(models_db.StoryExecution.start_time), desc(models_db.StoryExecution.id))
+
+    if after is not None:
+        after_start_time, after_id = after
+        # O "start_time <= ..." redundante deixa o banco posicionar a leitura do índice
+        # (creator_id, start_time, id) direto no cursor; só com o OR, o SQLite percorre o
+        # índice desde o início da ordenação, e as páginas profundas ficam lentas
+        query = query.filter(
+            models_db.StoryExecution.start_time <= after_start_time,
+            or_(
+                models_db.StoryExecution.start_time < after_start_time,
+                and_(models_db.StoryExecution.start_time == after_start_time, models_db.StoryExecution.id < after_id)
+            )
+        )
+    else:
+        query = query.offset(skip)
+
+    return query.limit(limit)
+
+def get_story_executions_public_for_creator(
+    db: Session,
+    creator_id: int,
+    skip: int = 0,
+    limit: int = 100,
+    after: Optional[ExecutionsCursor] = None
+) -> List[Dict[str, Any]]:
+    """
+    Leitura rápida de get_story_executions_for_creator: busca só as colunas e devolve
+    dicionários já no formato de schemas.StoryExecutionPublic, prontos para o orjson.
+    answers / pages_visited são embutidos como estão (models_db.json_column_fragment),
+    depois de conferidos, sem passar pelo Pydantic.
+    """
+    execution = models_db.StoryExecution
+    query = db.query(
+        execution.id, execution.story_id, execution.player_user_id, execution.start_time, execution.end_time,
+        execution.duration_minutes, execution.answers_json, execution.pages_visited_json,
+        execution.story_title_at_play, execution.player_name_at_play
+    )
+    return [
+        {
+            "story_id": row.story_id,
+            "start_time": row.start_time,
+            "end_time": row.end_time,
+            "duration_minutes": float(row.duration_minutes) if row.duration_minutes is not None else None,
+            "answers": models_db.json_column_fragment(row.answers_json, dict),
+            "pages_visited": models_db.json_column_fragment(row.pages_visited_json, list),
+            "story_title_at_play": row.story_title_at_play,
+            "player_name_at_play": row.player_name_at_play,
+            "id": row.id,
+            "player_user_id": row.player_user_id,
+        }
+        for row in _creator_executions_page(query, creator_id, skip, limit, after)
+    ]
              
 def get_story_executions_for_creator_count(db: Session, creator_id: int) -> int:
     """
@@ -91,7 +359,145 @@ def get_story_executions_for_creator_count(db: Session, creator_id: int) -> int:
         O número total de execuções.
     """
     return db.query(models_db.StoryExecution.id)\
-             .join(models_db.Story, models_db.StoryExecution.story_id == models_db.Story.id)\
-             .filter(models_db.Story.creator_id == creator_id)\
+             .filter(models_db.StoryExecution.creator_id == creator_id)\
              .count()
-# --- FIM DA FUNÇÃO ADICIONADA ---
\ No newline at end of file
+
+def get_story_executions_for_creator_count_cached(db: Session, creator_id: int) -> int:
+    """
+    Igual a get_story_executions_for_creator_count, mas reaproveita a contagem por até
+    EXECUTIONS_COUNT_CACHE_TTL_SECONDS. A entrada do criador é invalidada a cada
+    nova execução gravada por este processo.
+    """
+    if EXECUTIONS_COUNT_CACHE_TTL_SECONDS <= 0:
+        return get_story_executions_for_creator_count(db, creator_id)
+    count = executions_count_cache.get(creator_id)
+    if count is None:
+        count = get_story_executions_for_creator_count(db, creator_id)
+        executions_count_cache.set(creator_id, count)
+    return count
+# --- FIM DA FUNÇÃO ADICIONADA ---
+
+# --- VARIANTES ASSÍNCRONAS (via AsyncSession.run_sync) ---
+async def create_story_execution_async(
+    db: AsyncSession,
+    execution_data: schemas.StoryExecutionCreate,
+    player_user_id: int
+) -> models_db.StoryExecution:
+    """Versão assíncrona de create_story_execution."""
+    return await db.run_sync(lambda s: create_story_execution(s, execution_data, player_user_id))
+
+async def create_story_executions_batch_async(
+    db: AsyncSession,
+    executions: Iterable[Tuple[schemas.StoryExecutionCreate, int]]
+) -> int:
+    """Versão assíncrona de create_story_executions_batch."""
+    executions = list(executions)
+    return await db.run_sync(lambda s: create_story_executions_batch(s, executions))
+
+async def import_story_executions_chunk_async(
+    db: AsyncSession,
+    items: List[Tuple[int, schemas.StoryExecutionCreate]],
+    player_user_id: int
+) -> Tuple[int, List[Tuple[int, str]]]:
+    """Versão assíncrona de import_story_executions_chunk."""
+    return await db.run_sync(lambda s: import_story_executions_chunk(s, items, player_user_id))
+
+async def get_story_executions_public_for_creator_async(
+    db: AsyncSession,
+    creator_id: int,
+    skip: int = 0,
+    limit: int = 100,
+    after: Optional[ExecutionsCursor] = None
+) -> List[Dict[str, Any]]:
+    """Versão assíncrona de get_story_executions_public_for_creator."""
+    return await db.run_sync(lambda s: get_story_executions_public_for_creator(s, creator_id, skip=skip, limit=limit, after=after))
+
+async def get_story_executions_for_creator_count_async(db: AsyncSession, creator_id: int) -> int:
+    """Versão assíncrona de get_story_executions_for_creator_count."""
+    return await db.run_sync(lambda s: get_story_executions_for_creator_count(s, creator_id))
+
+async def get_story_executions_for_creator_count_cached_async(db: AsyncSession, creator_id: int) -> int:
+    """Versão assíncrona de get_story_executions_for_creator_count_cached."""
+    return await db.run_sync(lambda s: get_story_executions_for_creator_count_cached(s, creator_id))
+# --- FIM DAS VARIANTES ASSÍNCRONAS ---
+
+
+# --- LEITURA EM STREAMING PARA EXPORTAÇÃO ---
+EXPORT_COLUMNS = (
+    models_db.StoryExecution.id,
+    models_db.StoryExecution.story_id,
+    models_db.StoryExecution.story_title_at_play,
+    models_db.StoryExecution.player_user_id,
+    models_db.StoryExecution.player_name_at_play,
+    models_db.StoryExecution.start_time,
+    models_db.StoryExecution.end_time,
+    models_db.StoryExecution.duration_minutes,
+    models_db.StoryExecution.answers_json,
+    models_db.StoryExecution.pages_visited_json,
+)
+
+def _creator_executions_filter(
+    creator_id: int,
+    story_id: Optional[int] = None,
+    start_from: Optional[datetime.datetime] = None,
+    start_to: Optional[datetime.datetime] = None
+):
+    conditions = [models_db.StoryExecution.creator_id == creator_id]
+    if story_id is not None:
+        conditions.append(models_db.StoryExecution.story_id == story_id)
+    if start_from is not None:
+        conditions.append(models_db.StoryExecution.start_time >= start_from)
+    if start_to is not None:
+        conditions.append(models_db.StoryExecution.start_time < start_to)
+    return and_(*conditions)
+
+async def stream_story_executions_for_creator(
+    creator_id: int,
+    story_id: Optional[int] = None,
+    start_from: Optional[datetime.datetime] = None,
+    start_to: Optional[datetime.datetime] = None,
+    batch_size: int = 1000
+) -> AsyncIterator[List[Dict[str, Any]]]:
+    """
+    Percorre as execuções das histórias de um criador (apenas colunas, sem entidades ORM),
+    em lotes de `batch_size` linhas lidos com yield_per, de modo que a memória usada não
+    depende do número total de execuções.
+    Abre a própria sessão, pois é consumido depois que a requisição já liberou a dela
+    (ex: dentro de um StreamingResponse).
+    """
+    stmt = select(*EXPORT_COLUMNS)\
+             .where(_creator_executions_filter(creator_id, story_id, start_from, start_to))\
+             .order_by(desc(models_db.StoryExecution.start_time), desc(models_db.StoryExecution.id))\
+             .execution_options(yield_per=batch_size)
+    async with AsyncSessionLocal() as db:
+        result = await db.stream(stmt)
+        async for partition in result.mappings().partitions():
+            yield [dict(row) for row in partition]
+
+def get_question_ids_for_creator(db: Session, creator_id: int, story_id: Optional[int] = None) -> List[str]:
+    """
+    IDs das questões (na ordem das páginas) das histórias do criador; usados como colunas
+    de respostas na exportação. O custo depende do tamanho das histórias, não das execuções.
+    """
+    query = db.query(models_db.StoryPage.questions_json)\
+              .join(models_db.Story, models_db.StoryPage.story_id == models_db.Story.id)\
+              .filter(models_db.Story.creator_id == creator_id)
+    if story_id is not None:
+        query = query.filter(models_db.Story.id == story_id)
+    question_ids: Dict[str, None] = {}
+    for (questions_json,) in query.order_by(models_db.Story.id, models_db.StoryPage.id_db):
+        if not questions_json:
+            continue
+        try:
+            questions = orjson.loads(questions_json)
+        except orjson.JSONDecodeError:
+            continue
+        for question in questions if isinstance(questions, list) else []:
+            if isinstance(question, dict) and question.get("id"):
+                question_ids[str(question["id"])] = None
+    return list(question_ids)
+
+async def get_question_ids_for_creator_async(db: AsyncSession, creator_id: int, story_id: Optional[int] = None) -> List[str]:
+    """Versão assíncrona de get_question_ids_for_creator."""
+    return await db.run_sync(lambda s: get_question_ids_for_creator(s, creator_id, story_id=story_id))
+# --- FIM DA LEITURA EM STREAMING ---
@@ -1,8 +1,72 @@
 # backend/app/crud_stories.py
-import json
-from sqlalchemy.orm import Session
-from typing import List, Optional
-from . import models_db, schemas
+import orjson
+import os
+import datetime
+import hashlib
+from sqlalchemy import delete, func
+from sqlalchemy.orm import Session, selectinload, joinedload, defaultload, undefer
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional, Dict, Any, Tuple
+from . import crud_analytics, markdown_render, models_db, schemas, story_cache, story_graph
+
+# Estratégia de carregamento das páginas (Story.pages) nas consultas de histórias:
+# "selectin" (1 consulta extra com IN para todas as histórias), "joined" (LEFT OUTER JOIN)
+# ou "lazy" (uma consulta por história no primeiro acesso; causa N+1 em listagens).
+PAGES_LOADING_STRATEGIES = ("selectin", "joined", "lazy")
+DEFAULT_PAGES_LOADING = os.getenv("STORY_PAGES_LOADING", "selectin")
+
+def _pages_loader_option(strategy: Optional[str]):
+    """Retorna a opção de carregamento de Story.pages para a estratégia pedida (ou None para lazy)."""
+    strategy = strategy or DEFAULT_PAGES_LOADING
+    if strategy == "selectin":
+        return selectinload(models_db.Story.pages)
+    if strategy == "joined":
+        return joinedload(models_db.Story.pages)
+    if strategy == "lazy":
+        return None
+    raise ValueError(f"Estratégia de carregamento inválida: {strategy}. Use uma de {PAGES_LOADING_STRATEGIES}.")
+
+def _apply_pages_loading(query, strategy: Optional[str]):
+    option = _pages_loader_option(strategy)
+    return query.options(option) if option is not None else query
+
+def page_content_hash(title: str, markdown: Optional[str], accent_color: Optional[str], questions_json: Optional[str]) -> str:
+    """Hash (SHA-256) do conteúdo de uma página; a posição não faz parte do hash."""
+    return hashlib.sha256(orjson.dumps([title, markdown, accent_color, questions_json])).hexdigest()
+
+def _page_columns(page_in_data: schemas.PageBase) -> Dict[str, Any]:
+    """Valores das colunas de conteúdo de StoryPage (com o content_hash) para uma página recebida."""
+    questions_list_of_dicts = [q.model_dump() for q in page_in_data.questions]
+    columns = {
+        "title": page_in_data.title,
+        "markdown": page_in_data.markdown,
+        "accent_color": page_in_data.accentColor,
+        "questions_json": orjson.dumps(questions_list_of_dicts).decode(),
+    }
+    columns["content_hash"] = page_content_hash(**columns)
+    return columns
+
+def _set_story_graph(db_story: models_db.Story, adjacency: Dict[str, List[str]]) -> None:
+    """Recalcula a análise do grafo (story_graph) e a guarda em Story.graph_json."""
+    db_story.graph_json = orjson.dumps(story_graph.analyze_graph(db_story.start_page_client_id, adjacency)).decode()
+
+def _stored_adjacency(db_story: models_db.Story) -> Optional[Dict[str, List[str]]]:
+    """Lista de adjacência da análise guardada (None se a história ainda não tiver análise)."""
+    if not db_story.graph_json:
+        return None
+    return orjson.loads(db_story.graph_json).get("adjacency")
+
+def _refresh_page_html(db_page: models_db.StoryPage) -> None:
+    """Renderiza o markdown da página em HTML (markdown_render), se ele mudou desde a última renderização."""
+    source_hash = markdown_render.markdown_hash(db_page.markdown)
+    if db_page.html_hash != source_hash:
+        db_page.html = markdown_render.render_markdown(db_page.markdown)
+        db_page.html_hash = source_hash
+
+def _touch_story(db_story: models_db.Story) -> None:
+    """Marca a história como modificada (updated_at e content_version, usados no ETag)."""
+    db_story.updated_at = datetime.datetime.utcnow()
+    db_story.content_version = (db_story.content_version or 1) + 1
 
 def create_story(db: Session, story_data: schemas.StoryCreateSchema, creator_id: int) -> models_db.Story:
     """
@@ -27,21 +91,18 @@ def create_story(db: Session, story_data: schemas.StoryCreateSchema, creator_id:
         print(f"    Título: {page_in_data.title}")
         print(f"    Markdown (vindo de page_in_data): {page_in_data.markdown[:100] if page_in_data.markdown else 'Nenhum'}")
         
-        questions_list_of_dicts = [q.model_dump() for q in page_in_data.questions]
-        questions_as_json_string = json.dumps(questions_list_of_dicts)
-
         db_page_object = models_db.StoryPage(
             client_page_id=page_in_data.id,
-            title=page_in_data.title,
-            markdown=page_in_data.markdown,
-            accent_color=page_in_data.accentColor,
-            questions_json=questions_as_json_string
+            position=i,
+            **_page_columns(page_in_data)
         )
+        _refresh_page_html(db_page_object)
         pages_for_db_story.append(db_page_object)
         # Linha de debug (pode ser removida após o teste)
         print(f"    Objeto db_page_object criado. Markdown: {db_page_object.markdown[:100] if db_page_object.markdown else 'Nenhum'}")
 
     db_story.pages = pages_for_db_story
+    _set_story_graph(db_story, story_graph.build_adjacency((p.id, p.markdown) for p in story_data.pages))
     db.add(db_story)
     
     db.commit()
@@ -59,27 +120,187 @@ def create_story(db: Session, story_data: schemas.StoryCreateSchema, creator_id:
     
     return db_story
 
-def get_stories_by_creator_id(db: Session, creator_id: int, skip: int = 0, limit: int = 100) -> List[models_db.Story]:
+def get_stories_by_creator_id(
+    db: Session,
+    creator_id: int,
+    skip: int = 0,
+    limit: int = 100,
+    pages_loading: Optional[str] = None
+) -> List[models_db.Story]:
     """
     Busca todas as histórias criadas por um usuário específico, com paginação.
+    `pages_loading` escolhe como Story.pages é carregado (ver PAGES_LOADING_STRATEGIES).
     """
-    return db.query(models_db.Story)\
+    query = _apply_pages_loading(db.query(models_db.Story), pages_loading)
+    return query\
              .filter(models_db.Story.creator_id == creator_id)\
              .order_by(models_db.Story.id.desc())\
              .offset(skip)\
              .limit(limit)\
              .all()
 
-def get_story_by_id(db: Session, story_id: int, creator_id: Optional[int] = None) -> Optional[models_db.Story]:
+def get_stories_by_ids(
+    db: Session,
+    story_ids: List[int],
+    pages_loading: Optional[str] = "selectin"
+) -> List[models_db.Story]:
+    """
+    Busca várias histórias de uma vez (uma única consulta com IN (...)), com as páginas
+    carregadas de forma antecipada. IDs inexistentes são ignorados.
+    """
+    if not story_ids:
+        return []
+    query = _apply_pages_loading(db.query(models_db.Story), pages_loading)
+    return query.filter(models_db.Story.id.in_(set(story_ids))).all()
+
+def get_story_summaries_by_creator_id(db: Session, creator_id: int, skip: int = 0, limit: int = 100) -> List[Dict[str, Any]]:
+    """
+    Lista resumida das histórias de um criador: apenas colunas (sem carregar entidades
+    ORM nem o conteúdo das páginas). O número de páginas é contado no próprio SQL.
+    """
+    page_count = func.count(models_db.StoryPage.id_db).label("page_count")
+    rows = db.query(
+                models_db.Story.id,
+                models_db.Story.title,
+                models_db.Story.start_page_client_id,
+                page_count,
+                models_db.Story.updated_at,
+             )\
+             .outerjoin(models_db.StoryPage, models_db.StoryPage.story_id == models_db.Story.id)\
+             .filter(models_db.Story.creator_id == creator_id)\
+             .group_by(models_db.Story.id)\
+             .order_by(models_db.Story.id.desc())\
+             .offset(skip)\
+             .limit(limit)\
+             .all()
+    return [row._asdict() for row in rows]
+
+def get_story_by_id(
+    db: Session,
+    story_id: int,
+    creator_id: Optional[int] = None,
+    pages_loading: Optional[str] = None,
+    include_html: bool = False
+) -> Optional[models_db.Story]:
     """
     Busca uma única história pelo seu ID.
     Opcionalmente, pode filtrar pelo creator_id para garantir que o usuário tenha acesso.
+    `pages_loading` escolhe como Story.pages é carregado (ver PAGES_LOADING_STRATEGIES).
+    `include_html` carrega também o HTML renderizado das páginas (StoryPage.html, deferred).
     """
-    query = db.query(models_db.Story).filter(models_db.Story.id == story_id)
+    query = _apply_pages_loading(db.query(models_db.Story), pages_loading)
+    if include_html:
+        query = query.options(defaultload(models_db.Story.pages).undefer(models_db.StoryPage.html))
+    query = query.filter(models_db.Story.id == story_id)
     if creator_id is not None:
         query = query.filter(models_db.Story.creator_id == creator_id)
     return query.first()
 
+# --- LEITURA RÁPIDA (linhas -> dicionários prontos para orjson) ---
+# Caminho de leitura sem ORM nem Pydantic: as colunas são lidas como tuplas e montadas em
+# dicionários com o mesmo formato de schemas.StoryPublic. O JSON das questões é embutido
+# como está (models_db.json_column_fragment), depois de conferido, sem passar pelo Pydantic.
+
+def _public_stories_from_rows(db: Session, story_rows: List[Any], include_html: bool = False) -> List[Dict[str, Any]]:
+    """
+    Monta os dicionários (formato StoryPublic, e PagePublicWithHtml se `include_html`) das
+    histórias em `story_rows`, buscando as páginas de todas elas em uma única consulta.
+    Cada dicionário leva também a chave "_version" (content_version e updated_at, para os
+    cabeçalhos HTTP), que deve ser removida antes da serialização.
+    """
+    if not story_rows:
+        return []
+    page = models_db.StoryPage
+    columns = [page.story_id, page.client_page_id, page.title, page.markdown, page.accent_color, page.questions_json]
+    if include_html:
+        columns.append(page.html)
+    page_rows = db.query(*columns)\
+                  .filter(page.story_id.in_([row.id for row in story_rows]))\
+                  .order_by(page.story_id, page.position, page.id_db)\
+                  .all()
+
+    pages_by_story: Dict[int, List[Dict[str, Any]]] = {row.id: [] for row in story_rows}
+    for row in page_rows:
+        page_dict = {
+            "id": row.client_page_id,
+            "title": row.title,
+            "markdown": row.markdown,
+            "accentColor": row.accent_color if row.accent_color is not None else schemas.DEFAULT_ACCENT_COLOR,
+            "questions": models_db.json_column_fragment(row.questions_json, list),
+        }
+        if include_html:
+            page_dict["html"] = row.html
+        pages_by_story[row.story_id].append(page_dict)
+
+    return [
+        {
+            "id": row.id,
+            "title": row.title,
+            "creator_id": row.creator_id,
+            "start_page_client_id": row.start_page_client_id,
+            "pages": pages_by_story[row.id],
+            "_version": {"content_version": row.content_version, "updated_at": row.updated_at},
+        }
+        for row in story_rows
+    ]
+
+def _story_columns_query(db: Session):
+    story = models_db.Story
+    return db.query(
+        story.id, story.title, story.creator_id, story.start_page_client_id,
+        story.content_version, story.updated_at
+    )
+
+def get_story_public(db: Session, story_id: int, include_html: bool = False) -> Optional[Dict[str, Any]]:
+    """Leitura rápida de uma história (ver _public_stories_from_rows). None se não existir."""
+    rows = _story_columns_query(db).filter(models_db.Story.id == story_id).all()
+    stories = _public_stories_from_rows(db, rows, include_html)
+    return stories[0] if stories else None
+
+def get_stories_public_by_ids(db: Session, story_ids: List[int]) -> List[Dict[str, Any]]:
+    """Leitura rápida de várias histórias (duas consultas no total). IDs inexistentes são ignorados."""
+    if not story_ids:
+        return []
+    rows = _story_columns_query(db).filter(models_db.Story.id.in_(set(story_ids))).all()
+    return _public_stories_from_rows(db, rows)
+
+def get_stories_public_by_creator_id(db: Session, creator_id: int, skip: int = 0, limit: int = 100) -> List[Dict[str, Any]]:
+    """Leitura rápida das histórias de um criador (mesma ordem e paginação de get_stories_by_creator_id)."""
+    rows = _story_columns_query(db)\
+             .filter(models_db.Story.creator_id == creator_id)\
+             .order_by(models_db.Story.id.desc())\
+             .offset(skip)\
+             .limit(limit)\
+             .all()
+    return _public_stories_from_rows(db, rows)
+
+def public_story_fields(story: Dict[str, Any]) -> Dict[str, Any]:
+    """Campos de resposta de uma história da leitura rápida (sem a chave interna "_version")."""
+    return {key: value for key, value in story.items() if key != "_version"}
+
+def dump_public_stories(stories: List[Dict[str, Any]]) -> bytes:
+    """Serializa (orjson) uma lista de histórias da leitura rápida."""
+    return orjson.dumps([public_story_fields(story) for story in stories])
+
+def get_story_version_info(db: Session, story_id: int) -> Optional[Dict[str, Any]]:
+    """
+    Retorna apenas a versão do conteúdo e a data de modificação da história
+    (consulta só de colunas, sem carregar páginas). Usada para requisições condicionais.
+    """
+    row = db.query(models_db.Story.content_version, models_db.Story.updated_at)\
+            .filter(models_db.Story.id == story_id)\
+            .first()
+    return row._asdict() if row is not None else None
+
+def get_story_versions_by_ids(db: Session, story_ids: List[int]) -> Dict[int, Dict[str, Any]]:
+    """Versão do conteúdo e data de modificação de várias histórias ({id: versão}); IDs inexistentes ficam de fora."""
+    if not story_ids:
+        return {}
+    rows = db.query(models_db.Story.id, models_db.Story.content_version, models_db.Story.updated_at)\
+             .filter(models_db.Story.id.in_(set(story_ids)))\
+             .all()
+    return {row.id: {"content_version": row.content_version, "updated_at": row.updated_at} for row in rows}
+
 def delete_story_by_id(db: Session, story_id: int, creator_id: int) -> Optional[models_db.Story]:
     """
     Apaga uma história específica do banco de dados, verificando o proprietário.
@@ -91,8 +312,13 @@ def delete_story_by_id(db: Session, story_id: int, creator_id: int) -> Optional[
 
     if db_story:
         print(f"CRUD: Apagando história ID {db_story.id} titulada '{db_story.title}' do usuário ID {creator_id}")
+        # Linhas que referenciam as execuções/história são apagadas antes (chaves estrangeiras)
+        for table in (models_db.ExecutionAnswer.__table__, models_db.ExecutionPageVisit.__table__):
+            db.execute(delete(table).where(table.c.story_id == story_id))
+        crud_analytics.delete_story_analytics(db, story_id) # Agregados das execuções apagadas
         db.delete(db_story)
         db.commit()
+        story_cache.invalidate(story_id)
         return db_story 
     
     print(f"CRUD: Tentativa de apagar história ID {story_id} falhou. Não encontrada ou usuário {creator_id} não é o proprietário.")
@@ -103,15 +329,19 @@ def update_story(
     db: Session, 
     story_id: int, 
     story_update_data: schemas.StoryCreateSchema, # Reutilizando o schema de criação
-    creator_id: int
+    creator_id: int,
+    pages_loading: Optional[str] = None
 ) -> Optional[models_db.Story]:
     """
     Atualiza uma história existente e suas páginas.
     Apenas o criador da história pode atualizá-la.
-    A estratégia atual é apagar todas as páginas antigas e recriá-las.
+    As páginas recebidas são comparadas com as existentes pelo client_page_id: só são
+    inseridas as novas, atualizadas as que mudaram (content_hash ou posição) e apagadas as
+    que não vieram mais. Se nada mudou, nada é gravado (e a versão/ETag não muda).
+    `pages_loading` escolhe como Story.pages é carregado (ver PAGES_LOADING_STRATEGIES).
     """
     # 1. Busca a história existente e verifica a propriedade
-    db_story = db.query(models_db.Story).filter(
+    db_story = _apply_pages_loading(db.query(models_db.Story), pages_loading).filter(
         models_db.Story.id == story_id,
         models_db.Story.creator_id == creator_id
     ).first()
@@ -123,50 +353,300 @@ def update_story(
     print(f"CRUD UPDATE: Atualizando história ID {story_id} titulada '{db_story.title}'")
 
     # 2. Atualiza os campos da história principal
+    changed = (
+        db_story.title != story_update_data.story_title
+        or db_story.start_page_client_id != story_update_data.start_page_client_id
+    )
     db_story.title = story_update_data.story_title
     db_story.start_page_client_id = story_update_data.start_page_client_id
-    
-    # 3. Apaga as páginas antigas.
-    # A maneira mais robusta com SQLAlchemy é limpar a coleção e deixar o `delete-orphan` agir,
-    # ou iterar e deletar explicitamente se precisar de mais controle ou se o `delete-orphan` não estiver configurado.
-    # Como temos delete-orphan, limpar a coleção e adicionar novas deve funcionar.
-    
-    # Remove as páginas antigas da sessão e da coleção da história.
-    # O SQLAlchemy, com cascade="all, delete-orphan", cuidará de deletá-las do banco no commit.
-    db_story.pages.clear() 
-    # Um db.flush() aqui executaria os deletes imediatamente, o que pode ser útil
-    # para evitar qualquer conflito de constraint se os IDs das páginas pudessem ser reutilizados (não é o nosso caso com client_page_id).
-    # db.flush()
 
+    # 3. Compara as páginas recebidas com as existentes (por client_page_id)
+    existing_pages: Dict[str, models_db.StoryPage] = {}
+    removed_pages: List[models_db.StoryPage] = []
+    for db_page in db_story.pages:
+        # Páginas com client_page_id repetido no banco: só a primeira é reaproveitada
+        if db_page.client_page_id in existing_pages:
+            removed_pages.append(db_page)
+        else:
+            existing_pages[db_page.client_page_id] = db_page
 
-    # 4. Cria e adiciona as novas páginas
-    new_pages_for_db_story = []
-    for page_in_data in story_update_data.pages:
-        questions_list_of_dicts = [q.model_dump() for q in page_in_data.questions]
-        questions_as_json_string = json.dumps(questions_list_of_dicts)
+    inserted = updated = 0
+    unchanged_page_ids = set() # Conteúdo igual: os links não precisam ser extraídos de novo
+    for position, page_in_data in enumerate(story_update_data.pages):
+        columns = _page_columns(page_in_data)
+        db_page = existing_pages.pop(page_in_data.id, None)
+        if db_page is None:
+            db_page = models_db.StoryPage(client_page_id=page_in_data.id, position=position, **columns)
+            _refresh_page_html(db_page)
+            db_story.pages.append(db_page)
+            inserted += 1
+            continue
+        if db_page.content_hash != columns["content_hash"]:
+            for column_name, value in columns.items():
+                setattr(db_page, column_name, value)
+            _refresh_page_html(db_page) # Só renderiza se o markdown mudou (não o título, a cor...)
+            updated += 1
+        else:
+            unchanged_page_ids.add(page_in_data.id)
+            if db_page.position != position:
+                updated += 1
+        db_page.position = position
 
-        db_page_object = models_db.StoryPage(
-            client_page_id=page_in_data.id,
-            title=page_in_data.title,
-            markdown=page_in_data.markdown,
-            accent_color=page_in_data.accentColor,
-            questions_json=questions_as_json_string,
-            story_id = db_story.id # Define explicitamente o story_id aqui
-        )
-        new_pages_for_db_story.append(db_page_object)
-        # Não precisa adicionar db_page_object à sessão se formos usar db_story.pages = ...
-        # ou se story_id for definido e db_story já estiver na sessão.
-
-    db_story.pages = new_pages_for_db_story # Atribui a nova lista de páginas. SQLAlchemy gerencia as mudanças.
-    
-    # Adiciona a história (já está na sessão por ter sido consultada, mas
-    # esta chamada garante que está "dirty" se necessário ou adiciona de volta se foi expulsa).
-    # Na verdade, modificar seus atributos já a marca como "dirty".
-    # db.add(db_story) # Geralmente não é necessário para objetos já persistidos e modificados
+    # 4. Apaga as páginas que não vieram na atualização (cascade="all, delete-orphan")
+    removed_pages.extend(existing_pages.values())
+    for db_page in removed_pages:
+        db_story.pages.remove(db_page)
 
+    if changed or inserted or updated or removed_pages:
+        _touch_story(db_story)
+        _set_story_graph(db_story, story_graph.build_adjacency(
+            ((p.id, p.markdown) for p in story_update_data.pages),
+            previous=_stored_adjacency(db_story),
+            unchanged=unchanged_page_ids
+        ))
     db.commit()
+    if changed or inserted or updated or removed_pages:
+        story_cache.invalidate(db_story.id) # Invalida a resposta em cache de GET /api/stories/{story_id}
     db.refresh(db_story) # Para recarregar a história e suas páginas atualizadas do banco
 
-    print(f"CRUD UPDATE: História ID {db_story.id} atualizada com {len(db_story.pages)} páginas.")
+    print(
+        f"CRUD UPDATE: História ID {db_story.id} atualizada com {len(db_story.pages)} páginas "
+        f"({inserted} novas, {updated} alteradas, {len(removed_pages)} removidas)."
+    )
     return db_story
-# --- FIM DA NOVA FUNÇÃO ---
\ No newline at end of file
+
+def _story_graph_for(db: Session, story_id: int, start_page_client_id: Optional[str], graph_json: Optional[str]) -> Dict[str, Any]:
+    """Análise guardada em Story.graph_json ou, se a história ainda não tiver uma, calculada das páginas (sem gravar)."""
+    if graph_json:
+        return orjson.loads(graph_json)
+    pages = db.query(models_db.StoryPage.client_page_id, models_db.StoryPage.markdown)\
+              .filter(models_db.StoryPage.story_id == story_id)\
+              .order_by(models_db.StoryPage.position, models_db.StoryPage.id_db)\
+              .all()
+    return story_graph.analyze_graph(start_page_client_id, story_graph.build_adjacency(pages))
+
+def get_story_graph(db: Session, story_id: int, creator_id: int) -> Optional[Dict[str, Any]]:
+    """
+    Análise do grafo de páginas da história (ver story_graph.analyze_graph), como guardada
+    no último salvamento. Retorna None se a história não existir ou não pertencer ao criador.
+    """
+    row = db.query(models_db.Story.start_page_client_id, models_db.Story.graph_json)\
+            .filter(models_db.Story.id == story_id, models_db.Story.creator_id == creator_id)\
+            .first()
+    if row is None:
+        return None
+    return _story_graph_for(db, story_id, row.start_page_client_id, row.graph_json)
+
+def get_story_manifest(db: Session, story_id: int) -> Optional[Dict[str, Any]]:
+    """
+    Índice da história para a entrega paginada: dados da história e, para cada página,
+    ID, título e links (da análise do grafo). Não carrega markdown nem questões.
+    """
+    row = db.query(
+                models_db.Story.id, models_db.Story.title, models_db.Story.creator_id,
+                models_db.Story.start_page_client_id, models_db.Story.graph_json,
+                models_db.Story.content_version, models_db.Story.updated_at
+            )\
+            .filter(models_db.Story.id == story_id)\
+            .first()
+    if row is None:
+        return None
+    adjacency = _story_graph_for(db, story_id, row.start_page_client_id, row.graph_json)["adjacency"]
+    pages = db.query(models_db.StoryPage.client_page_id, models_db.StoryPage.title)\
+              .filter(models_db.StoryPage.story_id == story_id)\
+              .order_by(models_db.StoryPage.position, models_db.StoryPage.id_db)\
+              .all()
+    return {
+        "id": row.id,
+        "title": row.title,
+        "creator_id": row.creator_id,
+        "start_page_client_id": row.start_page_client_id,
+        "content_version": row.content_version,
+        "updated_at": row.updated_at,
+        "page_count": len(pages),
+        "pages": [
+            {"id": page.client_page_id, "title": page.title, "links": adjacency.get(page.client_page_id, [])}
+            for page in pages
+        ],
+    }
+
+def get_story_pages_chunk(
+    db: Session,
+    story_id: int,
+    client_page_id: str,
+    prefetch: int = 0,
+    max_prefetch_pages: int = 50,
+    include_html: bool = False
+) -> Optional[Tuple[models_db.StoryPage, List[models_db.StoryPage]]]:
+    """
+    Uma página da história e, com `prefetch` > 0, as páginas alcançáveis a partir dela em
+    até `prefetch` links (no máximo `max_prefetch_pages`, em ordem de distância).
+    Todas as páginas vêm de uma única consulta (client_page_id IN (...)).
+    Retorna None se a história ou a página não existir.
+    """
+    page_ids = [client_page_id]
+    if prefetch > 0:
+        row = db.query(models_db.Story.start_page_client_id, models_db.Story.graph_json)\
+                .filter(models_db.Story.id == story_id)\
+                .first()
+        if row is None:
+            return None
+        adjacency = _story_graph_for(db, story_id, row.start_page_client_id, row.graph_json)["adjacency"]
+        page_ids += story_graph.pages_within_hops(adjacency, client_page_id, prefetch, max_prefetch_pages)
+
+    query = db.query(models_db.StoryPage)\
+              .filter(models_db.StoryPage.story_id == story_id, models_db.StoryPage.client_page_id.in_(page_ids))\
+              .order_by(models_db.StoryPage.position, models_db.StoryPage.id_db)
+    if include_html:
+        query = query.options(undefer(models_db.StoryPage.html))
+    pages_by_id: Dict[str, models_db.StoryPage] = {}
+    for db_page in query.all():
+        pages_by_id.setdefault(db_page.client_page_id, db_page) # client_page_id repetido: vale a primeira
+    if client_page_id not in pages_by_id:
+        return None
+    return pages_by_id[client_page_id], [pages_by_id[page_id] for page_id in page_ids[1:] if page_id in pages_by_id]
+
+def update_story_page(
+    db: Session,
+    story_id: int,
+    client_page_id: str,
+    page_update_data: schemas.PageUpdate,
+    creator_id: int
+) -> Optional[models_db.StoryPage]:
+    """
+    Atualiza uma única página (apenas os campos enviados) de uma história do criador.
+    Retorna None se a história não existir, não pertencer ao criador ou não tiver a página.
+    """
+    db_page = db.query(models_db.StoryPage)\
+                .join(models_db.Story, models_db.Story.id == models_db.StoryPage.story_id)\
+                .filter(
+                    models_db.StoryPage.story_id == story_id,
+                    models_db.StoryPage.client_page_id == client_page_id,
+                    models_db.Story.creator_id == creator_id
+                )\
+                .order_by(models_db.StoryPage.position, models_db.StoryPage.id_db)\
+                .first()
+    if db_page is None:
+        return None
+
+    page_data = {
+        "id": db_page.client_page_id,
+        "title": db_page.title,
+        "markdown": db_page.markdown or "",
+        "accentColor": db_page.accent_color,
+        "questions": db_page.questions,
+    }
+    page_data.update(page_update_data.model_dump(exclude_unset=True, exclude_none=True))
+    columns = _page_columns(schemas.PageBase.model_validate(page_data))
+    if db_page.content_hash != columns["content_hash"]:
+        for column_name, value in columns.items():
+            setattr(db_page, column_name, value)
+        _refresh_page_html(db_page)
+        db_story = db_page.story
+        _touch_story(db_story)
+        # Só os links desta página são extraídos de novo; as demais entradas vêm da análise guardada
+        adjacency = _stored_adjacency(db_story)
+        if adjacency is None:
+            adjacency = story_graph.build_adjacency((p.client_page_id, p.markdown) for p in db_story.pages)
+        else:
+            adjacency[client_page_id] = story_graph.extract_links(db_page.markdown)
+        _set_story_graph(db_story, adjacency)
+        db.commit()
+        story_cache.invalidate(story_id)
+        db.refresh(db_page)
+    return db_page
+# --- FIM DA NOVA FUNÇÃO ---
+
+# --- VARIANTES ASSÍNCRONAS ---
+# Executam as funções síncronas acima via AsyncSession.run_sync: a lógica continua
+# em um só lugar e o I/O do banco é feito pelo driver assíncrono, sem bloquear o event loop.
+# As páginas são carregadas ainda dentro do run_sync, pois um lazy load disparado
+# depois (na serialização da resposta) não é permitido com AsyncSession.
+
+def _with_pages(story: Optional[models_db.Story]) -> Optional[models_db.Story]:
+    if story is not None:
+        story.pages # Força o carregamento do relacionamento
+    return story
+
+async def create_story_async(db: AsyncSession, story_data: schemas.StoryCreateSchema, creator_id: int) -> models_db.Story:
+    """Versão assíncrona de create_story."""
+    return await db.run_sync(lambda s: _with_pages(create_story(s, story_data, creator_id)))
+
+async def get_story_summaries_by_creator_id_async(db: AsyncSession, creator_id: int, skip: int = 0, limit: int = 100) -> List[Dict[str, Any]]:
+    """Versão assíncrona de get_story_summaries_by_creator_id."""
+    return await db.run_sync(lambda s: get_story_summaries_by_creator_id(s, creator_id, skip=skip, limit=limit))
+
+async def get_story_public_async(db: AsyncSession, story_id: int, include_html: bool = False) -> Optional[Dict[str, Any]]:
+    """Versão assíncrona de get_story_public."""
+    return await db.run_sync(lambda s: get_story_public(s, story_id, include_html))
+
+async def get_stories_public_by_ids_async(db: AsyncSession, story_ids: List[int]) -> List[Dict[str, Any]]:
+    """Versão assíncrona de get_stories_public_by_ids."""
+    return await db.run_sync(lambda s: get_stories_public_by_ids(s, story_ids))
+
+async def get_stories_public_by_creator_id_async(
+    db: AsyncSession,
+    creator_id: int,
+    skip: int = 0,
+    limit: int = 100
+) -> List[Dict[str, Any]]:
+    """Versão assíncrona de get_stories_public_by_creator_id."""
+    return await db.run_sync(lambda s: get_stories_public_by_creator_id(s, creator_id, skip=skip, limit=limit))
+
+async def get_story_version_info_async(db: AsyncSession, story_id: int) -> Optional[Dict[str, Any]]:
+    """Versão assíncrona de get_story_version_info."""
+    return await db.run_sync(lambda s: get_story_version_info(s, story_id))
+
+async def get_story_versions_by_ids_async(db: AsyncSession, story_ids: List[int]) -> Dict[int, Dict[str, Any]]:
+    """Versão assíncrona de get_story_versions_by_ids."""
+    return await db.run_sync(lambda s: get_story_versions_by_ids(s, story_ids))
+
+async def delete_story_by_id_async(db: AsyncSession, story_id: int, creator_id: int) -> Optional[models_db.Story]:
+    """Versão assíncrona de delete_story_by_id."""
+    return await db.run_sync(lambda s: delete_story_by_id(s, story_id, creator_id))
+
+async def get_story_graph_async(db: AsyncSession, story_id: int, creator_id: int) -> Optional[Dict[str, Any]]:
+    """Versão assíncrona de get_story_graph."""
+    return await db.run_sync(lambda s: get_story_graph(s, story_id, creator_id))
+
+async def get_story_manifest_async(db: AsyncSession, story_id: int) -> Optional[Dict[str, Any]]:
+    """Versão assíncrona de get_story_manifest."""
+    return await db.run_sync(lambda s: get_story_manifest(s, story_id))
+
+async def get_story_pages_chunk_async(
+    db: AsyncSession,
+    story_id: int,
+    client_page_id: str,
+    prefetch: int = 0,
+    max_prefetch_pages: int = 50,
+    include_html: bool = False
+) -> Optional[Tuple[models_db.StoryPage, List[models_db.StoryPage]]]:
+    """Versão assíncrona de get_story_pages_chunk."""
+    return await db.run_sync(
+        lambda s: get_story_pages_chunk(s, story_id, client_page_id, prefetch, max_prefetch_pages, include_html)
+    )
+
+async def update_story_page_async(
+    db: AsyncSession,
+    story_id: int,
+    client_page_id: str,
+    page_update_data: schemas.PageUpdate,
+    creator_id: int
+) -> Optional[models_db.StoryPage]:
+    """Versão assíncrona de update_story_page."""
+    return await db.run_sync(
+        lambda s: update_story_page(s, story_id, client_page_id, page_update_data, creator_id)
+    )
+
+async def update_story_async(
+    db: AsyncSession,
+    story_id: int,
+    story_update_data: schemas.StoryCreateSchema,
+    creator_id: int,
+    pages_loading: Optional[str] = None
+) -> Optional[models_db.Story]:
+    """Versão assíncrona de update_story."""
+    return await db.run_sync(
+        lambda s: _with_pages(update_story(s, story_id, story_update_data, creator_id, pages_loading=pages_loading))
+    )
+# --- FIM DAS VARIANTES ASSÍNCRONAS ---
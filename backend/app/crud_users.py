@@ -1,7 +1,21 @@
-from typing import Optional
+import os
+from typing import Optional, Dict, Any
+from sqlalchemy import event, inspect
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from . import models_db, schemas # models_db para ORM, schemas para Pydantic
-from .auth_utils import get_password_hash
+from .auth_utils import get_password_hash, get_password_hash_async
+from .cache_utils import TTLCache
+
+# Configuração do cache de usuários autenticados (chaveado pelo "sub" do token, i.e. o email)
+# Evita uma consulta ao banco por requisição em get_current_user.
+USER_CACHE_ENABLED = os.getenv("USER_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+USER_CACHE_TTL_SECONDS = float(os.getenv("USER_CACHE_TTL_SECONDS", "60"))
+USER_CACHE_MAX_SIZE = int(os.getenv("USER_CACHE_MAX_SIZE", "1024"))
+
+user_cache = TTLCache(max_size=USER_CACHE_MAX_SIZE, ttl_seconds=USER_CACHE_TTL_SECONDS)
+
+_USER_CACHED_COLUMNS = ("id", "name", "email", "hashed_password")
 
 def get_user_by_email(db: Session, email: str) -> Optional[models_db.User]:
     """Busca um usuário pelo email."""
@@ -14,7 +28,10 @@ def get_user(db: Session, user_id: int) -> Optional[models_db.User]:
 def create_user(db: Session, user_create_data: schemas.UserCreate) -> models_db.User:
     """Cria um novo usuário no banco de dados."""
     hashed_password = get_password_hash(user_create_data.password)
-    
+    return _insert_user(db, user_create_data, hashed_password)
+
+def _insert_user(db: Session, user_create_data: schemas.UserCreate, hashed_password: str) -> models_db.User:
+    """Insere o usuário com a senha já processada pelo hash."""
     # Cria a instância do modelo ORM User
     db_user = models_db.User(
         email=user_create_data.email,
@@ -25,4 +42,73 @@ def create_user(db: Session, user_create_data: schemas.UserCreate) -> models_db.
     db.add(db_user)  # Adiciona o objeto à sessão
     db.commit()     # Confirma (salva) as mudanças no banco
     db.refresh(db_user) # Atualiza o objeto db_user com dados do banco (como o ID gerado)
-    return db_user
\ No newline at end of file
+    return db_user
+
+# --- VARIANTES ASSÍNCRONAS (via AsyncSession.run_sync) ---
+async def get_user_by_email_async(db: AsyncSession, email: str) -> Optional[models_db.User]:
+    """Versão assíncrona de get_user_by_email."""
+    return await db.run_sync(lambda s: get_user_by_email(s, email=email))
+
+async def get_user_async(db: AsyncSession, user_id: int) -> Optional[models_db.User]:
+    """Versão assíncrona de get_user."""
+    return await db.run_sync(lambda s: get_user(s, user_id=user_id))
+
+async def create_user_async(db: AsyncSession, user_create_data: schemas.UserCreate) -> models_db.User:
+    """
+    Versão assíncrona de create_user.
+    O hash da senha é feito no pool de hashing (auth_utils), fora do event loop.
+    """
+    hashed_password = await get_password_hash_async(user_create_data.password)
+    return await db.run_sync(lambda s: _insert_user(s, user_create_data, hashed_password))
+# --- FIM DAS VARIANTES ASSÍNCRONAS ---
+
+# --- CACHE DE USUÁRIOS AUTENTICADOS ---
+def get_user_by_email_cached(db: Session, email: str) -> Optional[models_db.User]:
+    """
+    Busca um usuário pelo email passando antes pelo cache em memória.
+    Em caso de acerto, retorna uma instância User desanexada da sessão (apenas colunas,
+    sem relacionamentos carregados), sem tocar no banco.
+    """
+    if not USER_CACHE_ENABLED:
+        return get_user_by_email(db, email=email)
+
+    cached: Optional[Dict[str, Any]] = user_cache.get(email)
+    if cached is not None:
+        return models_db.User(**cached)
+    return _load_user_into_cache(db, email)
+
+def _load_user_into_cache(db: Session, email: str) -> Optional[models_db.User]:
+    """Busca o usuário no banco e guarda suas colunas no cache."""
+    db_user = get_user_by_email(db, email=email)
+    if db_user is not None and USER_CACHE_ENABLED:
+        user_cache.set(email, {col: getattr(db_user, col) for col in _USER_CACHED_COLUMNS})
+    return db_user
+
+async def get_user_by_email_cached_async(db: AsyncSession, email: str) -> Optional[models_db.User]:
+    """Versão assíncrona de get_user_by_email_cached (acertos no cache não tocam o banco)."""
+    if USER_CACHE_ENABLED:
+        cached: Optional[Dict[str, Any]] = user_cache.get(email)
+        if cached is not None:
+            return models_db.User(**cached)
+    return await db.run_sync(lambda s: _load_user_into_cache(s, email))
+
+def invalidate_cached_user(email: Optional[str]) -> None:
+    """Remove um usuário do cache (chamado quando a linha do usuário muda)."""
+    if email:
+        user_cache.invalidate(email)
+
+def get_user_cache_stats() -> Dict[str, Any]:
+    """Retorna as estatísticas (hits/misses) do cache de usuários."""
+    stats = user_cache.stats()
+    stats["enabled"] = USER_CACHE_ENABLED
+    return stats
+
+@event.listens_for(models_db.User, "after_insert")
+@event.listens_for(models_db.User, "after_update")
+@event.listens_for(models_db.User, "after_delete")
+def _invalidate_user_on_change(mapper, connection, target):
+    # Invalida o email atual e, se o email foi alterado, também o antigo.
+    invalidate_cached_user(target.email)
+    for old_email in inspect(target).attrs.email.history.deleted or ():
+        invalidate_cached_user(old_email)
+# --- FIM DO CACHE DE USUÁRIOS ---
@@ -0,0 +1,198 @@
+# backend/app/execution_ingest.py
+import asyncio
+import os
+import time
+import uuid
+from typing import Any, Dict, List, Optional, Tuple
+
+from . import crud_executions, schemas
+from .database import AsyncSessionLocal
+
+# Modo de gravação das execuções recebidas em POST /api/story-executions/:
+#   "direct"   -> grava na hora (uma transação por execução) e responde 201 (padrão);
+#   "buffered" -> valida, coloca em uma fila em memória e responde 202; um writer em
+#                 segundo plano grava em lotes (INSERT de múltiplas linhas).
+# Cada execução aceita recebe um ingest_id, devolvido no 202 e registrado no log quando
+# a execução é gravada ou descartada.
+# Durabilidade no modo "buffered" (EXECUTION_INGEST_DURABILITY):
+#   "queued"  -> responde assim que a execução entra na fila (padrão); execuções ainda na
+#                fila ou no lote em gravação se perdem se o processo morrer sem o
+#                desligamento normal (janela de perda em stats());
+#   "written" -> a requisição espera o commit do lote que contém a execução (as gravações
+#                continuam agrupadas), sem janela de perda.
+EXECUTION_INGEST_MODE = os.getenv("EXECUTION_INGEST_MODE", "direct").lower()
+EXECUTION_INGEST_QUEUE_SIZE = int(os.getenv("EXECUTION_INGEST_QUEUE_SIZE", "10000"))
+EXECUTION_INGEST_BATCH_SIZE = int(os.getenv("EXECUTION_INGEST_BATCH_SIZE", "500"))
+EXECUTION_INGEST_FLUSH_INTERVAL_SECONDS = float(os.getenv("EXECUTION_INGEST_FLUSH_INTERVAL_SECONDS", "0.5"))
+EXECUTION_INGEST_DRAIN_TIMEOUT_SECONDS = float(os.getenv("EXECUTION_INGEST_DRAIN_TIMEOUT_SECONDS", "30"))
+EXECUTION_INGEST_DURABILITY = os.getenv("EXECUTION_INGEST_DURABILITY", "queued").lower()
+
+# (ingest_id, dados da execução, ID do jogador, futuro resolvido após a gravação no modo "written")
+QueuedExecution = Tuple[str, schemas.StoryExecutionCreate, int, Optional["asyncio.Future[bool]"]]
+
+_queue: Optional["asyncio.Queue[QueuedExecution]"] = None
+_writer_task: Optional[asyncio.Task] = None
+_accepting = False
+_in_flight = 0 # Execuções do lote sendo gravado (já fora da fila)
+_stats = {"enqueued": 0, "written": 0, "failed": 0, "batches": 0, "rejected": 0}
+
+
+class IngestQueueFullError(Exception):
+    """Levantada quando a fila de ingestão está cheia (ou parando)."""
+    pass
+
+class IngestWriteError(Exception):
+    """Levantada, no modo "written", quando a execução enfileirada não pôde ser gravada."""
+    pass
+
+
+def is_buffered() -> bool:
+    """Indica se as execuções devem passar pela fila (modo "buffered" ativo e writer rodando)."""
+    return EXECUTION_INGEST_MODE == "buffered" and _accepting
+
+def waits_for_write() -> bool:
+    """Indica se a requisição deve esperar a gravação da execução (EXECUTION_INGEST_DURABILITY="written")."""
+    return EXECUTION_INGEST_DURABILITY == "written"
+
+def enqueue(execution_data: schemas.StoryExecutionCreate, player_user_id: int) -> Tuple[str, Optional["asyncio.Future[bool]"]]:
+    """
+    Coloca uma execução (já validada) na fila de gravação.
+    Retorna (ingest_id, futuro): o ingest_id identifica a execução nos logs de gravação e
+    de descarte; o futuro (apenas no modo "written"; senão None) é resolvido com True
+    quando a execução é gravada ou False quando é descartada.
+    """
+    if not _accepting or _queue is None:
+        _stats["rejected"] += 1
+        raise IngestQueueFullError("Fila de ingestão não está aceitando execuções")
+    ingest_id = uuid.uuid4().hex
+    written = asyncio.get_running_loop().create_future() if waits_for_write() else None
+    try:
+        _queue.put_nowait((ingest_id, execution_data, player_user_id, written))
+    except asyncio.QueueFull:
+        _stats["rejected"] += 1
+        raise IngestQueueFullError("Fila de ingestão cheia")
+    _stats["enqueued"] += 1
+    return ingest_id, written
+
+async def wait_written(written: "asyncio.Future[bool]", ingest_id: str) -> None:
+    """Espera a gravação de uma execução enfileirada no modo "written"; levanta IngestWriteError se ela for descartada."""
+    if not await written:
+        raise IngestWriteError(f"Execução {ingest_id} não pôde ser gravada")
+
+def _resolve(item: QueuedExecution, written: bool) -> None:
+    future = item[3]
+    if future is not None and not future.done():
+        future.set_result(written)
+
+async def _write_batch(batch: List[QueuedExecution]) -> None:
+    """Grava um lote; se o lote falhar, tenta item a item para isolar as execuções inválidas."""
+    try:
+        async with AsyncSessionLocal() as db:
+            written = await crud_executions.create_story_executions_batch_async(
+                db, [(execution_data, player_user_id) for _, execution_data, player_user_id, _ in batch]
+            )
+        _stats["written"] += written
+        _stats["batches"] += 1
+        print(f"INGEST: {written} execuções gravadas: {', '.join(item[0] for item in batch)}")
+        for item in batch:
+            _resolve(item, True)
+        return
+    except Exception as e:
+        print(f"INGEST: Falha ao gravar lote de {len(batch)} execuções ({e}); gravando individualmente.")
+
+    for item in batch:
+        ingest_id, execution_data, player_user_id, _ = item
+        try:
+            async with AsyncSessionLocal() as db:
+                _stats["written"] += await crud_executions.create_story_executions_batch_async(
+                    db, [(execution_data, player_user_id)]
+                )
+        except Exception as e:
+            _stats["failed"] += 1
+            print(f"INGEST: Execução {ingest_id} (história ID {execution_data.story_id}) descartada: {e}")
+            _resolve(item, False)
+            continue
+        print(f"INGEST: Execução {ingest_id} gravada.")
+        _resolve(item, True)
+    _stats["batches"] += 1
+
+async def _writer_loop() -> None:
+    """Junta itens da fila até EXECUTION_INGEST_BATCH_SIZE ou até o intervalo de flush, e grava."""
+    global _in_flight
+    assert _queue is not None
+    while True:
+        first = await _queue.get()
+        batch = [first]
+        deadline = time.monotonic() + EXECUTION_INGEST_FLUSH_INTERVAL_SECONDS
+        while len(batch) < EXECUTION_INGEST_BATCH_SIZE:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(_queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        _in_flight = len(batch)
+        try:
+            await _write_batch(batch)
+        finally:
+            _in_flight = 0
+            for _ in batch:
+                _queue.task_done()
+
+async def start() -> None:
+    """Inicia a fila e o writer em segundo plano (chamado no startup da aplicação)."""
+    global _queue, _writer_task, _accepting
+    if EXECUTION_INGEST_MODE != "buffered" or _writer_task is not None:
+        return
+    _queue = asyncio.Queue(maxsize=EXECUTION_INGEST_QUEUE_SIZE)
+    _writer_task = asyncio.create_task(_writer_loop())
+    _accepting = True
+    print(
+        f"INGEST: modo 'buffered' ativo (lote={EXECUTION_INGEST_BATCH_SIZE}, "
+        f"intervalo={EXECUTION_INGEST_FLUSH_INTERVAL_SECONDS}s, durabilidade={EXECUTION_INGEST_DURABILITY})"
+    )
+
+async def stop() -> None:
+    """
+    Para de aceitar execuções e espera a fila esvaziar (até EXECUTION_INGEST_DRAIN_TIMEOUT_SECONDS)
+    antes de encerrar o writer (chamado no shutdown da aplicação).
+    """
+    global _queue, _writer_task, _accepting
+    if _writer_task is None:
+        return
+    _accepting = False
+    try:
+        await asyncio.wait_for(_queue.join(), EXECUTION_INGEST_DRAIN_TIMEOUT_SECONDS)
+    except asyncio.TimeoutError:
+        print(f"INGEST: tempo de drenagem esgotado; {_queue.qsize()} execuções não gravadas.")
+        while not _queue.empty():
+            item = _queue.get_nowait()
+            print(f"INGEST: Execução {item[0]} descartada no desligamento.")
+            _resolve(item, False)
+    _writer_task.cancel()
+    try:
+        await _writer_task
+    except asyncio.CancelledError:
+        pass
+    _queue, _writer_task = None, None
+
+def stats() -> Dict[str, Any]:
+    """
+    Estado da fila de ingestão e contadores. "unconfirmed" são as execuções já respondidas
+    com 202 e ainda não gravadas (perdidas se o processo morrer agora); "max_unconfirmed"
+    é o limite desse volume (0 no modo "written", em que a resposta espera a gravação).
+    """
+    pending = (_queue.qsize() if _queue is not None else 0) + _in_flight
+    return {
+        "mode": EXECUTION_INGEST_MODE,
+        "durability": EXECUTION_INGEST_DURABILITY,
+        "accepting": _accepting,
+        "queue_size": _queue.qsize() if _queue is not None else 0,
+        "queue_max_size": EXECUTION_INGEST_QUEUE_SIZE,
+        "batch_size": EXECUTION_INGEST_BATCH_SIZE,
+        "flush_interval_seconds": EXECUTION_INGEST_FLUSH_INTERVAL_SECONDS,
+        "unconfirmed": 0 if waits_for_write() else pending,
+        "max_unconfirmed": 0 if waits_for_write() else EXECUTION_INGEST_QUEUE_SIZE + EXECUTION_INGEST_BATCH_SIZE,
+        **_stats,
+    }
@@ -0,0 +1,73 @@
+# backend/app/executions_export.py
+import csv
+import io
+from typing import Any, AsyncIterator, Dict, List
+
+import orjson
+
+# Exportação das execuções em CSV ou NDJSON, com `answers` e `pages_visited` achatados
+# em colunas: uma coluna "answer:<id da questão>" por questão (múltipla escolha -> ids
+# separados por "|"), "answers_other" (JSON) para respostas de questões desconhecidas,
+# e "pages_visited" (ids separados por "|") + "pages_visited_count".
+
+EXPORT_FORMATS = ("csv", "ndjson")
+MULTI_VALUE_SEPARATOR = "|"
+
+BASE_FIELDS = [
+    "id", "story_id", "story_title_at_play", "player_user_id", "player_name_at_play",
+    "start_time", "end_time", "duration_minutes",
+]
+
+
+def export_fieldnames(question_ids: List[str]) -> List[str]:
+    """Cabeçalho da exportação para o conjunto de questões informado."""
+    return BASE_FIELDS + [f"answer:{qid}" for qid in question_ids] + [
+        "answers_other", "pages_visited", "pages_visited_count"
+    ]
+
+def _decode(raw: Any, expected_type: type):
+    if not raw:
+        return expected_type()
+    try:
+        value = orjson.loads(raw)
+    except orjson.JSONDecodeError:
+        return expected_type()
+    return value if isinstance(value, expected_type) else expected_type()
+
+def flatten_execution(row: Dict[str, Any], question_ids: List[str]) -> Dict[str, Any]:
+    """Converte uma linha de story_executions em um registro plano da exportação."""
+    record = {field: row.get(field) for field in BASE_FIELDS}
+    for field in ("start_time", "end_time"):
+        if record[field] is not None:
+            record[field] = record[field].isoformat()
+
+    answers = _decode(row.get("answers_json"), dict)
+    for qid in question_ids:
+        value = answers.pop(qid, None)
+        if isinstance(value, list):
+            value = MULTI_VALUE_SEPARATOR.join(str(v) for v in value)
+        record[f"answer:{qid}"] = value
+    record["answers_other"] = orjson.dumps(answers).decode() if answers else None
+
+    pages_visited = _decode(row.get("pages_visited_json"), list)
+    record["pages_visited"] = MULTI_VALUE_SEPARATOR.join(str(p) for p in pages_visited)
+    record["pages_visited_count"] = len(pages_visited)
+    return record
+
+async def render_csv(batches: AsyncIterator[List[Dict[str, Any]]], question_ids: List[str]) -> AsyncIterator[bytes]:
+    """Gera o CSV (com cabeçalho) lote a lote."""
+    fieldnames = export_fieldnames(question_ids)
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=fieldnames)
+    writer.writeheader()
+    yield buffer.getvalue().encode()
+    async for batch in batches:
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows(flatten_execution(row, question_ids) for row in batch)
+        yield buffer.getvalue().encode()
+
+async def render_ndjson(batches: AsyncIterator[List[Dict[str, Any]]], question_ids: List[str]) -> AsyncIterator[bytes]:
+    """Gera o NDJSON (um registro plano por linha) lote a lote."""
+    async for batch in batches:
+        yield b"".join(orjson.dumps(flatten_execution(row, question_ids)) + b"\n" for row in batch)
@@ -1,6 +1,8 @@
 # backend/app/main.py
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 
 # Importar routers
 from .routers import users_router
@@ -13,16 +15,29 @@ from .routers import executions_router # Router para os resultados da execução
 # antes de create_db_and_tables ser chamada.
 from . import models_db 
 from .database import engine, create_db_and_tables
+from . import execution_ingest
+from .compression import COMPRESSION_ENABLED, CompressionMiddleware
 
 # Criar tabelas no banco de dados (SE NÃO EXISTIREM)
 # Esta função agora também criará a tabela 'story_executions'
 # se ela ainda não existir, devido ao modelo StoryExecution em models_db.py.
 create_db_and_tables() 
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Inicia o writer da fila de ingestão de execuções (apenas no modo "buffered")
+    await execution_ingest.start()
+    yield
+    # Desligamento: grava o que ainda estiver na fila antes de encerrar
+    await execution_ingest.stop()
+
 app = FastAPI(
     title="Criador de Histórias Interativas API",
     description="API para gerenciar usuários e histórias interativas, incluindo resultados de execuções.",
-    version="0.1.1" # Versão incrementada para refletir novas funcionalidades
+    version="0.1.1", # Versão incrementada para refletir novas funcionalidades
+    lifespan=lifespan,
+    # Respostas JSON serializadas com orjson (mais rápido que o json da biblioteca padrão)
+    default_response_class=ORJSONResponse
 )
 
 # Configuração do CORS (Cross-Origin Resource Sharing)
@@ -41,6 +56,11 @@ app.add_middleware(
     allow_headers=["*"],         # Permite todos os cabeçalhos
 )
 
+# Compressão das respostas (gzip; brotli/zstd se instalados), acima de um tamanho mínimo.
+# Configurável por variáveis de ambiente (ver app/compression.py).
+if COMPRESSION_ENABLED:
+    app.add_middleware(CompressionMiddleware)
+
 # Incluir os routers na aplicação principal
 app.include_router(users_router.router)
 app.include_router(stories_router.router)
@@ -0,0 +1,77 @@
+# backend/app/markdown_render.py
+import hashlib
+from typing import Optional
+
+from markdown_it import MarkdownIt
+
+from .story_graph import generate_page_id
+
+# Renderização do markdown das páginas em HTML no servidor (markdown-it-py), feita ao salvar
+# a história (crud_stories) e guardada em StoryPage.html.
+# Sanitização: HTML bruto no markdown é desativado (vira texto escapado) e o markdown-it
+# já recusa links javascript:/vbscript:/file:/data:. Links externos abrem em nova aba
+# (como no StoryPlayerPage.jsx) e [[Título]] vira um link interno com data-page-id.
+
+# Incluída no hash: ao mudar a renderização, as páginas são renderizadas de novo no próximo salvamento
+RENDERER_VERSION = "2"
+
+_md = MarkdownIt("commonmark", {"html": False, "breaks": True}).enable(["table", "strikethrough"])
+
+# Título de um [[...]]: não vazio, sem "]" nem quebra de linha
+_INTERNAL_LINK_FORBIDDEN = ("]", "\n")
+
+
+def _internal_link_rule(state, silent: bool) -> bool:
+    """
+    Regra inline do markdown-it para [[Título]]: vira um link interno (com data-page-id).
+    Por ser uma regra do parser, não se aplica dentro de código (`...` e blocos) e, dentro
+    do texto alternativo de uma imagem, contribui apenas com o título.
+    """
+    # O modo silencioso só é usado ao delimitar o texto de outro link ([...](url)): ali os
+    # colchetes contam como texto, e dentro do link (linkLevel > 0) links não se aninham
+    if silent or state.linkLevel > 0:
+        return False
+    start = state.pos
+    if not state.src.startswith("[[", start):
+        return False
+    end = state.src.find("]]", start + 2, state.posMax)
+    if end == -1:
+        return False
+    raw_title = state.src[start + 2:end]
+    title = raw_title.strip()
+    if not title or any(char in raw_title for char in _INTERNAL_LINK_FORBIDDEN):
+        return False
+
+    token = state.push("link_open", "a", 1)
+    token.attrs = {
+        "href": "#",
+        "class": "internal-player-link",
+        "data-link-title": title,
+        "data-page-id": generate_page_id(title),
+    }
+    token = state.push("text", "", 0)
+    token.content = title
+    state.push("link_close", "a", -1)
+    state.pos = end + 2
+    return True
+
+_md.inline.ruler.before("link", "internal_link", _internal_link_rule)
+
+
+def _render_link_open(self, tokens, idx, options, env):
+    href = tokens[idx].attrGet("href") or ""
+    if href and not href.startswith("#"):
+        tokens[idx].attrSet("target", "_blank")
+        tokens[idx].attrSet("rel", "noopener noreferrer")
+    return self.renderToken(tokens, idx, options, env)
+
+_md.add_render_rule("link_open", _render_link_open)
+
+
+def render_markdown(markdown: Optional[str]) -> str:
+    """Renderiza o markdown de uma página em HTML sanitizado."""
+    return _md.render(markdown or "")
+
+def markdown_hash(markdown: Optional[str]) -> str:
+    """Hash da entrada da renderização (markdown + versão do renderizador)."""
+    return hashlib.sha256(f"{RENDERER_VERSION}\0{markdown or ''}".encode()).hexdigest()
@@ -0,0 +1,271 @@
+# backend/app/migrations.py
+"""
+Migrações de esquema versionadas.
+
+`Base.metadata.create_all` só cria tabelas (e seus índices) que ainda não existem; ele não
+altera tabelas de bancos criados por versões anteriores. Este módulo mantém uma lista
+ordenada de migrações e registra na tabela `schema_migrations` as que já foram aplicadas.
+
+Cada migração deve ser idempotente (verificar antes de criar), pois em um banco novo
+o `create_all` já terá criado o esquema final e a migração apenas será registrada.
+
+Uso:
+    - automaticamente, via database.create_db_and_tables() (chamado no main.py);
+    - manualmente: `python -m app.migrations` (no diretório backend/).
+"""
+import datetime
+from typing import Callable, List, Optional, Tuple
+
+from sqlalchemy import (
+    Column, DateTime, Index, Integer, MetaData, String, Table, inspect, select, text
+)
+from sqlalchemy.engine import Connection, Engine
+
+_migrations_metadata = MetaData()
+
+schema_migrations = Table(
+    "schema_migrations",
+    _migrations_metadata,
+    Column("version", Integer, primary_key=True),
+    Column("description", String, nullable=False),
+    Column("applied_at", DateTime, nullable=False),
+)
+
+
+# --- FUNÇÕES AUXILIARES (idempotentes) ---
+
+def _has_table(conn: Connection, table_name: str) -> bool:
+    return inspect(conn).has_table(table_name)
+
+def _has_column(conn: Connection, table_name: str, column_name: str) -> bool:
+    return any(col["name"] == column_name for col in inspect(conn).get_columns(table_name))
+
+def _add_column(conn: Connection, table_name: str, column_name: str, ddl_type: str) -> bool:
+    """Adiciona a coluna (ALTER TABLE ... ADD COLUMN) se ela ainda não existir."""
+    if not _has_table(conn, table_name) or _has_column(conn, table_name, column_name):
+        return False
+    print(f"Migração: adicionando coluna {table_name}.{column_name} ({ddl_type})")
+    conn.exec_driver_sql(f"ALTER TABLE {table_name} ADD COLUMN {column_name} {ddl_type}")
+    return True
+
+def _create_index(conn: Connection, table_name: str, index_name: str, column_names: List[str]) -> None:
+    """Cria o índice se ele ainda não existir."""
+    if not _has_table(conn, table_name):
+        return
+    if any(ix["name"] == index_name for ix in inspect(conn).get_indexes(table_name)):
+        return
+    table = Table(table_name, MetaData(), autoload_with=conn)
+    print(f"Migração: criando índice {index_name} em {table_name}({', '.join(column_names)})")
+    Index(index_name, *[table.c[name] for name in column_names]).create(conn)
+
+
+# --- MIGRAÇÕES ---
+
+def _0001_story_version_columns(conn: Connection) -> None:
+    """Colunas updated_at e content_version em stories (ETag / listagem resumida)."""
+    _add_column(conn, "stories", "updated_at", "DATETIME")
+    if _add_column(conn, "stories", "content_version", "INTEGER"):
+        conn.execute(
+            text("UPDATE stories SET content_version = 1, updated_at = COALESCE(updated_at, :now)"),
+            {"now": datetime.datetime.utcnow()},
+        )
+
+def _0002_dashboard_indexes(conn: Connection) -> None:
+    """Índices usados pelo dashboard do criador e pelas listagens de histórias."""
+    _create_index(conn, "stories", "ix_stories_creator_id_id", ["creator_id", "id"])
+    _create_index(conn, "story_pages", "ix_story_pages_story_id", ["story_id"])
+    _create_index(conn, "story_executions", "ix_story_executions_story_id_start_time_id", ["story_id", "start_time", "id"])
+    _create_index(conn, "story_executions", "ix_story_executions_player_user_id", ["player_user_id"])
+    _create_index(conn, "story_executions", "ix_story_executions_start_time_id", ["start_time", "id"])
+
+def _0003_executions_creator_id(conn: Connection) -> None:
+    """creator_id desnormalizado em story_executions (com backfill) e índice do dashboard."""
+    _add_column(conn, "story_executions", "creator_id", "INTEGER REFERENCES users(id)")
+    conn.execute(text(
+        "UPDATE story_executions SET creator_id = "
+        "(SELECT stories.creator_id FROM stories WHERE stories.id = story_executions.story_id) "
+        "WHERE creator_id IS NULL"
+    ))
+    _create_index(
+        conn, "story_executions", "ix_story_executions_creator_id_start_time_id", ["creator_id", "start_time", "id"]
+    )
+
+def _0004_story_analytics_backfill(conn: Connection) -> None:
+    """Preenche os agregados de análise por história a partir das execuções existentes."""
+    # As tabelas em si são criadas pelo create_all (tabelas novas)
+    from .crud_analytics import rebuild_story_analytics
+    if not _has_table(conn, "story_analytics_summary"):
+        return
+    processed = rebuild_story_analytics(conn)
+    print(f"Migração: agregados de análise recalculados a partir de {processed} execuções")
+
+def _0005_execution_details_backfill(conn: Connection) -> None:
+    """Preenche execution_answers / execution_page_visits e recalcula os agregados a partir delas."""
+    # As tabelas em si são criadas pelo create_all (tabelas novas)
+    from .crud_analytics import rebuild_story_analytics
+    from .crud_executions import backfill_execution_details
+    if not _has_table(conn, "execution_answers") or not _has_table(conn, "execution_page_visits"):
+        return
+    processed = backfill_execution_details(conn)
+    print(f"Migração: respostas e páginas visitadas normalizadas para {processed} execuções")
+    rebuild_story_analytics(conn)
+
+def _canonical_questions_json(questions_json: Optional[str]) -> Optional[str]:
+    """
+    questions_json no formato gravado hoje (orjson compacto), para o hash do conteúdo:
+    as páginas antigas foram gravadas com json.dumps (espaços após "," e ":", \\u escapes)
+    e, sem isso, pareceriam alteradas no primeiro salvamento sem mudanças.
+    """
+    import orjson
+    if not questions_json:
+        return questions_json
+    try:
+        return orjson.dumps(orjson.loads(questions_json)).decode()
+    except orjson.JSONDecodeError:
+        return questions_json
+
+def _set_page_content_hashes(conn: Connection, only_missing: bool, batch_size: int = 1000) -> None:
+    """Calcula story_pages.content_hash (das páginas sem hash ou, com only_missing=False, de todas)."""
+    from .crud_stories import page_content_hash
+    missing_filter = "content_hash IS NULL AND " if only_missing else ""
+    last_id = 0
+    while True:
+        rows = conn.execute(
+            text(
+                f"SELECT id, title, markdown, accent_color, questions_json, content_hash FROM story_pages "
+                f"WHERE {missing_filter}id > :last_id ORDER BY id LIMIT :limit"
+            ),
+            {"last_id": last_id, "limit": batch_size},
+        ).all()
+        if not rows:
+            return
+        updates = []
+        for row in rows:
+            content_hash = page_content_hash(
+                row.title, row.markdown, row.accent_color, _canonical_questions_json(row.questions_json)
+            )
+            if row.content_hash != content_hash:
+                updates.append({"id": row.id, "content_hash": content_hash})
+        if updates:
+            conn.execute(text("UPDATE story_pages SET content_hash = :content_hash WHERE id = :id"), updates)
+        last_id = rows[-1].id
+
+def _0006_story_pages_position_and_hash(conn: Connection) -> None:
+    """story_pages.position (ordem das páginas) e story_pages.content_hash (atualização incremental)."""
+    _add_column(conn, "story_pages", "position", "INTEGER")
+    _add_column(conn, "story_pages", "content_hash", "VARCHAR(64)")
+    # Mantém a ordem atual (por id) dentro de cada história
+    conn.execute(text("UPDATE story_pages SET position = id WHERE position IS NULL"))
+    _set_page_content_hashes(conn, only_missing=True)
+
+def _0007_story_graph(conn: Connection) -> None:
+    """stories.graph_json: análise do grafo de páginas, calculada para as histórias existentes."""
+    import orjson
+    from itertools import groupby
+    from .story_graph import analyze_graph, build_adjacency
+    _add_column(conn, "stories", "graph_json", "TEXT")
+    starts = dict(conn.execute(text("SELECT id, start_page_client_id FROM stories WHERE graph_json IS NULL")).all())
+    if not starts:
+        return
+    pages = conn.execute(text(
+        "SELECT story_id, client_page_id, markdown FROM story_pages ORDER BY story_id, position, id"
+    )) # Percorrido uma vez; só as listas de adjacência ficam em memória
+    adjacency_by_story = {
+        story_id: build_adjacency((page.client_page_id, page.markdown) for page in story_pages)
+        for story_id, story_pages in groupby(pages, key=lambda page: page.story_id)
+        if story_id in starts
+    }
+    conn.execute(
+        text("UPDATE stories SET graph_json = :graph_json WHERE id = :id"),
+        [
+            {"id": story_id, "graph_json": orjson.dumps(analyze_graph(start, adjacency_by_story.get(story_id, {}))).decode()}
+            for story_id, start in starts.items()
+        ],
+    )
+
+def _render_story_pages_html(conn: Connection, only_missing: bool, batch_size: int = 500) -> None:
+    """
+    Renderiza (markdown_render) o HTML das páginas sem HTML ou, com only_missing=False,
+    de todas as páginas cujo html_hash não corresponde à versão atual do renderizador.
+    """
+    from .markdown_render import markdown_hash, render_markdown
+    missing_filter = "html_hash IS NULL AND " if only_missing else ""
+    last_id = 0
+    while True:
+        rows = conn.execute(
+            text(
+                f"SELECT id, markdown, html_hash FROM story_pages WHERE {missing_filter}id > :last_id "
+                "ORDER BY id LIMIT :limit"
+            ),
+            {"last_id": last_id, "limit": batch_size},
+        ).all()
+        if not rows:
+            return
+        updates = []
+        for row in rows:
+            source_hash = markdown_hash(row.markdown)
+            if row.html_hash != source_hash:
+                updates.append({"id": row.id, "html": render_markdown(row.markdown), "html_hash": source_hash})
+        if updates:
+            conn.execute(text("UPDATE story_pages SET html = :html, html_hash = :html_hash WHERE id = :id"), updates)
+        last_id = rows[-1].id
+
+def _0008_story_pages_html(conn: Connection) -> None:
+    """story_pages.html e story_pages.html_hash: markdown pré-renderizado das páginas existentes."""
+    _add_column(conn, "story_pages", "html", "TEXT")
+    _add_column(conn, "story_pages", "html_hash", "VARCHAR(64)")
+    _render_story_pages_html(conn, only_missing=True)
+
+def _0009_story_pages_internal_links(conn: Connection) -> None:
+    """HTML das páginas renderizado de novo: [[...]] passou a ser uma regra do markdown-it (renderizador v2)."""
+    _render_story_pages_html(conn, only_missing=False)
+
+def _0010_canonical_page_content_hash(conn: Connection) -> None:
+    """Recalcula content_hash das páginas migradas pela versão 6 antes da canonicalização do JSON."""
+    _set_page_content_hashes(conn, only_missing=False)
+
+
+# Lista ordenada de migrações: (versão, descrição, função)
+MIGRATIONS: List[Tuple[int, str, Callable[[Connection], None]]] = [
+    (1, "stories.updated_at e stories.content_version", _0001_story_version_columns),
+    (2, "índices do dashboard e das listagens", _0002_dashboard_indexes),
+    (3, "story_executions.creator_id (desnormalizado) com backfill", _0003_executions_creator_id),
+    (4, "agregados de análise por história (backfill)", _0004_story_analytics_backfill),
+    (5, "execution_answers e execution_page_visits (backfill)", _0005_execution_details_backfill),
+    (6, "story_pages.position e story_pages.content_hash", _0006_story_pages_position_and_hash),
+    (7, "stories.graph_json (grafo de páginas)", _0007_story_graph),
+    (8, "story_pages.html e story_pages.html_hash (markdown pré-renderizado)", _0008_story_pages_html),
+    (9, "story_pages.html com links internos da regra do markdown-it", _0009_story_pages_internal_links),
+    (10, "story_pages.content_hash com o JSON das questões canônico", _0010_canonical_page_content_hash),
+]
+
+
+def run_migrations(engine: Engine) -> List[int]:
+    """
+    Aplica, em ordem, as migrações ainda não registradas em `schema_migrations`.
+    Cada migração roda em sua própria transação. Retorna as versões aplicadas.
+    """
+    _migrations_metadata.create_all(bind=engine)
+    with engine.connect() as conn:
+        applied = set(conn.execute(select(schema_migrations.c.version)).scalars())
+
+    newly_applied = []
+    for version, description, migration in MIGRATIONS:
+        if version in applied:
+            continue
+        with engine.begin() as conn:
+            migration(conn)
+            conn.execute(schema_migrations.insert().values(
+                version=version, description=description, applied_at=datetime.datetime.utcnow()
+            ))
+        newly_applied.append(version)
+    return newly_applied
+
+
+if __name__ == "__main__":
+    from . import models_db # Garante que Base.metadata conheça todos os modelos
+    from .database import engine, Base
+
+    Base.metadata.create_all(bind=engine)
+    versions = run_migrations(engine)
+    print(f"Migrações aplicadas: {versions}" if versions else "Banco de dados já está atualizado.")
@@ -1,10 +1,53 @@
 # backend/app/models_db.py
-import json 
+import orjson
 import datetime # Adicionado para o default de StoryExecution.start_time
-from sqlalchemy import Column, Integer, String, Text, ForeignKey, DateTime # Adicionado DateTime
-from sqlalchemy.orm import relationship
-from typing import List, Dict, Any 
+from sqlalchemy import Column, Integer, String, Text, ForeignKey, DateTime, Index # Adicionado DateTime
+from sqlalchemy.orm import deferred, relationship
+from typing import List, Dict, Any, Optional
 from .database import Base 
+from .schemas import DEFAULT_ACCENT_COLOR
+
+
+def _decoded_json_column(instance, column_name: str, expected_type: type):
+    """
+    Decodifica (com orjson) o JSON guardado na coluna `column_name` e memoriza o resultado
+    na própria instância. O cache é invalidado automaticamente quando a coluna recebe
+    um novo valor (comparação por identidade da string, O(1)).
+    Retorna uma instância vazia de `expected_type` se o JSON estiver ausente ou inválido.
+    Observação: o objeto devolvido é compartilhado entre acessos; não o modifique.
+    """
+    raw = getattr(instance, column_name)
+    cache = instance.__dict__.setdefault("_json_cache", {})
+    cached = cache.get(column_name)
+    if cached is not None and cached[0] is raw:
+        return cached[1]
+
+    decoded = expected_type()
+    if raw:
+        try:
+            loaded = orjson.loads(raw)
+            if isinstance(loaded, expected_type):
+                decoded = loaded
+        except orjson.JSONDecodeError:
+            pass # Ou logar erro
+    cache[column_name] = (raw, decoded)
+    return decoded
+
+def json_column_fragment(raw: Optional[str], expected_type: type) -> orjson.Fragment:
+    """
+    JSON guardado em uma coluna, embutido como está na serialização com orjson (sem
+    reserializar), para as leituras rápidas que montam a resposta a partir de linhas (ver
+    crud_stories / crud_executions). O JSON é conferido com orjson.loads: como em
+    _decoded_json_column, um valor ausente, inválido ou de outro tipo vira uma instância
+    vazia de `expected_type`, e um valor inválido nunca chega à resposta.
+    """
+    if raw:
+        try:
+            if isinstance(orjson.loads(raw), expected_type):
+                return orjson.Fragment(raw)
+        except orjson.JSONDecodeError:
+            pass
+    return orjson.Fragment(b"{}" if expected_type is dict else b"[]")
 
 class User(Base):
     __tablename__ = "users"
@@ -24,14 +67,29 @@ class User(Base):
 
 class Story(Base):
     __tablename__ = "stories"
+    __table_args__ = (
+        # Listagem das histórias de um criador (filtro por creator_id, ordenação por id)
+        Index("ix_stories_creator_id_id", "creator_id", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True, autoincrement=True)
     title = Column(String, index=True, nullable=False)
     creator_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     start_page_client_id = Column(String, nullable=True) 
+    # Data da última modificação (história ou páginas); atualizada em crud_stories.update_story
+    updated_at = Column(DateTime, default=datetime.datetime.utcnow, nullable=True)
+    # Versão do conteúdo (incrementada a cada atualização); usada no ETag de GET /api/stories/{id}
+    content_version = Column(Integer, default=1, nullable=True)
+    # Análise do grafo de páginas (story_graph.analyze_graph) em JSON, recalculada ao salvar.
+    # Carregada só quando acessada (deferred): as leituras da história não precisam dela.
+    graph_json = deferred(Column(Text, nullable=True))
 
     creator = relationship("User", back_populates="stories")
-    pages = relationship("StoryPage", back_populates="story", cascade="all, delete-orphan")
+    # Ordem das páginas definida por StoryPage.position (a ordem enviada pelo editor)
+    pages = relationship(
+        "StoryPage", back_populates="story", cascade="all, delete-orphan",
+        order_by="(StoryPage.position, StoryPage.id_db)"
+    )
     # Adicionando relacionamento para execuções desta história
     executions = relationship("StoryExecution", back_populates="story", cascade="all, delete-orphan")
 
@@ -40,6 +98,10 @@ class Story(Base):
 
 class StoryPage(Base):
     __tablename__ = "story_pages"
+    __table_args__ = (
+        # Carregamento das páginas de uma ou várias histórias (story_id IN (...))
+        Index("ix_story_pages_story_id", "story_id"),
+    )
 
     id_db = Column("id", Integer, primary_key=True, index=True, autoincrement=True) 
     client_page_id = Column(String, nullable=False, index=True) 
@@ -47,6 +109,15 @@ class StoryPage(Base):
     markdown = Column(Text, nullable=True)
     accent_color = Column(String, nullable=True)
     questions_json = Column(Text, nullable=True) 
+    # Posição da página na história e hash do conteúdo (título, markdown, cor e questões);
+    # usados por crud_stories.update_story para gravar apenas as páginas que mudaram
+    position = Column(Integer, nullable=True)
+    content_hash = Column(String(64), nullable=True)
+    # Markdown renderizado em HTML sanitizado (markdown_render) e o hash do markdown usado
+    # na renderização; a página só é renderizada de novo quando esse hash muda.
+    # O HTML só é carregado quando solicitado (deferred).
+    html = deferred(Column(Text, nullable=True))
+    html_hash = Column(String(64), nullable=True)
 
     story_id = Column(Integer, ForeignKey("stories.id"), nullable=False)
     story = relationship("Story", back_populates="pages")
@@ -55,17 +126,13 @@ class StoryPage(Base):
     def id(self) -> str: 
         return self.client_page_id
     
+    @property
+    def accentColor(self) -> str: # Lido por PagePublic (from_attributes); sem cor gravada, a padrão
+        return self.accent_color if self.accent_color is not None else DEFAULT_ACCENT_COLOR
+
     @property
     def questions(self) -> List[Dict[str, Any]]: 
-        if self.questions_json:
-            try:
-                loaded_questions = json.loads(self.questions_json)
-                if isinstance(loaded_questions, list):
-                    return loaded_questions
-                return [] 
-            except json.JSONDecodeError:
-                return [] 
-        return []
+        return _decoded_json_column(self, "questions_json", list)
 
     def __repr__(self):
         return f"<StoryPage(id_db={self.id_db}, client_page_id='{self.client_page_id}', title='{self.title}', story_id={self.story_id})>"
@@ -73,10 +140,22 @@ class StoryPage(Base):
 # --- NOVO MODELO StoryExecution ---
 class StoryExecution(Base):
     __tablename__ = "story_executions"
+    __table_args__ = (
+        # Dashboard do criador: JOIN por story_id e ordenação por (start_time, id)
+        Index("ix_story_executions_story_id_start_time_id", "story_id", "start_time", "id"),
+        Index("ix_story_executions_player_user_id", "player_user_id"),
+        Index("ix_story_executions_start_time_id", "start_time", "id"),
+        # Dashboard sem JOIN: filtro por creator_id e ordenação por (start_time, id), ambos DESC
+        # (o índice é percorrido de trás para frente)
+        Index("ix_story_executions_creator_id_start_time_id", "creator_id", "start_time", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True, autoincrement=True)
     story_id = Column(Integer, ForeignKey("stories.id"), nullable=False)
     player_user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    # Cópia (desnormalizada) de Story.creator_id, gravada na inserção; permite que as
+    # consultas do dashboard do criador não precisem de JOIN com stories
+    creator_id = Column(Integer, ForeignKey("users.id"), nullable=True)
     start_time = Column(DateTime, default=datetime.datetime.utcnow, nullable=False)
     end_time = Column(DateTime, nullable=True) 
     duration_minutes = Column(Integer, nullable=True)
@@ -89,27 +168,79 @@ class StoryExecution(Base):
     player = relationship("User", foreign_keys=[player_user_id], back_populates="executions")
 
     # --- NOVAS PROPRIEDADES PARA DESSERIALIZAÇÃO ---
+    # O JSON é decodificado uma vez por instância (ver _decoded_json_column)
     @property
     def answers(self) -> Dict[str, Any]:
-        if self.answers_json:
-            try:
-                return json.loads(self.answers_json)
-            except json.JSONDecodeError:
-                return {} # Ou logar erro
-        return {}
+        return _decoded_json_column(self, "answers_json", dict)
 
     @property
     def pages_visited(self) -> List[str]:
-        if self.pages_visited_json:
-            try:
-                loaded_pages = json.loads(self.pages_visited_json)
-                if isinstance(loaded_pages, list):
-                    return loaded_pages
-                return [] # Ou logar erro
-            except json.JSONDecodeError:
-                return [] # Ou logar erro
-        return []
+        return _decoded_json_column(self, "pages_visited_json", list)
     # --- FIM DAS NOVAS PROPRIEDADES ---
 
     def __repr__(self):
-        return f"<StoryExecution(id={self.id}, story_id={self.story_id}, player_user_id={self.player_user_id}, end_time='{self.end_time}')>"
\ No newline at end of file
+        return f"<StoryExecution(id={self.id}, story_id={self.story_id}, player_user_id={self.player_user_id}, end_time='{self.end_time}')>"
+
+# --- RESPOSTAS E PÁGINAS VISITADAS NORMALIZADAS ---
+# Cópia relacional de StoryExecution.answers_json / pages_visited_json, gravada junto com a
+# execução (ver crud_executions), para que perguntas como "quantos jogadores escolheram a
+# opção X" virem GROUP BYs indexados. A API continua expondo `answers`/`pages_visited` a
+# partir das colunas JSON. story_id é desnormalizado (como creator_id em StoryExecution)
+# para que as agregações por história não precisem de JOIN.
+
+class ExecutionAnswer(Base):
+    __tablename__ = "execution_answers"
+    __table_args__ = (
+        Index("ix_execution_answers_story_id_question_id_option_id", "story_id", "question_id", "option_id"),
+    )
+
+    execution_id = Column(Integer, ForeignKey("story_executions.id"), primary_key=True)
+    question_id = Column(String, primary_key=True)
+    option_id = Column(String, primary_key=True)   # Múltipla escolha: uma linha por opção
+    story_id = Column(Integer, ForeignKey("stories.id"), nullable=False)
+
+class ExecutionPageVisit(Base):
+    __tablename__ = "execution_page_visits"
+    __table_args__ = (
+        Index("ix_execution_page_visits_story_id_client_page_id", "story_id", "client_page_id"),
+    )
+
+    execution_id = Column(Integer, ForeignKey("story_executions.id"), primary_key=True)
+    seq = Column(Integer, primary_key=True)   # Posição da página no percurso (0 = primeira)
+    client_page_id = Column(String, nullable=False)
+    story_id = Column(Integer, ForeignKey("stories.id"), nullable=False)
+
+
+# --- AGREGADOS DE ANÁLISE POR HISTÓRIA (ver crud_analytics) ---
+# Mantidos incrementalmente a cada execução gravada, para que GET /api/stories/{id}/analytics
+# leia apenas estas tabelas (tamanho proporcional a questões/páginas, não a execuções).
+
+class StoryAnalyticsSummary(Base):
+    __tablename__ = "story_analytics_summary"
+
+    story_id = Column(Integer, ForeignKey("stories.id"), primary_key=True)
+    executions_count = Column(Integer, nullable=False, default=0)
+    completed_count = Column(Integer, nullable=False, default=0)   # Execuções com end_time
+    total_duration_minutes = Column(Integer, nullable=False, default=0)
+
+class StoryAnswerCount(Base):
+    __tablename__ = "story_analytics_answers"
+
+    story_id = Column(Integer, ForeignKey("stories.id"), primary_key=True)
+    question_id = Column(String, primary_key=True)
+    option_id = Column(String, primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
+
+class StoryPageVisitCount(Base):
+    __tablename__ = "story_analytics_page_visits"
+
+    story_id = Column(Integer, ForeignKey("stories.id"), primary_key=True)
+    page_id = Column(String, primary_key=True)
+    count = Column(Integer, nullable=False, default=0)   # Execuções que passaram pela página
+
+class StoryDurationBucket(Base):
+    __tablename__ = "story_analytics_durations"
+
+    story_id = Column(Integer, ForeignKey("stories.id"), primary_key=True)
+    bucket_start_minutes = Column(Integer, primary_key=True)   # Limite inferior da faixa
+    count = Column(Integer, nullable=False, default=0)
@@ -1,10 +1,16 @@
 # backend/app/routers/executions_router.py
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List 
+from fastapi import APIRouter, Depends, HTTPException, status, Request, Response
+from fastapi.responses import JSONResponse, StreamingResponse
+from pydantic import ValidationError
+import datetime
+import orjson
+import os
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
 
-from .. import crud_executions, schemas, models_db 
-from ..database import get_db
+from .. import crud_executions, crud_stories, schemas, models_db, execution_ingest, executions_export
+from ..stream_parsing import iter_ndjson_records, iter_json_array_records
+from ..database import get_async_db
 from .users_router import get_current_user # Para obter o usuário autenticado
 
 router = APIRouter(
@@ -12,21 +18,62 @@ router = APIRouter(
     tags=["story-executions"],      
 )
 
+# Importação em lote: linhas por transação e limite de erros detalhados na resposta
+EXECUTION_IMPORT_CHUNK_SIZE = int(os.getenv("EXECUTION_IMPORT_CHUNK_SIZE", "500"))
+EXECUTION_IMPORT_MAX_REPORTED_ERRORS = int(os.getenv("EXECUTION_IMPORT_MAX_REPORTED_ERRORS", "1000"))
+
+# Exportação: linhas lidas do banco por lote (yield_per)
+EXECUTION_EXPORT_BATCH_SIZE = int(os.getenv("EXECUTION_EXPORT_BATCH_SIZE", "1000"))
+
 @router.post("/", response_model=schemas.StoryExecutionPublic, status_code=status.HTTP_201_CREATED)
 async def save_story_execution_results(
     execution_payload: schemas.StoryExecutionCreate, 
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: models_db.User = Depends(get_current_user) 
 ):
     """
     Salva os resultados de uma execução de história para o usuário autenticado.
+    No modo de ingestão "buffered" (ver execution_ingest.py), o payload validado é
+    colocado na fila de gravação e a resposta é 202 com o ingest_id da execução (registrado
+    no log quando ela é gravada ou descartada). Com EXECUTION_INGEST_DURABILITY="written",
+    o 202 só é enviado depois que o lote com a execução é gravado.
     """
+    if execution_ingest.is_buffered():
+        try:
+            ingest_id, written = execution_ingest.enqueue(execution_payload, player_user_id=current_user.id)
+        except execution_ingest.IngestQueueFullError:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Servidor ocupado. Tente salvar os resultados novamente em instantes.",
+                headers={"Retry-After": "1"},
+            )
+        if written is None:
+            return JSONResponse(
+                status_code=status.HTTP_202_ACCEPTED,
+                content={
+                    "status": "queued",
+                    "ingest_id": ingest_id,
+                    "detail": "Execução recebida; será gravada em segundo plano."
+                }
+            )
+        try:
+            await execution_ingest.wait_written(written, ingest_id)
+        except execution_ingest.IngestWriteError:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=f"Não foi possível gravar os resultados da execução (ingest_id {ingest_id})."
+            )
+        return JSONResponse(
+            status_code=status.HTTP_202_ACCEPTED,
+            content={"status": "written", "ingest_id": ingest_id, "detail": "Execução gravada."}
+        )
+
     try:
         # Linhas de debug (podem ser removidas ou comentadas em produção)
         # print(f"--- DADOS RECEBIDOS NO ROUTER (POST /story-executions) PELO USUÁRIO ID: {current_user.id} ---") 
         # print(f"Payload da execução: {execution_payload.model_dump_json(indent=2)}") 
         
-        saved_execution = crud_executions.create_story_execution(
+        saved_execution = await crud_executions.create_story_execution_async(
             db=db, 
             execution_data=execution_payload, 
             player_user_id=current_user.id
@@ -42,32 +89,166 @@ async def save_story_execution_results(
             detail=f"Ocorreu um erro interno ao tentar salvar os resultados da execução da história: {str(e)}"
         )
 
+@router.post("/import", response_model=schemas.StoryExecutionImportResult)
+async def import_story_executions(
+    request: Request,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: models_db.User = Depends(get_current_user)
+):
+    """
+    Importa execuções em lote (ex: resultados históricos ou jogados offline).
+    O corpo é lido em streaming, como NDJSON (uma execução por linha; padrão) ou, com
+    Content-Type application/json, como um array JSON. Cada registro é validado com
+    StoryExecutionCreate; os válidos são gravados em blocos de EXECUTION_IMPORT_CHUNK_SIZE
+    (uma transação por bloco). Registros inválidos são reportados sem interromper a importação.
+    """
+    content_type = request.headers.get("content-type", "")
+    if content_type.startswith("application/json"):
+        records = iter_json_array_records(request.stream())
+    else:
+        records = iter_ndjson_records(request.stream())
+
+    imported = 0
+    failed = 0
+    errors = []
+    chunk = []
+
+    def record_error(line_number: int, message: str):
+        nonlocal failed
+        failed += 1
+        if len(errors) < EXECUTION_IMPORT_MAX_REPORTED_ERRORS:
+            errors.append(schemas.StoryExecutionImportError(line=line_number, error=message))
+
+    async def flush_chunk():
+        nonlocal imported
+        inserted, chunk_errors = await crud_executions.import_story_executions_chunk_async(
+            db, list(chunk), player_user_id=current_user.id
+        )
+        imported += inserted
+        for line_number, message in chunk_errors:
+            record_error(line_number, message)
+        chunk.clear()
+
+    try:
+        async for line_number, raw_record in records:
+            try:
+                execution_data = schemas.StoryExecutionCreate.model_validate_json(raw_record)
+            except ValidationError as e:
+                first_error = e.errors()[0]
+                location = ".".join(str(part) for part in first_error.get("loc", ()))
+                record_error(line_number, f"{location}: {first_error.get('msg')}" if location else first_error.get("msg"))
+                continue
+            chunk.append((line_number, execution_data))
+            if len(chunk) >= EXECUTION_IMPORT_CHUNK_SIZE:
+                await flush_chunk()
+    except ValueError as e:
+        # Corpo malformado (ex: array JSON incompleto): o que já foi lido é gravado e o erro reportado
+        record_error(0, str(e))
+
+    if chunk:
+        await flush_chunk()
+
+    print(f"IMPORT: {imported} execuções importadas, {failed} rejeitadas, pelo usuário ID {current_user.id}") # Debug
+    return schemas.StoryExecutionImportResult(
+        imported=imported,
+        failed=failed,
+        errors=errors,
+        errors_truncated=failed > len(errors)
+    )
+
+@router.get("/export")
+async def export_creator_results(
+    format: str = "csv", # "csv" ou "ndjson"
+    story_id: Optional[int] = None, # Filtra por uma história específica
+    start_from: Optional[datetime.datetime] = None, # start_time >= start_from
+    start_to: Optional[datetime.datetime] = None, # start_time < start_to
+    db: AsyncSession = Depends(get_async_db),
+    current_user: models_db.User = Depends(get_current_user)
+):
+    """
+    Exporta (em streaming) todas as execuções das histórias do criador autenticado,
+    em CSV ou NDJSON, com as respostas e as páginas visitadas achatadas em colunas
+    (ver executions_export.py). A memória usada é constante, independente do volume.
+    """
+    if format not in executions_export.EXPORT_FORMATS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Formato inválido. Use um de: {', '.join(executions_export.EXPORT_FORMATS)}."
+        )
+
+    question_ids = await crud_executions.get_question_ids_for_creator_async(
+        db, creator_id=current_user.id, story_id=story_id
+    )
+    batches = crud_executions.stream_story_executions_for_creator(
+        creator_id=current_user.id,
+        story_id=story_id,
+        start_from=start_from,
+        start_to=start_to,
+        batch_size=EXECUTION_EXPORT_BATCH_SIZE
+    )
+
+    if format == "csv":
+        body = executions_export.render_csv(batches, question_ids)
+        media_type, extension = "text/csv; charset=utf-8", "csv"
+    else:
+        body = executions_export.render_ndjson(batches, question_ids)
+        media_type, extension = "application/x-ndjson", "ndjson"
+
+    filename = f"resultados-{datetime.datetime.utcnow():%Y%m%d-%H%M%S}.{extension}"
+    return StreamingResponse(
+        body,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+@router.get("/ingest/stats")
+async def get_ingest_stats(current_user: models_db.User = Depends(get_current_user)):
+    """Estado da fila de ingestão de execuções (modo "buffered")."""
+    return execution_ingest.stats()
+
 # --- ENDPOINT GET PARA O DASHBOARD DO CRIADOR MODIFICADO PARA PAGINAÇÃO ---
 @router.get("/dashboard/my-results", response_model=schemas.PaginatedStoryExecutions)
 async def get_dashboard_creator_results(
     skip: int = 0, 
     limit: int = 10, # Limite padrão de itens por página
-    db: Session = Depends(get_db),
+    cursor: Optional[str] = None, # Cursor (next_cursor da página anterior); quando usado, 'skip' é ignorado
+    include_total: bool = True, # Se False, não calcula o total (total_count vem como null)
+    include_stories: bool = False, # Se True, embute as definições das histórias referenciadas
+    db: AsyncSession = Depends(get_async_db),
     current_user: models_db.User = Depends(get_current_user) 
 ):
     """
     Recupera os resultados de execução para todas as histórias
     criadas pelo usuário autenticado (o criador), de forma paginada.
+    Suporta paginação por OFFSET (skip/limit) e por cursor (cursor/next_cursor), que
+    tem o mesmo custo para qualquer página. O total é opcional e reaproveitado por
+    alguns segundos (ver crud_executions.EXECUTIONS_COUNT_CACHE_TTL_SECONDS).
     """
-    print(f"--- REQUISIÇÃO GET /dashboard/my-results (paginada) PARA CRIADOR ID: {current_user.id}, skip: {skip}, limit: {limit} ---") # Debug
+    print(f"--- REQUISIÇÃO GET /dashboard/my-results (paginada) PARA CRIADOR ID: {current_user.id}, skip: {skip}, limit: {limit}, cursor: {cursor} ---") # Debug
+
+    after = None
+    if cursor:
+        try:
+            after = crud_executions.decode_executions_cursor(cursor)
+        except ValueError:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Cursor de paginação inválido.")
+        skip = 0
     
-    # 1. Obter o número total de execuções para este criador
-    total_count = crud_executions.get_story_executions_for_creator_count(
-        db=db, 
-        creator_id=current_user.id
-    )
+    # 1. Obter o número total de execuções para este criador (opcional, com cache)
+    total_count = None
+    if include_total:
+        total_count = await crud_executions.get_story_executions_for_creator_count_cached_async(
+            db=db, 
+            creator_id=current_user.id
+        )
     
-    # 2. Obter os itens da página atual
-    executions_items = crud_executions.get_story_executions_for_creator(
+    # 2. Obter os itens da página atual (leitura rápida: colunas -> dicionários, sem ORM)
+    executions_items = await crud_executions.get_story_executions_public_for_creator_async(
         db=db, 
         creator_id=current_user.id, 
         skip=skip, 
-        limit=limit
+        limit=limit,
+        after=after
     )
     
     # Não é mais necessário tratar 'if not executions_items:' aqui da mesma forma,
@@ -75,12 +256,31 @@ async def get_dashboard_creator_results(
     # O frontend pode decidir o que fazer com uma lista vazia de items.
     
     print(f"Retornando {len(executions_items)} de {total_count} resultados de execução para o dashboard do criador ID: {current_user.id}") # Debug
+
+    # Uma página cheia indica que pode haver mais itens
+    next_cursor = None
+    if executions_items and len(executions_items) == limit:
+        last_item = executions_items[-1]
+        next_cursor = crud_executions.encode_executions_cursor(last_item["start_time"], last_item["id"])
     
-    # 3. Construir e retornar o objeto de resposta paginada
-    return schemas.PaginatedStoryExecutions(
-        total_count=total_count,
-        limit=limit,
-        skip=skip,
-        items=executions_items # FastAPI converterá items para List[schemas.StoryExecutionPublic]
-    )
+    # 3. (Opcional) Buscar, em uma única consulta, as histórias referenciadas nesta página
+    stories = None
+    if include_stories:
+        story_ids = list(dict.fromkeys(item["story_id"] for item in executions_items))
+        stories = [
+            crud_stories.public_story_fields(story)
+            for story in await crud_stories.get_stories_public_by_ids_async(db, story_ids)
+        ]
+
+    # 4. Construir e retornar a resposta paginada (formato PaginatedStoryExecutions), serializada
+    # direto pelo orjson: os itens já saem do banco no formato do schema, sem revalidação
+    content = orjson.dumps({
+        "total_count": total_count,
+        "limit": limit,
+        "skip": skip,
+        "items": executions_items,
+        "next_cursor": next_cursor,
+        "stories": stories,
+    })
+    return Response(content=content, media_type="application/json")
 # --- FIM DO ENDPOINT MODIFICADO ---
\ No newline at end of file
@@ -1,10 +1,14 @@
 # backend/app/routers/stories_router.py
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, status, Response, Header, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional, Dict, Any
+from email.utils import format_datetime
+import datetime
+import orjson
+import os
 
-from .. import crud_stories, schemas, models_db 
-from ..database import get_db
+from .. import crud_analytics, crud_stories, schemas, models_db, story_cache
+from ..database import get_async_db
 from .users_router import get_current_user 
 
 router = APIRouter(
@@ -12,10 +16,60 @@ router = APIRouter(
     tags=["stories"],
 )
 
+# Número máximo de histórias por requisição em GET /api/stories/batch
+STORY_BATCH_MAX_IDS = int(os.getenv("STORY_BATCH_MAX_IDS", "100"))
+
+# Política de Cache-Control para GET /api/stories/{story_id}.
+# Padrão: o navegador pode guardar a resposta, mas deve revalidá-la (If-None-Match -> 304).
+STORY_CACHE_CONTROL = os.getenv("STORY_CACHE_CONTROL", "private, no-cache")
+
+# Entrega paginada (GET /api/stories/{id}/pages/{client_page_id}?prefetch=N):
+# distância máxima aceita em `prefetch` e número máximo de páginas pré-carregadas por resposta
+STORY_PREFETCH_MAX_HOPS = int(os.getenv("STORY_PREFETCH_MAX_HOPS", "3"))
+STORY_PREFETCH_MAX_PAGES = int(os.getenv("STORY_PREFETCH_MAX_PAGES", "50"))
+
+
+def _story_http_headers(story_id: int, version_info: Dict[str, Any], variant: Optional[str] = None) -> Dict[str, str]:
+    """
+    Monta ETag, Last-Modified e Cache-Control para a versão atual da história.
+    Cada variante da resposta (ex: "html") tem seu próprio ETag.
+    """
+    # O updated_at entra no ETag para que uma história nova que reutilize o ID de uma
+    # história apagada (o SQLite pode reutilizar IDs) não gere o mesmo ETag.
+    updated_at = version_info.get("updated_at")
+    stamp = format(int(updated_at.timestamp() * 1_000_000), "x") if updated_at is not None else "0"
+    suffix = f"-{variant}" if variant else ""
+    headers = {
+        "ETag": f'"story-{story_id}-v{version_info.get("content_version") or 1}-{stamp}{suffix}"',
+        "Cache-Control": STORY_CACHE_CONTROL,
+    }
+    if updated_at is not None:
+        headers["Last-Modified"] = format_datetime(updated_at.replace(tzinfo=datetime.timezone.utc), usegmt=True)
+    return headers
+
+def _serialize_story(story: Dict[str, Any], variant: Optional[str] = None):
+    """
+    Serializa uma história da leitura rápida (crud_stories.get_story_public e afins, já no
+    formato StoryPublic / StoryPublicWithHtml) em bytes JSON e monta seus cabeçalhos HTTP.
+    Os dados vêm do banco, gravados pela própria API: não há revalidação pelo Pydantic.
+    """
+    headers = _story_http_headers(story["id"], story["_version"], variant)
+    body = orjson.dumps(crud_stories.public_story_fields(story))
+    return body, headers
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Verifica se o cabeçalho If-None-Match contém o ETag (comparação fraca)."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return any(tag.removeprefix("W/") == etag for tag in candidates)
+
 @router.post("/", response_model=schemas.StoryCreateResponse, status_code=status.HTTP_201_CREATED)
 async def create_new_story(
     story_data: schemas.StoryCreateSchema, 
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: models_db.User = Depends(get_current_user)
 ):
     """
@@ -30,7 +84,7 @@ async def create_new_story(
     # print("--- FIM DOS DADOS RECEBIDOS NO ROUTER (POST /stories) ---")
 
     try:
-        created_story = crud_stories.create_story(
+        created_story = await crud_stories.create_story_async(
             db=db, 
             story_data=story_data, 
             creator_id=current_user.id
@@ -53,14 +107,15 @@ async def create_new_story(
 async def read_user_stories(
     skip: int = 0, 
     limit: int = 100, 
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: models_db.User = Depends(get_current_user)
 ):
     """
     Recupera uma lista de histórias criadas pelo usuário autenticado.
     """
     # print(f"--- REQUISIÇÃO GET /stories PARA USUÁRIO ID: {current_user.id} ---") # Debug
-    stories = crud_stories.get_stories_by_creator_id(
+    # Leitura rápida: colunas -> dicionários -> orjson (duas consultas, sem ORM nem revalidação)
+    stories = await crud_stories.get_stories_public_by_creator_id_async(
         db=db, 
         creator_id=current_user.id, 
         skip=skip, 
@@ -70,37 +125,251 @@ async def read_user_stories(
         # print("Nenhuma história encontrada para este usuário.") # Debug
         # return [] # Retornar lista vazia é o comportamento correto
     # print(f"Retornando {len(stories)} histórias para o usuário ID: {current_user.id}") # Debug
-    return stories
+    return Response(content=crud_stories.dump_public_stories(stories), media_type="application/json")
+
+@router.get("/summary", response_model=List[schemas.StorySummary])
+async def read_user_story_summaries(
+    skip: int = 0,
+    limit: int = 100,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: models_db.User = Depends(get_current_user)
+):
+    """
+    Lista resumida das histórias do usuário autenticado (id, título, página inicial,
+    número de páginas e última modificação), sem o conteúdo das páginas.
+    Usada pelo Hub, que só precisa desses dados para montar a lista.
+    """
+    return await crud_stories.get_story_summaries_by_creator_id_async(
+        db=db,
+        creator_id=current_user.id,
+        skip=skip,
+        limit=limit
+    )
+
+@router.get("/batch", response_model=List[schemas.StoryPublic])
+async def read_stories_batch(
+    ids: str = Query(..., description="IDs das histórias separados por vírgula, ex: 1,2,3"),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: models_db.User = Depends(get_current_user)
+):
+    """
+    Recupera várias histórias completas em uma única requisição (ex: para o dashboard
+    resolver os rótulos de páginas e questões dos resultados).
+    As versões atuais são lidas em uma consulta; histórias em cache nessa versão são servidas
+    do cache e as demais vêm de uma única consulta IN (...).
+    IDs inexistentes são ignorados. A ordem dos IDs pedidos é mantida.
+    """
+    try:
+        story_ids = list(dict.fromkeys(int(part) for part in ids.split(",") if part.strip()))
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail="Parâmetro 'ids' inválido.")
+    if len(story_ids) > STORY_BATCH_MAX_IDS:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"No máximo {STORY_BATCH_MAX_IDS} histórias por requisição."
+        )
+
+    bodies: Dict[int, bytes] = {}
+    missing_ids = []
+    versions = await crud_stories.get_story_versions_by_ids_async(db, story_ids)
+    for story_id, version_info in versions.items():
+        cached = story_cache.get(story_id, version_info)
+        if cached is not None:
+            bodies[story_id] = cached
+        else:
+            missing_ids.append(story_id)
+
+    if missing_ids:
+        for story in await crud_stories.get_stories_public_by_ids_async(db, missing_ids):
+            body, _ = _serialize_story(story)
+            story_cache.store(story["id"], body, story["_version"])
+            bodies[story["id"]] = body
+
+    content = b"[" + b",".join(bodies[story_id] for story_id in story_ids if story_id in bodies) + b"]"
+    return Response(content=content, media_type="application/json")
+
+@router.get("/cache/stats")
+async def read_story_cache_stats(
+    current_user: models_db.User = Depends(get_current_user)
+):
+    """Estatísticas do cache de histórias serializadas (taxa de acerto e memória ocupada)."""
+    return story_cache.stats()
 
 @router.get("/{story_id}", response_model=schemas.StoryPublic)
 async def read_single_story(
     story_id: int,
-    db: Session = Depends(get_db),
+    include_html: bool = Query(False, description="Inclui em cada página o campo `html` (markdown renderizado e sanitizado no servidor)"),
+    if_none_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_async_db),
     current_user: models_db.User = Depends(get_current_user) # Ainda requer login para jogar
 ):
     """
     Recupera uma única história pelo seu ID para qualquer usuário autenticado jogar.
     A verificação de propriedade foi removida para leitura/jogo.
+    A versão atual é lida primeiro (uma consulta pela chave primária): com ela, responde 304
+    se o ETag enviado em If-None-Match ainda corresponder, ou serve o corpo em cache
+    gerado nessa mesma versão, sem carregar as páginas nem serializar a história.
+    Com include_html=true, cada página traz também o HTML pré-renderizado ao salvar.
     """
+    variant = "html" if include_html else None
     print(f"--- REQUISIÇÃO GET /stories/{story_id} PELO USUÁRIO ID: {current_user.id} (para jogar) ---") # Debug
+
+    version_info = await crud_stories.get_story_version_info_async(db, story_id=story_id)
+    if version_info is None:
+        print(f"História ID {story_id} não encontrada no banco de dados.") # Debug
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="História não encontrada")
+
+    headers = _story_http_headers(story_id, version_info, variant)
+    if _etag_matches(if_none_match, headers["ETag"]):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    # Caminho rápido: resposta já serializada em cache, na versão atual (sem ORM nem Pydantic)
+    cached_body = story_cache.get(story_id, version_info, variant)
+    if cached_body is not None:
+        return Response(content=cached_body, media_type="application/json", headers=headers)
+
+    # Busca pública (sem creator_id), para qualquer usuário logado. Leitura rápida: as colunas
+    # da história e das páginas viram dicionários serializados direto pelo orjson
+    story = await crud_stories.get_story_public_async(db, story_id=story_id, include_html=include_html)
     
-    # Chama get_story_by_id SEM passar creator_id, para buscar publicamente (para usuários logados)
-    db_story = crud_stories.get_story_by_id(db, story_id=story_id) 
-    
-    if db_story is None:
+    if story is None:
         # Agora, se não encontrar, é porque a história realmente não existe.
         print(f"História ID {story_id} não encontrada no banco de dados.") # Debug
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="História não encontrada")
     
-    print(f"Retornando história ID {story_id} (Título: '{db_story.title}') para o usuário ID {current_user.id} jogar.") # Debug
-    return db_story
+    print(f"Retornando história ID {story_id} (Título: '{story['title']}') para o usuário ID {current_user.id} jogar.") # Debug
+    # Os cabeçalhos vêm da versão efetivamente carregada (pode ser mais nova que a lida acima)
+    body, headers = _serialize_story(story, variant)
+    story_cache.store(story_id, body, story["_version"], variant)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+@router.get("/{story_id}/manifest", response_model=schemas.StoryManifest)
+async def read_story_manifest(
+    story_id: int,
+    if_none_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: models_db.User = Depends(get_current_user)
+):
+    """
+    Índice da história para a entrega paginada: IDs, títulos e links das páginas, sem o
+    conteúdo. O jogador busca cada página sob demanda em GET /{story_id}/pages/{client_page_id}.
+    Como GET /{story_id}: a versão é lida primeiro, e o 304 (If-None-Match) ou o corpo em
+    cache nessa versão dispensam a montagem do manifesto.
+    """
+    version_info = await crud_stories.get_story_version_info_async(db, story_id=story_id)
+    if version_info is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="História não encontrada")
+    headers = _story_http_headers(story_id, version_info, "manifest")
+    if _etag_matches(if_none_match, headers["ETag"]):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    cached_body = story_cache.get(story_id, version_info, "manifest")
+    if cached_body is not None:
+        return Response(content=cached_body, media_type="application/json", headers=headers)
+
+    manifest = await crud_stories.get_story_manifest_async(db, story_id=story_id)
+    if manifest is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="História não encontrada")
+    headers = _story_http_headers(story_id, manifest, "manifest")
+    body = schemas.StoryManifest.model_validate(manifest).model_dump_json().encode()
+    story_cache.store(story_id, body, manifest, "manifest")
+    return Response(content=body, media_type="application/json", headers=headers)
+
+@router.get("/{story_id}/pages/{client_page_id}", response_model=schemas.StoryPagesChunk)
+async def read_story_page(
+    story_id: int,
+    client_page_id: str,
+    prefetch: int = Query(0, ge=0, le=STORY_PREFETCH_MAX_HOPS, description="Inclui as páginas a até N links de distância"),
+    include_html: bool = Query(False, description="Inclui o campo `html` (markdown renderizado no servidor)"),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: models_db.User = Depends(get_current_user)
+):
+    """
+    Uma única página da história (para qualquer usuário autenticado jogar), opcionalmente
+    com as páginas alcançáveis a partir dela em até `prefetch` links, para que a próxima
+    navegação não precise esperar a rede. O custo não depende do tamanho da história.
+    """
+    chunk = await crud_stories.get_story_pages_chunk_async(
+        db,
+        story_id=story_id,
+        client_page_id=client_page_id,
+        prefetch=prefetch,
+        max_prefetch_pages=STORY_PREFETCH_MAX_PAGES,
+        include_html=include_html
+    )
+    if chunk is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Página não encontrada")
+    page, prefetched = chunk
+    # Sem include_html o HTML (deferred) não foi carregado e não deve ser acessado
+    page_schema = schemas.PagePublicWithHtml if include_html else schemas.PagePublic
+    return {
+        "story_id": story_id,
+        "page": page_schema.model_validate(page).model_dump(),
+        "prefetched": [page_schema.model_validate(p).model_dump() for p in prefetched],
+    }
+
+@router.get("/{story_id}/graph", response_model=schemas.StoryGraph)
+async def read_story_graph(
+    story_id: int,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: models_db.User = Depends(get_current_user)
+):
+    """
+    Estrutura da história calculada no último salvamento: links entre páginas, páginas
+    alcançáveis a partir da inicial (e a profundidade de cada uma), páginas inalcançáveis,
+    becos sem saída e links quebrados. Apenas o criador da história pode consultá-la.
+    """
+    graph = await crud_stories.get_story_graph_async(db, story_id=story_id, creator_id=current_user.id)
+    if graph is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="História não encontrada ou você não tem permissão para ver sua estrutura."
+        )
+    return {"story_id": story_id, **graph}
+
+@router.get("/{story_id}/analytics", response_model=schemas.StoryAnalytics)
+async def read_story_analytics(
+    story_id: int,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: models_db.User = Depends(get_current_user)
+):
+    """
+    Análise agregada das execuções da história: distribuição das respostas por questão,
+    visitas por página, taxa de conclusão e histograma de durações.
+    Lida dos agregados mantidos a cada execução gravada (ver crud_analytics).
+    Apenas o criador da história pode consultá-la.
+    """
+    analytics = await crud_analytics.get_story_analytics_async(db, story_id=story_id, creator_id=current_user.id)
+    if analytics is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="História não encontrada ou você não tem permissão para ver sua análise."
+        )
+    return analytics
+
+@router.get("/{story_id}/analytics/last-pages", response_model=List[schemas.AnalyticsLastPage])
+async def read_story_last_pages(
+    story_id: int,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: models_db.User = Depends(get_current_user)
+):
+    """
+    Última página visitada em cada execução da história, agrupada por página
+    (finais alcançados e pontos de abandono). Apenas o criador da história pode consultá-la.
+    """
+    last_pages = await crud_analytics.get_story_last_pages_async(db, story_id=story_id, creator_id=current_user.id)
+    if last_pages is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="História não encontrada ou você não tem permissão para ver sua análise."
+        )
+    return last_pages
 
 # --- NOVO ENDPOINT PUT PARA ATUALIZAR HISTÓRIA ---
 @router.put("/{story_id}", response_model=schemas.StoryPublic)
 async def update_story_endpoint(
     story_id: int,
     story_data: schemas.StoryCreateSchema, # Reutilizando StoryCreateSchema para o corpo da requisição de atualização
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: models_db.User = Depends(get_current_user)
 ):
     """
@@ -111,11 +380,12 @@ async def update_story_endpoint(
     print(f"--- REQUISIÇÃO PUT /stories/{story_id} PELO USUÁRIO ID: {current_user.id} ---") # Debug
     # print(f"Dados de atualização recebidos: {story_data.model_dump_json(indent=2)}") # Debug - Cuidado com dados grandes
 
-    updated_story = crud_stories.update_story(
+    updated_story = await crud_stories.update_story_async(
         db=db,
         story_id=story_id,
         story_update_data=story_data,
-        creator_id=current_user.id
+        creator_id=current_user.id,
+        pages_loading="selectin"
     )
 
     if updated_story is None:
@@ -130,10 +400,36 @@ async def update_story_endpoint(
     return updated_story
 # --- FIM DO NOVO ENDPOINT PUT ---
 
+@router.patch("/{story_id}/pages/{client_page_id}", response_model=schemas.PagePublic)
+async def update_story_page_endpoint(
+    story_id: int,
+    client_page_id: str,
+    page_data: schemas.PageUpdate,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: models_db.User = Depends(get_current_user)
+):
+    """
+    Atualiza uma única página da história (apenas os campos enviados), sem reenviar a
+    história inteira. Apenas o criador da história pode atualizá-la.
+    """
+    updated_page = await crud_stories.update_story_page_async(
+        db=db,
+        story_id=story_id,
+        client_page_id=client_page_id,
+        page_update_data=page_data,
+        creator_id=current_user.id
+    )
+    if updated_page is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Página não encontrada ou você não tem permissão para atualizá-la."
+        )
+    return updated_page
+
 @router.delete("/{story_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_story_endpoint(
     story_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: models_db.User = Depends(get_current_user)
 ):
     """
@@ -141,7 +437,7 @@ async def delete_story_endpoint(
     Apenas o criador da história pode apagá-la.
     """
     # print(f"--- REQUISIÇÃO DELETE /stories/{story_id} PELO USUÁRIO ID: {current_user.id} ---") # Debug
-    deleted_story = crud_stories.delete_story_by_id(
+    deleted_story = await crud_stories.delete_story_by_id_async(
         db=db, 
         story_id=story_id, 
         creator_id=current_user.id
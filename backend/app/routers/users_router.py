@@ -1,10 +1,10 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import timedelta
 
 from .. import crud_users, schemas, auth_utils, models_db # Ajuste nos imports
-from ..database import get_db # Importa get_db
+from ..database import get_async_db
 
 router = APIRouter(
     prefix="/api/users", # Prefixo para todas as rotas neste router
@@ -17,7 +17,7 @@ oauth2_scheme = OAuth2PasswordBearer(tokenUrl="api/users/login/token")
 
 
 async def get_current_user(
-    token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)
+    token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_async_db)
 ) -> models_db.User:
     """
     Dependência para obter o usuário atual a partir do token JWT.
@@ -33,38 +33,63 @@ async def get_current_user(
         raise credentials_exception
     
     # Aqui você pode adicionar lógica para verificar se o usuário existe no DB, se está ativo, etc.
-    user = crud_users.get_user_by_email(db, email=email)
+    # A busca passa pelo cache de usuários (ver crud_users.USER_CACHE_ENABLED).
+    user = await crud_users.get_user_by_email_cached_async(db, email=email)
     if user is None:
         raise credentials_exception
     return user
 
 
+def _password_hasher_busy_exception() -> HTTPException:
+    """Resposta 503 (com Retry-After) para quando o pool de hashing de senhas está saturado."""
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Servidor ocupado. Tente novamente em instantes.",
+        headers={"Retry-After": "1"},
+    )
+
+
+async def _verify_password_or_503(plain_password: str, hashed_password: str) -> bool:
+    """
+    Verifica a senha no pool de hashing (sem bloquear o event loop).
+    Responde 503 se o pool estiver saturado.
+    """
+    try:
+        return await auth_utils.verify_password_async(plain_password, hashed_password)
+    except auth_utils.PasswordHasherBusyError:
+        raise _password_hasher_busy_exception()
+
+
 @router.post("/register", response_model=schemas.UserPublic, status_code=status.HTTP_201_CREATED)
-def register_user(user_data: schemas.UserCreate, db: Session = Depends(get_db)):
+async def register_user(user_data: schemas.UserCreate, db: AsyncSession = Depends(get_async_db)):
     """
     Endpoint para registrar um novo usuário.
+    O hash da senha roda no pool de hashing (como no login); responde 503 se ele estiver saturado.
     """
-    db_user = crud_users.get_user_by_email(db, email=user_data.email)
+    db_user = await crud_users.get_user_by_email_async(db, email=user_data.email)
     if db_user:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Email já registrado."
         )
-    created_user = crud_users.create_user(db=db, user_create_data=user_data)
+    try:
+        created_user = await crud_users.create_user_async(db=db, user_create_data=user_data)
+    except auth_utils.PasswordHasherBusyError:
+        raise _password_hasher_busy_exception()
     return created_user
 
 
 @router.post("/login", response_model=schemas.Token) # Renomeado para /login, espera JSON
 async def login_for_access_token_json(
     form_data: schemas.UserLogin, # Espera um JSON com email e password
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Endpoint de login que espera um payload JSON (email, password).
     Retorna um token de acesso JWT se as credenciais forem válidas.
     """
-    user = crud_users.get_user_by_email(db, email=form_data.email)
-    if not user or not auth_utils.verify_password(form_data.password, user.hashed_password):
+    user = await crud_users.get_user_by_email_async(db, email=form_data.email)
+    if not user or not await _verify_password_or_503(form_data.password, user.hashed_password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Email ou senha incorretos",
@@ -81,7 +106,7 @@ async def login_for_access_token_json(
 @router.post("/login/token", response_model=schemas.Token) # Mantém /login/token para compatibilidade com OAuth2PasswordRequestForm
 async def login_for_access_token_form(
     form_data: OAuth2PasswordRequestForm = Depends(), # Espera Form Data (username, password)
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Endpoint de login que espera Form Data (username=email, password).
@@ -89,8 +114,8 @@ async def login_for_access_token_form(
     Retorna um token de acesso JWT.
     """
     # OAuth2PasswordRequestForm usa 'username' para o campo de identificação
-    user = crud_users.get_user_by_email(db, email=form_data.username) # form_data.username é o email
-    if not user or not auth_utils.verify_password(form_data.password, user.hashed_password):
+    user = await crud_users.get_user_by_email_async(db, email=form_data.username) # form_data.username é o email
+    if not user or not await _verify_password_or_503(form_data.password, user.hashed_password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Email ou senha incorretos (form)",
@@ -104,6 +129,21 @@ async def login_for_access_token_form(
     return {"access_token": access_token, "token_type": "bearer"}
 
 
+@router.get("/cache/stats")
+async def read_auth_cache_stats(current_user: models_db.User = Depends(get_current_user)):
+    """Estatísticas dos caches de autenticação: tokens já verificados e usuários autenticados."""
+    return {
+        "token_cache": auth_utils.get_token_cache_stats(),
+        "user_cache": crud_users.get_user_cache_stats(),
+    }
+
+
+@router.get("/password-hashing/stats")
+async def read_password_hashing_stats(current_user: models_db.User = Depends(get_current_user)):
+    """Estado do pool de hashing de senhas (workers, tarefas pendentes e custo do bcrypt)."""
+    return auth_utils.get_password_pool_stats()
+
+
 @router.get("/me", response_model=schemas.UserPublic)
 async def read_users_me(current_user: models_db.User = Depends(get_current_user)):
     """
@@ -58,6 +58,12 @@ class PageBase(BaseModel): # Para validação de entrada e base comum para saíd
 class PageCreate(PageBase): # Usado para validar os dados de página na criação da história (ENTRADA)
     pass 
 
+class PageUpdate(BaseModel): # ENTRADA de PATCH /api/stories/{id}/pages/{client_page_id}: só os campos enviados mudam
+    title: Optional[str] = None
+    markdown: Optional[str] = None
+    accentColor: Optional[str] = None
+    questions: Optional[List[QuestionBase]] = None
+
 class PagePublic(PageBase): # Usado para formatar a SAÍDA da API
     class Config:
         from_attributes = True # NECESSÁRIO AQUI para converter Modelos ORM (StoryPage) para este Schema na resposta
@@ -79,6 +85,21 @@ class StoryBaseForOutput(BaseModel):
 class StoryPublic(StoryBaseForOutput):
     pages: List[PagePublic] # Lista de páginas públicas
 
+# Variante de StoryPublic com o HTML renderizado de cada página (GET /api/stories/{id}?include_html=true)
+class PagePublicWithHtml(PagePublic):
+    html: Optional[str] = None # Markdown renderizado e sanitizado no servidor (ver markdown_render)
+
+class StoryPublicWithHtml(StoryPublic):
+    pages: List[PagePublicWithHtml]
+
+# Esquema resumido para a listagem de histórias (sem o conteúdo das páginas)
+class StorySummary(BaseModel):
+    id: int
+    title: str
+    start_page_client_id: Optional[str] = None
+    page_count: int
+    updated_at: Optional[datetime.datetime] = None
+
 # Esquema para ENTRADA de dados ao criar uma história (usado como request_body)
 class StoryCreateSchema(BaseModel): 
     story_title: str # Campo 'story_title' como o frontend envia
@@ -134,12 +155,28 @@ class StoryExecutionPublic(StoryExecutionBase):
 # ... (todos os seus esquemas existentes para User, Token, Question, Page, Story, StoryExecution) ...
 
 
+# --- ESQUEMAS PARA A IMPORTAÇÃO EM LOTE DE EXECUÇÕES ---
+class StoryExecutionImportError(BaseModel):
+    line: int   # Linha (NDJSON) ou posição no array (JSON), começando em 1
+    error: str
+
+class StoryExecutionImportResult(BaseModel):
+    imported: int                                 # Execuções gravadas
+    failed: int                                   # Linhas rejeitadas (validação ou história inexistente)
+    errors: List[StoryExecutionImportError]       # Detalhes dos erros (limitado; ver errors_truncated)
+    errors_truncated: bool = False
+
+
 # --- NOVO ESQUEMA PARA RESPOSTA PAGINADA DE EXECUÇÕES DE HISTÓRIA ---
 class PaginatedStoryExecutions(BaseModel):
-    total_count: int                      # Número total de execuções disponíveis para o criador
+    total_count: Optional[int] = None     # Número total de execuções disponíveis para o criador (None se include_total=false)
     limit: int                            # O limite de itens por página usado nesta requisição
     skip: int                             # O número de itens pulados (offset) nesta requisição
     items: List[StoryExecutionPublic]     # A lista de execuções para a página atual
+    next_cursor: Optional[str] = None     # Cursor para buscar a próxima página (None se não houver mais itens)
+    # Definições das histórias referenciadas em `items` (uma vez cada), quando
+    # solicitadas com include_stories=true; evita uma requisição por história no dashboard.
+    stories: Optional[List[StoryPublic]] = None
 
     # Opcional: Você poderia adicionar mais campos aqui se quisesse que o backend calculasse,
     # mas geralmente o frontend pode calcular isso a partir de total_count, limit, e skip.
@@ -150,4 +187,79 @@ class PaginatedStoryExecutions(BaseModel):
         from_attributes = True # Se for construir este objeto a partir de atributos de outro objeto não-Pydantic
                                # No nosso caso, vamos construir este objeto explicitamente no router,
                                # então esta Config pode não ser estritamente necessária para este schema em particular,
-                               # mas não prejudica.
\ No newline at end of file
+                               # mas não prejudica.
+
+# --- ESQUEMAS DA ANÁLISE AGREGADA POR HISTÓRIA (GET /api/stories/{id}/analytics) ---
+class AnalyticsOptionCount(BaseModel):
+    option_id: str
+    count: int
+
+class AnalyticsQuestion(BaseModel):
+    question_id: str
+    total_answers: int                       # Soma das opções (múltipla escolha conta cada opção)
+    options: List[AnalyticsOptionCount]      # Ordenadas da mais escolhida para a menos escolhida
+
+class AnalyticsPageVisits(BaseModel):
+    page_id: str                             # client_page_id
+    count: int                               # Execuções que passaram pela página
+
+class AnalyticsDurationBucket(BaseModel):
+    start_minutes: int
+    end_minutes: Optional[int] = None        # None na última faixa (aberta)
+    count: int
+
+class AnalyticsLastPage(BaseModel):
+    page_id: str                             # client_page_id da última página visitada
+    executions: int                          # Execuções que terminaram nesta página
+    not_completed: int                       # Dessas, as sem end_time (abandono)
+
+class StoryAnalytics(BaseModel):
+    story_id: int
+    executions_count: int
+    completed_count: int                     # Execuções com end_time
+    completion_rate: float
+    average_duration_minutes: Optional[float] = None
+    questions: List[AnalyticsQuestion]
+    page_visits: List[AnalyticsPageVisits]
+    duration_histogram: List[AnalyticsDurationBucket]
+
+
+# --- ESQUEMAS DO GRAFO DE PÁGINAS (GET /api/stories/{id}/graph) ---
+class StoryGraphBrokenLink(BaseModel):
+    page_id: str    # Página que contém o link
+    target: str     # ID (gerado a partir do título) da página inexistente
+
+class StoryGraph(BaseModel):
+    story_id: int
+    start_page_client_id: Optional[str] = None
+    start_page_exists: bool
+    page_count: int
+    adjacency: Dict[str, List[str]]    # client_page_id -> IDs referenciados por [[...]]
+    reachable: List[str]               # Alcançáveis a partir da página inicial (ordem da busca em largura)
+    unreachable: List[str]
+    depth: Dict[str, int]              # Menor número de links desde a página inicial
+    max_depth: int
+    dead_ends: List[str]               # Páginas sem links para páginas existentes
+    broken_links: List[StoryGraphBrokenLink]
+
+
+# --- ESQUEMAS DA ENTREGA PAGINADA DE HISTÓRIAS (manifesto + páginas sob demanda) ---
+class StoryManifestPage(BaseModel):
+    id: str                 # client_page_id
+    title: str
+    links: List[str]        # IDs das páginas referenciadas por [[...]]
+
+class StoryManifest(BaseModel):
+    id: int
+    title: str
+    creator_id: int
+    start_page_client_id: Optional[str] = None
+    content_version: Optional[int] = None
+    updated_at: Optional[datetime.datetime] = None
+    page_count: int
+    pages: List[StoryManifestPage]
+
+class StoryPagesChunk(BaseModel):
+    story_id: int
+    page: PagePublicWithHtml                 # A página pedida (html só com include_html=true)
+    prefetched: List[PagePublicWithHtml]     # Páginas a até `prefetch` links de distância
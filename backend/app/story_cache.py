@@ -0,0 +1,72 @@
+# backend/app/story_cache.py
+import os
+import threading
+from typing import Dict, Any, Optional
+
+from .cache_utils import BytesLRUCache
+
+# Cache das respostas de GET /api/stories/{story_id} já serializadas (bytes JSON).
+# Cada entrada guarda a versão da história (content_version e updated_at) com que foi
+# gerada, e só é servida se essa for a versão atual no banco: o router lê a versão
+# (uma consulta pela chave primária) a cada requisição. Assim, com vários workers
+# (cada um com o seu cache), uma atualização feita em outro processo nunca deixa uma
+# resposta antiga em uso. `invalidate` apenas libera a memória das entradas antigas.
+STORY_CACHE_ENABLED = os.getenv("STORY_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+STORY_CACHE_MAX_BYTES = int(os.getenv("STORY_CACHE_MAX_BYTES", str(64 * 1024 * 1024))) # 64 MB
+STORY_CACHE_MAX_ENTRIES = int(os.getenv("STORY_CACHE_MAX_ENTRIES", "1000"))
+
+_cache = BytesLRUCache(max_bytes=STORY_CACHE_MAX_BYTES, max_entries=STORY_CACHE_MAX_ENTRIES)
+# Variantes da resposta de uma mesma história (ex: "html", com o HTML das páginas)
+_variants = set()
+_variants_lock = threading.Lock()
+
+
+def _key(story_id: int, variant: Optional[str]):
+    return story_id if variant is None else (story_id, variant)
+
+def _version_tag(version_info: Dict[str, Any]) -> tuple:
+    # O updated_at distingue uma história nova que reutilize o ID de uma apagada
+    return version_info.get("content_version"), version_info.get("updated_at")
+
+
+def get(story_id: int, version_info: Dict[str, Any], variant: Optional[str] = None) -> Optional[bytes]:
+    """
+    Retorna o corpo serializado da história (ou da variante pedida) se estiver em cache
+    na versão `version_info` (a versão atual, lida do banco).
+    """
+    if not STORY_CACHE_ENABLED:
+        return None
+    key = _key(story_id, variant)
+    entry = _cache.get(key)
+    if entry is None:
+        return None
+    body, version_tag = entry
+    if version_tag != _version_tag(version_info):
+        _cache.invalidate(key)
+        return None
+    return body
+
+def store(story_id: int, body: bytes, version_info: Dict[str, Any], variant: Optional[str] = None) -> None:
+    """Guarda o corpo serializado, gerado a partir da versão `version_info` da história."""
+    if not STORY_CACHE_ENABLED:
+        return
+    if variant is not None:
+        with _variants_lock:
+            _variants.add(variant)
+    _cache.set(_key(story_id, variant), body, _version_tag(version_info))
+
+def invalidate(story_id: int) -> None:
+    """Remove a história (e suas variantes) do cache deste processo (após atualizar ou apagar)."""
+    _cache.invalidate(story_id)
+    for variant in list(_variants):
+        _cache.invalidate((story_id, variant))
+
+def stats() -> Dict[str, Any]:
+    """Estatísticas do cache de histórias (taxa de acerto e memória ocupada)."""
+    result = _cache.stats()
+    result["enabled"] = STORY_CACHE_ENABLED
+    return result
+
+def clear() -> None:
+    """Esvazia o cache (os contadores são mantidos)."""
+    _cache.clear()
@@ -0,0 +1,115 @@
+# backend/app/story_graph.py
+import re
+from collections import deque
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+# Análise do grafo de páginas de uma história, calculada ao salvar (crud_stories) e
+# guardada em Story.graph_json. Os links seguem a sintaxe do editor: [[Título da Página]],
+# com o destino identificado pelo mesmo ID que o frontend gera a partir do título
+# (generatePageId em MainPage.jsx / GraphViewModal.jsx).
+# Custo linear: O(tamanho do markdown) para extrair os links e O(páginas + links) para a
+# busca em largura a partir da página inicial.
+
+_LINK_RE = re.compile(r"\[\[(.*?)\]\]")
+_WHITESPACE_RE = re.compile(r"\s+")
+_NON_ID_CHARS_RE = re.compile(r"[^\w-]+", re.ASCII) # \w do JavaScript: apenas ASCII
+
+
+def generate_page_id(title: str) -> str:
+    """Equivalente ao generatePageId do frontend: trim, minúsculas, espaços -> '-', remove o resto."""
+    return _NON_ID_CHARS_RE.sub("", _WHITESPACE_RE.sub("-", title.strip().lower()))
+
+def extract_links(markdown: Optional[str]) -> List[str]:
+    """IDs das páginas referenciadas por [[...]] no markdown, sem repetição e na ordem em que aparecem."""
+    targets: Dict[str, None] = {}
+    for match in _LINK_RE.finditer(markdown or ""):
+        title = match.group(1).strip()
+        if title:
+            targets.setdefault(generate_page_id(title), None)
+    return list(targets)
+
+def build_adjacency(
+    pages: Iterable[Tuple[str, Optional[str]]],
+    previous: Optional[Dict[str, List[str]]] = None,
+    unchanged: Iterable[str] = ()
+) -> Dict[str, List[str]]:
+    """
+    Lista de adjacência {client_page_id: [IDs referenciados]} a partir de pares
+    (client_page_id, markdown). Para as páginas em `unchanged`, reaproveita a lista de
+    `previous` (análise anterior) sem reprocessar o markdown.
+    """
+    unchanged = set(unchanged)
+    adjacency: Dict[str, List[str]] = {}
+    for page_id, markdown in pages:
+        if page_id in adjacency:
+            continue # client_page_id repetido: vale a primeira página (como no jogador)
+        if previous is not None and page_id in unchanged and page_id in previous:
+            adjacency[page_id] = previous[page_id]
+        else:
+            adjacency[page_id] = extract_links(markdown)
+    return adjacency
+
+def analyze_graph(start_page_client_id: Optional[str], adjacency: Dict[str, List[str]]) -> Dict[str, Any]:
+    """
+    Analisa o grafo a partir da página inicial (busca em largura):
+      - reachable / unreachable: páginas alcançáveis (ordem da busca) e as demais;
+      - depth: número mínimo de links desde a página inicial, para cada página alcançável;
+      - dead_ends: páginas sem nenhum link para uma página existente (finais ou becos sem saída);
+      - broken_links: links para páginas que não existem.
+    """
+    broken_links = [
+        {"page_id": page_id, "target": target}
+        for page_id, targets in adjacency.items()
+        for target in targets
+        if target not in adjacency
+    ]
+    dead_ends = [
+        page_id for page_id, targets in adjacency.items()
+        if not any(target in adjacency for target in targets)
+    ]
+
+    depth: Dict[str, int] = {}
+    start_exists = start_page_client_id is not None and start_page_client_id in adjacency
+    if start_exists:
+        depth[start_page_client_id] = 0
+        queue = deque([start_page_client_id])
+        while queue:
+            page_id = queue.popleft()
+            for target in adjacency[page_id]:
+                if target in adjacency and target not in depth:
+                    depth[target] = depth[page_id] + 1
+                    queue.append(target)
+
+    return {
+        "start_page_client_id": start_page_client_id,
+        "start_page_exists": start_exists,
+        "page_count": len(adjacency),
+        "adjacency": adjacency,
+        "reachable": list(depth),
+        "unreachable": [page_id for page_id in adjacency if page_id not in depth],
+        "depth": depth,
+        "max_depth": max(depth.values(), default=0),
+        "dead_ends": dead_ends,
+        "broken_links": broken_links,
+    }
+
+def pages_within_hops(adjacency: Dict[str, List[str]], page_id: str, hops: int, max_pages: int) -> List[str]:
+    """
+    Páginas existentes alcançáveis a partir de `page_id` em até `hops` links (sem incluí-la),
+    em ordem de distância, limitadas a `max_pages`. Usada na pré-carga de páginas do jogador.
+    """
+    seen = {page_id}
+    found: List[str] = []
+    frontier = [page_id]
+    for _ in range(hops):
+        next_frontier = []
+        for current in frontier:
+            for target in adjacency.get(current, ()):
+                if target in adjacency and target not in seen:
+                    seen.add(target)
+                    found.append(target)
+                    next_frontier.append(target)
+                    if len(found) >= max_pages:
+                        return found
+        frontier = next_frontier
+    return found
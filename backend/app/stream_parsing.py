@@ -0,0 +1,124 @@
+# backend/app/stream_parsing.py
+import re
+from typing import AsyncIterable, AsyncIterator, Tuple
+
+# Leitura incremental de corpos de requisição grandes (importação em lote).
+# Os geradores abaixo recebem os blocos de bytes do corpo (ex: request.stream()) e
+# produzem um registro por vez, guardando em memória apenas o registro atual.
+
+# Tokens do parser do array JSON: uma string inteira (com escapes) ou um caractere
+# estrutural. Cada busca consome o trecho até o próximo token no motor de regex, sem
+# percorrer o corpo byte a byte em Python. Uma string cortada no fim do bloco casa até
+# o fim (grupo "tail" indica se o bloco terminou em uma barra de escape).
+_STRING_BODY = rb'[^"\\]*(?:\\.[^"\\]*)*(?:(?P<close>")|(?P<tail>\\?)\Z)'
+_TOKEN_RE = re.compile(rb'"' + _STRING_BODY + rb'|[{}\[\],]', re.DOTALL)
+_STRING_REST_RE = re.compile(_STRING_BODY, re.DOTALL)
+_NON_WHITESPACE_RE = re.compile(rb"[^ \t\r\n]")
+
+_QUOTE, _COMMA = ord('"'), ord(",")
+_OPENERS = (ord("{"), ord("["))
+
+async def iter_ndjson_records(chunks: AsyncIterable[bytes]) -> AsyncIterator[Tuple[int, bytes]]:
+    """
+    Produz (número da linha, bytes da linha) para cada linha não vazia de um corpo NDJSON.
+    As linhas são numeradas a partir de 1, contando também as linhas vazias.
+    """
+    pending = bytearray()
+    line_number = 0
+    async for chunk in chunks:
+        # Só o trecho novo é procurado: uma linha longa, recebida em muitos blocos,
+        # não é copiada nem varrida de novo a cada bloco
+        scan_from = len(pending)
+        pending += chunk
+        last_newline = pending.rfind(b"\n", scan_from)
+        if last_newline == -1:
+            continue
+        lines = bytes(pending[:last_newline]).split(b"\n")
+        del pending[:last_newline + 1]
+        for line in lines:
+            line_number += 1
+            line = line.strip()
+            if line:
+                yield line_number, line
+    line_number += 1
+    pending = bytes(pending).strip()
+    if pending:
+        yield line_number, pending
+
+
+async def iter_json_array_records(chunks: AsyncIterable[bytes]) -> AsyncIterator[Tuple[int, bytes]]:
+    """
+    Produz (posição, bytes do elemento) para cada elemento de um array JSON no nível
+    superior (ex: [{...}, {...}]), sem carregar o array inteiro. As posições começam em 1.
+    Levanta ValueError se o corpo não for um array JSON bem formado.
+    """
+    started = finished = False
+    depth = 0
+    in_string = escaped = False
+    current = bytearray() # Parte do elemento atual vinda de blocos anteriores
+    position = 0
+
+    async for chunk in chunks:
+        index, size = 0, len(chunk)
+        element_start = 0 # Início, neste bloco, do trecho do elemento atual
+
+        if in_string and size: # Continuação de uma string cortada no bloco anterior
+            if escaped:
+                index, escaped = 1, False
+            match = _STRING_REST_RE.match(chunk, index)
+            index = match.end()
+            if match.group("close") is None:
+                escaped = bool(match.group("tail"))
+                current += chunk
+                continue
+            in_string = False
+
+        while index < size:
+            if not started or finished:
+                match = _NON_WHITESPACE_RE.search(chunk, index)
+                if match is None:
+                    break
+                if finished:
+                    raise ValueError("Conteúdo inesperado após o fim do array JSON.")
+                if chunk[match.start()] != ord("["):
+                    raise ValueError("O corpo deve ser um array JSON.")
+                started, depth = True, 1
+                index = element_start = match.end()
+                continue
+
+            match = _TOKEN_RE.search(chunk, index)
+            if match is None:
+                break
+            found, index = match.start(), match.end()
+            char = chunk[found]
+            if char == _QUOTE:
+                if match.group("close") is None: # A string continua no próximo bloco
+                    in_string = True
+                    escaped = bool(match.group("tail"))
+            elif char in _OPENERS:
+                depth += 1
+            elif char == _COMMA:
+                if depth == 1: # Vírgula entre elementos do array
+                    current += chunk[element_start:found]
+                    position += 1
+                    yield position, bytes(current).strip()
+                    current.clear()
+                    element_start = index
+            else: # "}" ou "]"
+                depth -= 1
+                if depth == 0:
+                    finished = True
+                    current += chunk[element_start:found]
+                    record = bytes(current).strip()
+                    if record:
+                        position += 1
+                        yield position, record
+                    elif position: # "[..., ]": vírgula sem elemento depois dela
+                        raise ValueError("Vírgula sobrando antes do fim do array JSON.")
+                    current.clear()
+
+        if started and not finished:
+            current += chunk[element_start:]
+
+    if not finished:
+        raise ValueError("Array JSON incompleto.")
@@ -0,0 +1,71 @@
+# backend/benchmarks/_common.py
+# Utilitários compartilhados pelos benchmarks (rodar a partir de backend/, ex:
+# `python -m benchmarks.bench_token_cache`). Cada benchmark usa um banco SQLite
+# temporário próprio, definido antes de importar `app`.
+import os
+import statistics
+import tempfile
+import time
+from typing import Callable, Dict, List
+
+
+def use_temp_database(**env: str) -> str:
+    """Aponta DATABASE_URL para um SQLite temporário (e aplica `env`). Chamar antes de importar `app`."""
+    directory = tempfile.mkdtemp(prefix="story-creator-bench-")
+    os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(directory, 'bench.db')}")
+    for name, value in env.items():
+        os.environ.setdefault(name, value)
+    return directory
+
+def time_per_call(func: Callable[[], object], repeat: int, warmup: int = 3) -> float:
+    """Tempo médio (segundos) por chamada de `func`."""
+    for _ in range(warmup):
+        func()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - start) / repeat
+
+def percentiles(samples: List[float]) -> Dict[str, float]:
+    """p50 / p95 / p99 / máximo (em ms) de uma lista de latências em segundos."""
+    ordered = sorted(samples)
+    if not ordered:
+        return {"p50": 0.0, "p95": 0.0, "p99": 0.0, "max": 0.0}
+    quantiles = statistics.quantiles(ordered, n=100, method="inclusive") if len(ordered) > 1 else ordered * 99
+    return {
+        "p50": quantiles[49] * 1000,
+        "p95": quantiles[94] * 1000,
+        "p99": quantiles[98] * 1000,
+        "max": ordered[-1] * 1000,
+    }
+
+def print_table(title: str, header: List[str], rows: List[List[object]]) -> None:
+    """Imprime uma tabela simples em texto."""
+    print(f"\n{title}")
+    widths = [max(len(str(cell)) for cell in column) for column in zip(header, *rows)]
+    for line in [header, ["-" * width for width in widths], *rows]:
+        print("  ".join(str(cell).rjust(width) for cell, width in zip(line, widths)))
+
+def story_payload(pages: int, questions_per_page: int = 2, paragraph_repeat: int = 8) -> Dict[str, object]:
+    """
+    Corpo de POST /api/stories/ com `pages` páginas encadeadas por [[links]], cada uma
+    com `questions_per_page` questões de 3 opções.
+    """
+    page_list = []
+    for index in range(pages):
+        links = f"Siga para [[Pagina {index + 1}]]." if index + 1 < pages else "Fim."
+        page_list.append({
+            "id": f"pagina-{index}",
+            "title": f"Pagina {index}", # generate_page_id("Pagina 3") == "pagina-3"
+            "markdown": f"## Capítulo {index}\n\n" + "Era uma vez uma história com **escolhas**. " * paragraph_repeat + links,
+            "questions": [
+                {
+                    "id": f"q-{index}-{question}",
+                    "text": f"Pergunta {question} da página {index}?",
+                    "type": "single-choice",
+                    "options": [{"id": f"o-{index}-{question}-{option}", "text": f"Opção {option}"} for option in range(3)],
+                }
+                for question in range(questions_per_page)
+            ],
+        })
+    return {"story_title": f"História com {pages} páginas", "pages": page_list, "start_page_client_id": "pagina-0"}
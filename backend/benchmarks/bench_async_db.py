@@ -0,0 +1,149 @@
+# backend/benchmarks/bench_async_db.py
+"""
+Requisições/s de uma leitura do banco com 50 e 200 clientes concorrentes: sessão
+assíncrona (get_async_db, o router real) x sessão síncrona dentro de um handler async
+(como antes: cada consulta bloqueia o event loop).
+
+O servidor roda em outro processo (uvicorn, 1 worker); os dois caminhos usam a mesma
+consulta (página do dashboard do criador, sem total) e a mesma autenticação. Os clientes
+rodam neste processo, com httpx. Com SQLite local as consultas são curtas: o ganho do
+caminho assíncrono aparece principalmente com um banco remoto (DATABASE_URL de PostgreSQL).
+
+    python -m benchmarks.bench_async_db [--clients 50 200] [--seconds 5] [--executions 500]
+"""
+import argparse
+import asyncio
+import datetime
+import os
+import socket
+import subprocess
+import sys
+import time
+
+import orjson
+
+from ._common import percentiles, print_table, use_temp_database
+
+use_temp_database()
+
+from fastapi import Depends, Response # noqa: E402
+
+from app import crud_executions, models_db # noqa: E402
+from app.database import SessionLocal # noqa: E402
+from app.main import app # noqa: E402
+from app.routers.users_router import get_current_user # noqa: E402
+
+ASYNC_URL = "/api/story-executions/dashboard/my-results?limit=20&include_total=false"
+SYNC_URL = "/bench/sync/my-results?limit=20"
+
+
+@app.get("/bench/sync/my-results", include_in_schema=False)
+async def sync_dashboard_results(limit: int = 20, current_user: models_db.User = Depends(get_current_user)):
+    """
+    Mesma leitura do dashboard, com uma sessão síncrona (bloqueia o event loop).
+    A sessão é fechada antes da resposta: com get_db, ela só seria fechada depois, e com
+    200 clientes o pool se esgota enquanto o event loop está bloqueado esperando por ele.
+    """
+    with SessionLocal() as db:
+        items = crud_executions.get_story_executions_public_for_creator(db, creator_id=current_user.id, limit=limit)
+    return Response(content=orjson.dumps({"items": items}), media_type="application/json")
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+async def _wait_until_up(client, timeout: float = 30.0) -> None:
+    deadline = time.perf_counter() + timeout
+    while True:
+        try:
+            if (await client.get("/api/health")).status_code == 200:
+                return
+        except Exception:
+            if time.perf_counter() > deadline:
+                raise
+        await asyncio.sleep(0.2)
+
+async def _seed(client, executions: int) -> dict:
+    credentials = {"email": "bench@example.com", "password": "secret123"}
+    await client.post("/api/users/register", json=credentials)
+    token = (await client.post("/api/users/login", json=credentials)).json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+    pages = [{"id": "p0", "title": "P0", "markdown": "fim"}]
+    story = await client.post("/api/stories/", json={"story_title": "S", "pages": pages, "start_page_client_id": "p0"}, headers=headers)
+    story_id = story.json()["story_id"]
+    start = datetime.datetime(2024, 1, 1)
+    body = b"\n".join(
+        orjson.dumps({
+            "story_id": story_id, "start_time": start + datetime.timedelta(minutes=index),
+            "duration_minutes": 1, "answers": {}, "pages_visited": ["p0"],
+        })
+        for index in range(executions)
+    )
+    await client.post("/api/story-executions/import", content=body, headers=headers)
+    return headers
+
+async def _load(client, url: str, headers: dict, clients: int, seconds: float):
+    latencies, errors = [], 0
+    deadline = time.perf_counter() + seconds
+
+    async def worker():
+        nonlocal errors
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            try:
+                response = await client.get(url, headers=headers)
+            except Exception: # Ex: timeout
+                errors += 1
+                continue
+            if response.status_code == 200:
+                latencies.append(time.perf_counter() - start)
+            else:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(clients)))
+    return latencies, errors, time.perf_counter() - started
+
+async def main_async(args, base_url: str) -> None:
+    import httpx
+
+    limits = httpx.Limits(max_connections=max(args.clients), max_keepalive_connections=max(args.clients))
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+        await _wait_until_up(client)
+        headers = await _seed(client, args.executions)
+        rows = []
+        for clients in args.clients:
+            for label, url in (("síncrono (SessionLocal)", SYNC_URL), ("assíncrono (get_async_db)", ASYNC_URL)):
+                await _load(client, url, headers, clients, 1.0) # Aquecimento
+                latencies, errors, elapsed = await _load(client, url, headers, clients, args.seconds)
+                stats = percentiles(latencies)
+                rows.append([clients, label, f"{len(latencies) / elapsed:,.0f}", f"{stats['p50']:.1f}", f"{stats['p99']:.1f}", errors])
+    print_table(
+        f"Dashboard (20 itens), {args.seconds:.0f}s por cenário, DATABASE_URL={os.environ['DATABASE_URL'].split('://')[0]}",
+        ["clientes", "caminho", "req/s", "p50 (ms)", "p99 (ms)", "erros"],
+        rows,
+    )
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--clients", type=int, nargs="+", default=[50, 200])
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--executions", type=int, default=500)
+    args = parser.parse_args()
+
+    port = _free_port()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "benchmarks.bench_async_db:app", "--port", str(port), "--log-level", "warning"],
+        stdout=subprocess.DEVNULL, # Os routers imprimem mensagens de debug a cada requisição
+    )
+    try:
+        asyncio.run(main_async(args, f"http://127.0.0.1:{port}"))
+    finally:
+        server.terminate()
+        server.wait()
+
+
+if __name__ == "__main__":
+    main()
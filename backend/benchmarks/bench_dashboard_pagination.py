@@ -0,0 +1,110 @@
+# backend/benchmarks/bench_dashboard_pagination.py
+"""
+Latência da página 1 e da página 10.000 do dashboard do criador (10 itens por página),
+com paginação por OFFSET (skip) e por cursor (start_time, id), em uma base grande de
+execuções (padrão: 1 milhão). Mede também o total: contagem exata x contagem em cache.
+
+As execuções são inseridas direto em story_executions (sem respostas normalizadas nem
+agregados, que o dashboard não lê). A base fica em um SQLite temporário.
+
+    python -m benchmarks.bench_dashboard_pagination [--executions 1000000] [--page 10000] [--repeat 20]
+"""
+import argparse
+import datetime
+import time
+
+import orjson
+
+from ._common import print_table, time_per_call, use_temp_database
+
+use_temp_database()
+
+from sqlalchemy import insert # noqa: E402
+
+from app import crud_executions, crud_stories, crud_users, models_db, schemas # noqa: E402
+from app.database import SessionLocal, create_db_and_tables, engine # noqa: E402
+
+LIMIT = 10
+
+
+def _seed(executions: int, batch_size: int = 50_000) -> int:
+    create_db_and_tables()
+    with SessionLocal() as db:
+        creator = crud_users.create_user(db, schemas.UserCreate(email="bench@example.com", password="secret123"))
+        pages = [schemas.PageCreate(id="p0", title="P0", markdown="fim")]
+        story = crud_stories.create_story(db, schemas.StoryCreateSchema(story_title="S", pages=pages, start_page_client_id="p0"), creator.id)
+        story_id, creator_id = story.id, creator.id
+
+    table = models_db.StoryExecution.__table__
+    start = datetime.datetime(2020, 1, 1)
+    started = time.perf_counter()
+    with engine.begin() as conn:
+        for offset in range(0, executions, batch_size):
+            conn.execute(insert(table), [
+                {
+                    "story_id": story_id, "player_user_id": creator_id, "creator_id": creator_id,
+                    # Alguns start_time repetidos: o id desempata a ordem (e o cursor)
+                    "start_time": start + datetime.timedelta(seconds=(index // 3) * 7),
+                    "duration_minutes": 5, "answers_json": '{"q1": "o1"}', "pages_visited_json": '["p0"]',
+                }
+                for index in range(offset, min(offset + batch_size, executions))
+            ])
+    print(f"{executions:,} execuções inseridas em {time.perf_counter() - started:.1f}s")
+    return creator_id
+
+def _cursor_before_page(creator_id: int, page: int) -> crud_executions.ExecutionsCursor:
+    """Cursor que aponta para o início de `page` (o último item da página anterior)."""
+    with SessionLocal() as db:
+        last_item = crud_executions.get_story_executions_public_for_creator(db, creator_id, skip=(page - 1) * LIMIT - 1, limit=1)[0]
+    return last_item["start_time"], last_item["id"]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--executions", type=int, default=1_000_000)
+    parser.add_argument("--page", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+    assert args.page * LIMIT <= args.executions, "Execuções insuficientes para a página pedida"
+
+    creator_id = _seed(args.executions)
+    deep_cursor = _cursor_before_page(creator_id, args.page)
+
+    def page_with_offset(page: int):
+        with SessionLocal() as db:
+            return crud_executions.get_story_executions_public_for_creator(db, creator_id, skip=(page - 1) * LIMIT, limit=LIMIT)
+
+    def page_with_cursor(after):
+        with SessionLocal() as db:
+            return crud_executions.get_story_executions_public_for_creator(db, creator_id, limit=LIMIT, after=after)
+
+    # Os dois modos devem devolver a mesma página
+    assert orjson.dumps(page_with_offset(args.page)) == orjson.dumps(page_with_cursor(deep_cursor))
+
+    rows = []
+    for label, first, deep in (
+        ("OFFSET (skip)", lambda: page_with_offset(1), lambda: page_with_offset(args.page)),
+        ("cursor", lambda: page_with_cursor(None), lambda: page_with_cursor(deep_cursor)),
+    ):
+        first_time, deep_time = time_per_call(first, args.repeat), time_per_call(deep, args.repeat)
+        rows.append([label, f"{first_time * 1000:.2f}", f"{deep_time * 1000:.2f}", f"{deep_time / first_time:.1f}x"])
+
+    def count(cached: bool):
+        with SessionLocal() as db:
+            if cached:
+                return crud_executions.get_story_executions_for_creator_count_cached(db, creator_id)
+            return crud_executions.get_story_executions_for_creator_count(db, creator_id)
+
+    exact = time_per_call(lambda: count(False), max(3, args.repeat // 4), warmup=1)
+    cached = time_per_call(lambda: count(True), args.repeat)
+
+    print_table(
+        f"Dashboard do criador, {args.executions:,} execuções, {LIMIT} por página (ms)",
+        ["paginação", "página 1", f"página {args.page:,}", "razão"],
+        rows,
+    )
+    print_table("Total de execuções (ms)", ["contagem exata", "em cache"], [[f"{exact * 1000:.2f}", f"{cached * 1000:.4f}"]])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+# backend/benchmarks/bench_fast_serialization.py
+"""
+Custo de CPU por requisição da montagem das respostas grandes: caminho ORM + Pydantic
+(from_attributes, como antes) x leitura rápida (linhas -> dicionários -> orjson).
+
+  - história: get_story_by_id + StoryPublic.model_validate(...).model_dump_json()
+              x get_story_public + dump_public_stories
+  - dashboard: get_story_executions_for_creator + StoryExecutionPublic (lista)
+               x get_story_executions_public_for_creator + orjson.dumps
+
+Cada chamada usa uma sessão nova (como uma requisição). Com --profile, imprime as
+funções mais caras de cada caminho (cProfile).
+
+    python -m benchmarks.bench_fast_serialization [--pages 200] [--results 100] [--repeat 50] [--profile]
+"""
+import argparse
+import cProfile
+import datetime
+import pstats
+from typing import Callable, Dict
+
+import orjson
+
+from ._common import print_table, story_payload, time_per_call, use_temp_database
+
+use_temp_database()
+
+from app import crud_executions, crud_stories, crud_users, schemas # noqa: E402
+from app.database import Base, SessionLocal, engine # noqa: E402
+
+
+def _seed(pages: int, results: int):
+    Base.metadata.create_all(bind=engine)
+    with SessionLocal() as db:
+        creator = crud_users.create_user(db, schemas.UserCreate(email="bench@example.com", password="secret123"))
+        payload = story_payload(pages)
+        story = crud_stories.create_story(db, schemas.StoryCreateSchema(**payload), creator.id)
+        start = datetime.datetime(2024, 1, 1)
+        crud_executions.create_story_executions_batch(db, [
+            (schemas.StoryExecutionCreate(
+                story_id=story.id, start_time=start + datetime.timedelta(minutes=index), duration_minutes=12.5,
+                answers={question["id"]: question["options"][index % 3]["id"] for page in payload["pages"][:20] for question in page["questions"]},
+                pages_visited=[page["id"] for page in payload["pages"][:20]],
+            ), creator.id)
+            for index in range(results)
+        ])
+        return story.id, creator.id
+
+def _per_request(func: Callable) -> Callable[[], bytes]:
+    def run() -> bytes:
+        with SessionLocal() as db:
+            return func(db)
+    return run
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--pages", type=int, default=200)
+    parser.add_argument("--results", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--profile", action="store_true")
+    args = parser.parse_args()
+
+    story_id, creator_id = _seed(args.pages, args.results)
+
+    def orm_story(db) -> bytes:
+        story = crud_stories.get_story_by_id(db, story_id, pages_loading="selectin")
+        return schemas.StoryPublic.model_validate(story).model_dump_json().encode()
+
+    def fast_story(db) -> bytes:
+        return orjson.dumps(crud_stories.public_story_fields(crud_stories.get_story_public(db, story_id)))
+
+    def orm_dashboard(db) -> bytes:
+        executions = crud_executions.get_story_executions_for_creator(db, creator_id, limit=args.results)
+        items = [schemas.StoryExecutionPublic.model_validate(execution) for execution in executions]
+        return orjson.dumps([item.model_dump(mode="json") for item in items])
+
+    def fast_dashboard(db) -> bytes:
+        return orjson.dumps(crud_executions.get_story_executions_public_for_creator(db, creator_id, limit=args.results))
+
+    # Os dois caminhos devem produzir o mesmo JSON
+    assert orjson.loads(_per_request(orm_story)()) == orjson.loads(_per_request(fast_story)())
+    assert orjson.loads(_per_request(orm_dashboard)()) == orjson.loads(_per_request(fast_dashboard)())
+
+    cases: Dict[str, Dict[str, Callable[[], bytes]]] = {
+        f"história ({args.pages} páginas)": {"ORM + Pydantic": _per_request(orm_story), "leitura rápida": _per_request(fast_story)},
+        f"dashboard ({args.results} itens)": {"ORM + Pydantic": _per_request(orm_dashboard), "leitura rápida": _per_request(fast_dashboard)},
+    }
+    rows = []
+    for label, paths in cases.items():
+        timings = {name: time_per_call(func, args.repeat) for name, func in paths.items()}
+        slow, fast = timings["ORM + Pydantic"], timings["leitura rápida"]
+        rows.append([label, f"{slow * 1000:.2f}", f"{fast * 1000:.2f}", f"{slow / fast:.1f}x"])
+        if args.profile:
+            for name, func in paths.items():
+                profiler = cProfile.Profile()
+                profiler.runcall(lambda: [func() for _ in range(args.repeat)])
+                print(f"\n=== {label} / {name}: funções mais caras (tempo acumulado) ===")
+                pstats.Stats(profiler).sort_stats("cumulative").print_stats(12)
+
+    print_table("Tempo por requisição (ms, consulta + montagem + serialização)", ["resposta", "ORM + Pydantic", "leitura rápida", "ganho"], rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+# backend/benchmarks/bench_login_storm.py
+"""
+Rajada de logins: latência (p50/p99) de um endpoint não relacionado (/api/health) enquanto
+N logins concorrentes verificam a senha com bcrypt.
+As sondas são agendadas em intervalos fixos e a latência é medida a partir do horário
+agendado (e não do envio), para que o tempo em que o event loop ficou bloqueado conte.
+
+Compara o pool de hashing (auth_utils, padrão) com a verificação síncrona no event loop
+(comportamento anterior). Cliente e app rodam no mesmo event loop (httpx.ASGITransport):
+qualquer bloqueio do loop aparece diretamente na latência das sondas.
+
+    python -m benchmarks.bench_login_storm [--logins 32] [--rounds 12]
+"""
+import argparse
+import asyncio
+import os
+import time
+from collections import Counter
+
+from ._common import percentiles, print_table, use_temp_database
+
+PASSWORD = "secret123"
+
+
+async def _storm(client, logins: int, probe_interval: float):
+    """Dispara `logins` logins concorrentes e sonda /api/health até todos terminarem."""
+    latencies, statuses = [], Counter()
+    done = asyncio.Event()
+
+    async def probe():
+        scheduled = time.perf_counter()
+        while not done.is_set():
+            await client.get("/api/health")
+            latencies.append(time.perf_counter() - scheduled)
+            scheduled = max(scheduled + probe_interval, time.perf_counter() - probe_interval)
+            await asyncio.sleep(max(0.0, scheduled - time.perf_counter()))
+
+    async def login():
+        response = await client.post("/api/users/login", json={"email": "storm@example.com", "password": PASSWORD})
+        statuses[response.status_code] += 1
+
+    probe_task = asyncio.create_task(probe())
+    start = time.perf_counter()
+    await asyncio.gather(*(login() for _ in range(logins)))
+    elapsed = time.perf_counter() - start
+    done.set()
+    await probe_task
+    return latencies, statuses, elapsed
+
+async def _idle(client, seconds: float, probe_interval: float):
+    latencies = []
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        scheduled = time.perf_counter()
+        await client.get("/api/health")
+        latencies.append(time.perf_counter() - scheduled)
+        await asyncio.sleep(probe_interval)
+    return latencies
+
+async def main_async(args) -> None:
+    import httpx
+    from app import auth_utils
+    from app.main import app
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        response = await client.post("/api/users/register", json={"email": "storm@example.com", "name": "Storm", "password": PASSWORD})
+        assert response.status_code in (201, 400), response.text
+
+        offloaded_verify = auth_utils.verify_password_async
+
+        async def inline_verify(plain_password, hashed_password):
+            return auth_utils.verify_password(plain_password, hashed_password) # Bloqueia o event loop
+
+        rows = []
+        idle = _idle(client, 1.0, args.probe_interval)
+        idle_latencies = await idle
+        rows.append(["sem logins", "-", "-", len(idle_latencies), *_format(percentiles(idle_latencies))])
+        for label, verify in (("bcrypt no event loop", inline_verify), ("pool de hashing", offloaded_verify)):
+            auth_utils.verify_password_async = verify
+            latencies, statuses, elapsed = await _storm(client, args.logins, args.probe_interval)
+            status_text = " ".join(f"{code}x{count}" for code, count in sorted(statuses.items()))
+            rows.append([label, f"{elapsed:.2f}", status_text, len(latencies), *_format(percentiles(latencies))])
+        auth_utils.verify_password_async = offloaded_verify
+
+    print_table(
+        f"{args.logins} logins concorrentes, bcrypt rounds={auth_utils.BCRYPT_ROUNDS}, "
+        f"workers={auth_utils.PASSWORD_HASH_WORKERS}, max_pending={auth_utils.PASSWORD_HASH_MAX_PENDING}",
+        ["cenário", "duração (s)", "status", "sondas", "health p50 (ms)", "p99 (ms)", "máx (ms)"],
+        rows,
+    )
+
+def _format(stats):
+    return [f"{stats['p50']:.1f}", f"{stats['p99']:.1f}", f"{stats['max']:.1f}"]
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--logins", type=int, default=32)
+    parser.add_argument("--rounds", type=int, default=12, help="Custo do bcrypt (BCRYPT_ROUNDS)")
+    parser.add_argument("--probe-interval", type=float, default=0.01)
+    args = parser.parse_args()
+    os.environ["BCRYPT_ROUNDS"] = str(args.rounds)
+    use_temp_database()
+    asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+# backend/benchmarks/bench_response_encoding.py
+"""
+Serialização e bytes trafegados de duas respostas grandes: uma história de 200 páginas
+(GET /api/stories/{id}) e uma página de 100 resultados do dashboard
+(GET /api/story-executions/dashboard/my-results?limit=100).
+
+Compara o encoder JSON padrão do Starlette (JSONResponse, json.dumps) com o orjson
+(ORJSONResponse, padrão da app) e mede o tamanho no fio com cada codificação aceita pelo
+CompressionMiddleware (gzip sempre; br/zstd se os pacotes opcionais estiverem instalados).
+
+    python -m benchmarks.bench_response_encoding [--pages 200] [--results 100] [--repeat 200]
+"""
+import argparse
+import datetime
+import gzip
+
+import orjson
+
+from ._common import print_table, story_payload, time_per_call, use_temp_database
+
+use_temp_database()
+
+from fastapi.responses import JSONResponse, ORJSONResponse # noqa: E402
+from fastapi.testclient import TestClient # noqa: E402
+
+from app import compression, crud_executions, schemas # noqa: E402
+from app.database import SessionLocal # noqa: E402
+from app.main import app # noqa: E402
+
+
+def _seed(client: TestClient, pages: int, results: int):
+    client.post("/api/users/register", json={"email": "bench@example.com", "password": "secret123"})
+    token = client.post("/api/users/login", json={"email": "bench@example.com", "password": "secret123"}).json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+    payload = story_payload(pages)
+    story_id = client.post("/api/stories/", json=payload, headers=headers).json()["story_id"]
+    player_id = client.get("/api/users/me", headers=headers).json()["id"]
+
+    start = datetime.datetime(2024, 1, 1)
+    executions = []
+    for index in range(results):
+        visited = [page["id"] for page in payload["pages"][:20]]
+        answers = {question["id"]: question["options"][index % 3]["id"] for page in payload["pages"][:20] for question in page["questions"]}
+        executions.append((schemas.StoryExecutionCreate(
+            story_id=story_id, start_time=start + datetime.timedelta(minutes=index), duration_minutes=12.5,
+            answers=answers, pages_visited=visited, player_name_at_play="Jogador",
+        ), player_id))
+    with SessionLocal() as db:
+        crud_executions.create_story_executions_batch(db, executions)
+    return story_id, headers
+
+def _compressors():
+    encoders = {"gzip": lambda body: gzip.compress(body, compresslevel=compression.COMPRESSION_GZIP_LEVEL)}
+    if compression.brotli is not None:
+        encoders["br"] = lambda body: compression.brotli.compress(body, quality=compression.COMPRESSION_BROTLI_QUALITY)
+    if compression.zstandard is not None:
+        encoders["zstd"] = compression.zstandard.ZstdCompressor(level=compression.COMPRESSION_ZSTD_LEVEL).compress
+    return encoders
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--pages", type=int, default=200)
+    parser.add_argument("--results", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    with TestClient(app) as client:
+        story_id, headers = _seed(client, args.pages, args.results)
+        endpoints = {
+            f"história ({args.pages} páginas)": f"/api/stories/{story_id}",
+            f"dashboard ({args.results} itens)": f"/api/story-executions/dashboard/my-results?limit={args.results}&include_total=false",
+        }
+
+        serialization_rows, wire_rows = [], []
+        for label, url in endpoints.items():
+            content = orjson.loads(client.get(url, headers={**headers, "Accept-Encoding": "identity"}).content)
+            stdlib = time_per_call(lambda: JSONResponse(content).body, args.repeat)
+            fast = time_per_call(lambda: ORJSONResponse(content).body, args.repeat)
+            serialization_rows.append([label, f"{stdlib * 1000:.2f}", f"{fast * 1000:.2f}", f"{stdlib / fast:.1f}x"])
+
+            body = ORJSONResponse(content).body
+            wire_rows.append([label, "identity", f"{len(body):,}", "-", "1.0x"])
+            for encoding, compress in _compressors().items():
+                compress_time = time_per_call(lambda: compress(body), max(10, args.repeat // 10))
+                # Tamanho real no fio, passando pelo CompressionMiddleware
+                with client.stream("GET", url, headers={**headers, "Accept-Encoding": encoding}) as response:
+                    wire = b"".join(response.iter_raw())
+                assert response.headers.get("content-encoding") == encoding
+                wire_rows.append([label, encoding, f"{len(wire):,}", f"{compress_time * 1000:.2f}", f"{len(body) / len(wire):.1f}x"])
+
+    print_table("Serialização (ms por resposta)", ["resposta", "json (JSONResponse)", "orjson (ORJSONResponse)", "ganho"], serialization_rows)
+    print_table("Bytes no fio", ["resposta", "codificação", "bytes", "ms p/ comprimir", "redução"], wire_rows)
+    missing = [name for name, module in (("brotli", compression.brotli), ("zstandard", compression.zstandard)) if module is None]
+    if missing:
+        print(f"\n(pacotes opcionais não instalados: {', '.join(missing)})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+# backend/benchmarks/bench_sqlite_writes.py
+"""
+Vazão de escrita do SQLite sob carga mista (gravação de execuções + leituras do dashboard),
+sem e com o perfil de ajuste de database.py (WAL, synchronous=NORMAL, busy_timeout, ...).
+
+Escritores (crud_executions.create_story_execution) e leitores (página do dashboard +
+história completa) rodam em processos separados sobre o mesmo arquivo, como vários
+workers do uvicorn; assim o que se mede são os locks do SQLite, e não o GIL.
+A configuração é lida na importação, então cada perfil usa processos novos.
+
+    python -m benchmarks.bench_sqlite_writes [--seconds 5] [--writers 4] [--readers 4]
+"""
+import argparse
+import datetime
+import multiprocessing
+import os
+import sys
+import time
+
+from ._common import print_table, use_temp_database
+
+PROFILES = {
+    # Comportamento anterior: journal_mode padrão (DELETE), synchronous=FULL, sem busy_timeout
+    "padrão do SQLite": {"SQLITE_TUNING_ENABLED": "false"},
+    "perfil ajustado": {"SQLITE_TUNING_ENABLED": "true"},
+}
+
+
+def _setup() -> tuple:
+    from app import crud_stories, crud_users, schemas
+    from app.database import SessionLocal, create_db_and_tables
+
+    create_db_and_tables()
+    with SessionLocal() as db:
+        creator = crud_users._insert_user(db, schemas.UserCreate(email="b@example.com", name="B", password="secret1"), "x")
+        pages = [schemas.PageCreate(id=f"p{i}", title=f"P{i}", markdown="texto " * 50) for i in range(20)]
+        story = crud_stories.create_story(db, schemas.StoryCreateSchema(story_title="S", pages=pages, start_page_client_id="p0"), creator.id)
+        return creator.id, story.id
+
+def _client_process(role: str, creator_id: int, story_id: int, barrier, seconds: float, results) -> None:
+    sys.stdout = open(os.devnull, "w") # As funções de CRUD imprimem mensagens de debug
+    from sqlalchemy.exc import OperationalError
+    from app import crud_executions, crud_stories, schemas
+    from app.database import SessionLocal
+
+    done = errors = 0
+    barrier.wait() # Todos os processos começam juntos, depois de importar o app
+    deadline = time.time() + seconds
+    while time.time() < deadline:
+        try:
+            with SessionLocal() as db:
+                if role == "writer":
+                    crud_executions.create_story_execution(db, schemas.StoryExecutionCreate(
+                        story_id=story_id, start_time=datetime.datetime.utcnow(), duration_minutes=3,
+                        answers={"q1": "a"}, pages_visited=["p0", "p1", "p2"]
+                    ), creator_id)
+                else:
+                    crud_executions.get_story_executions_public_for_creator(db, creator_id, limit=20)
+                    crud_stories.get_story_public(db, story_id)
+            done += 1
+        except OperationalError: # "database is locked"
+            errors += 1
+    results.put((role, done, errors))
+
+def run_profile(env: dict, args) -> dict:
+    os.environ.update(env)
+    os.environ.pop("DATABASE_URL", None)
+    use_temp_database()
+    stdout, sys.stdout = sys.stdout, open(os.devnull, "w")
+    try:
+        creator_id, story_id = _setup()
+    finally:
+        sys.stdout = stdout
+
+    context = multiprocessing.get_context("spawn") # Processos novos: importam `app` com o perfil atual
+    results = context.Queue()
+    barrier = context.Barrier(args.writers + args.readers)
+    processes = [
+        context.Process(target=_client_process, args=(role, creator_id, story_id, barrier, args.seconds, results))
+        for role in ["writer"] * args.writers + ["reader"] * args.readers
+    ]
+    for process in processes:
+        process.start()
+    counts = {"writer": [0, 0], "reader": [0, 0]}
+    for _ in processes:
+        role, done, errors = results.get()
+        counts[role][0] += done
+        counts[role][1] += errors
+    for process in processes:
+        process.join()
+    return counts
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--writers", type=int, default=4)
+    parser.add_argument("--readers", type=int, default=4)
+    args = parser.parse_args()
+
+    rows = []
+    for name, env in PROFILES.items():
+        # Um interpretador por perfil (a configuração de `app` é lida uma única vez por processo)
+        context = multiprocessing.get_context("spawn")
+        queue = context.Queue()
+        process = context.Process(target=_profile_process, args=(name, args, queue))
+        process.start()
+        counts = queue.get()
+        process.join()
+        writes, write_errors = counts["writer"]
+        reads, read_errors = counts["reader"]
+        rows.append([name, f"{writes / args.seconds:,.0f}", write_errors, f"{reads / args.seconds:,.0f}", read_errors])
+    print_table(
+        f"{args.writers} processos escritores + {args.readers} leitores, {args.seconds:.0f} s por perfil",
+        ["perfil", "escritas/s", "erros escrita", "leituras/s", "erros leitura"],
+        rows,
+    )
+
+def _profile_process(name: str, args, queue) -> None:
+    queue.put(run_profile(PROFILES[name], args))
+
+
+if __name__ == "__main__":
+    main()
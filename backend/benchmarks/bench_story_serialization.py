@@ -0,0 +1,82 @@
+# backend/benchmarks/bench_story_serialization.py
+"""
+Micro-benchmark: serialização de uma história de 200 páginas já carregada (instâncias ORM
+em memória) com StoryPublic.model_validate(...).model_dump_json().
+
+Compara StoryPage.questions com json.loads a cada acesso (comportamento anterior) e com a
+decodificação por orjson memorizada na instância (models_db._decoded_json_column). As
+páginas são lidas várias vezes (ex: a mesma história servida a vários jogadores).
+
+    python -m benchmarks.bench_story_serialization [--pages 200] [--questions 3] [--repeat 200]
+"""
+import argparse
+import json
+from typing import Any, Dict, List
+
+from ._common import print_table, story_payload, time_per_call, use_temp_database
+
+use_temp_database()
+
+from app import crud_stories, crud_users, models_db, schemas # noqa: E402
+from app.database import Base, SessionLocal, engine # noqa: E402
+
+
+def _questions_with_json_loads(self) -> List[Dict[str, Any]]:
+    """StoryPage.questions antes da memorização: json.loads em todo acesso."""
+    if self.questions_json:
+        try:
+            loaded_questions = json.loads(self.questions_json)
+            return loaded_questions if isinstance(loaded_questions, list) else []
+        except json.JSONDecodeError:
+            return []
+    return []
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--pages", type=int, default=200)
+    parser.add_argument("--questions", type=int, default=3, help="Questões por página")
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    Base.metadata.create_all(bind=engine)
+    with SessionLocal() as db:
+        creator = crud_users.create_user(db, schemas.UserCreate(email="bench@example.com", password="secret123"))
+        payload = story_payload(args.pages, questions_per_page=args.questions)
+        story_id = crud_stories.create_story(db, schemas.StoryCreateSchema(**payload), creator.id).id
+        db.expunge_all()
+        story = crud_stories.get_story_by_id(db, story_id, pages_loading="selectin")
+        assert len(story.pages) == args.pages
+
+        def serialize() -> str:
+            return schemas.StoryPublic.model_validate(story).model_dump_json()
+
+        def read_questions() -> list:
+            return [page.questions for page in story.pages]
+
+        memoized_questions = models_db.StoryPage.questions
+        models_db.StoryPage.questions = property(_questions_with_json_loads)
+        try:
+            expected = serialize()
+            with_json_loads = time_per_call(serialize, args.repeat)
+            questions_with_json_loads = time_per_call(read_questions, args.repeat)
+        finally:
+            models_db.StoryPage.questions = memoized_questions
+        assert serialize() == expected
+        memoized = time_per_call(serialize, args.repeat)
+        questions_memoized = time_per_call(read_questions, args.repeat)
+
+    rows = [
+        ["json.loads a cada acesso", f"{with_json_loads * 1000:.2f}", f"{1 / with_json_loads:,.0f}", f"{questions_with_json_loads * 1000:.3f}"],
+        ["orjson, memorizado na instância", f"{memoized * 1000:.2f}", f"{1 / memoized:,.0f}", f"{questions_memoized * 1000:.3f}"],
+    ]
+    print_table(
+        f"StoryPublic de {args.pages} páginas ({args.questions} questões cada), {len(expected):,} bytes",
+        ["StoryPage.questions", "ms/serialização", "serializações/s", "ms só lendo as questões"],
+        rows,
+    )
+    print(f"\nGanho na serialização: {with_json_loads / memoized:.1f}x; na leitura das questões: {questions_with_json_loads / questions_memoized:.0f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,37 @@
+# backend/benchmarks/bench_token_cache.py
+"""
+Throughput de auth_utils.decode_access_token com e sem o cache de tokens verificados.
+
+    python -m benchmarks.bench_token_cache [--calls 20000]
+"""
+import argparse
+
+from ._common import print_table, time_per_call, use_temp_database
+
+use_temp_database()
+
+from app import auth_utils # noqa: E402
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--calls", type=int, default=20000)
+    args = parser.parse_args()
+
+    token = auth_utils.create_access_token({"sub": "jogador@example.com"})
+    auth_utils.token_cache.clear()
+
+    uncached = time_per_call(lambda: auth_utils._decode_token_uncached(token), args.calls)
+    cached = time_per_call(lambda: auth_utils.decode_access_token(token), args.calls)
+
+    rows = [
+        ["jose.jwt.decode (sem cache)", f"{uncached * 1e6:.1f}", f"{1 / uncached:,.0f}"],
+        ["decode_access_token (cache)", f"{cached * 1e6:.1f}", f"{1 / cached:,.0f}"],
+    ]
+    print_table(f"Decodificação do mesmo token, {args.calls} chamadas", ["caminho", "µs/chamada", "chamadas/s"], rows)
+    print(f"\nGanho: {uncached / cached:.1f}x")
+    print(f"Estatísticas do cache: {auth_utils.get_token_cache_stats()}")
+
+
+if __name__ == "__main__":
+    main()
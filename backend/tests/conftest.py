@@ -0,0 +1,87 @@
+# backend/tests/conftest.py
+import os
+import tempfile
+
+# A configuração do app é lida das variáveis de ambiente na importação (database.py,
+# auth_utils.py, ...): o banco de testes precisa ser definido antes de importar `app`.
+_TEST_DIR = tempfile.mkdtemp(prefix="story-creator-tests-")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(_TEST_DIR, 'test.db')}")
+os.environ.setdefault("BCRYPT_ROUNDS", "4") # Custo mínimo do bcrypt: os testes não medem o hashing
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+from app import auth_utils, crud_executions, crud_users, story_cache
+from app.database import Base, SessionLocal, engine, async_engine
+from app.main import app
+
+
+@pytest.fixture(autouse=True)
+def clean_database():
+    """Cada teste começa com as tabelas vazias e os caches em memória limpos."""
+    yield
+    with engine.begin() as connection:
+        for table in reversed(Base.metadata.sorted_tables):
+            connection.execute(table.delete())
+    for cache in (crud_users.user_cache, auth_utils.token_cache, crud_executions.executions_count_cache):
+        cache.clear()
+    story_cache.clear()
+
+
+@pytest.fixture
+def db():
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+@pytest.fixture
+def client():
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+def _register_and_login(client, email: str) -> dict:
+    response = client.post("/api/users/register", json={"email": email, "name": email.split("@")[0], "password": "secret1"})
+    assert response.status_code == 201, response.text
+    response = client.post("/api/users/login", json={"email": email, "password": "secret1"})
+    assert response.status_code == 200, response.text
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+@pytest.fixture
+def auth_headers(client):
+    """Registra um usuário e devolve o cabeçalho Authorization com o token dele."""
+    return _register_and_login(client, "autor@example.com")
+
+@pytest.fixture
+def other_auth_headers(client):
+    """Um segundo usuário (para verificar que os dados de um criador não vazam para outro)."""
+    return _register_and_login(client, "outro@example.com")
+
+
+class QueryCounter:
+    """Registra os comandos SQL (e seus parâmetros) executados nas engines síncrona e assíncrona."""
+
+    def __init__(self):
+        self.executed = []
+
+    def __call__(self, conn, cursor, statement, parameters, context, executemany):
+        self.executed.append((statement, parameters))
+
+    @property
+    def count(self) -> int:
+        return len(self.executed)
+
+
+@pytest.fixture
+def query_counter():
+    counter = QueryCounter()
+    targets = (engine, async_engine.sync_engine)
+    for target in targets:
+        event.listen(target, "before_cursor_execute", counter)
+    yield counter
+    for target in targets:
+        event.remove(target, "before_cursor_execute", counter)
@@ -0,0 +1,111 @@
+# backend/tests/test_analytics.py
+# Os agregados de análise são mantidos incrementalmente por todos os caminhos de gravação
+# de execuções; o resultado deve ser igual ao recálculo completo (rebuild_story_analytics).
+import orjson
+from fastapi.testclient import TestClient
+
+from app import crud_analytics, execution_ingest
+from app.database import SessionLocal
+from app.main import app
+
+
+def _create_story(client, headers) -> int:
+    pages = [
+        {"id": "p0", "title": "P0", "markdown": "[[P1]]"},
+        {"id": "p1", "title": "P1", "markdown": "[[P2]]"},
+        {"id": "p2", "title": "P2", "markdown": "fim"},
+    ]
+    response = client.post("/api/stories/", json={"story_title": "S", "pages": pages, "start_page_client_id": "p0"}, headers=headers)
+    assert response.status_code == 201, response.text
+    return response.json()["story_id"]
+
+def _execution(story_id, answers, pages_visited, duration_minutes, completed) -> dict:
+    return {
+        "story_id": story_id, "start_time": "2024-01-01T10:00:00",
+        "end_time": "2024-01-01T11:00:00" if completed else None,
+        "duration_minutes": duration_minutes, "answers": answers, "pages_visited": pages_visited,
+    }
+
+def _write_through_every_path(client, headers, story_id, monkeypatch) -> None:
+    # 1. POST direto
+    direct = _execution(story_id, {"q1": "o1", "q2": ["a", "b", "a"]}, ["p0", "p1", "p0"], 0.5, True)
+    assert client.post("/api/story-executions/", json=direct, headers=headers).status_code == 201
+
+    # 2. Lote da fila de ingestão (modo "buffered")
+    monkeypatch.setattr(execution_ingest, "EXECUTION_INGEST_MODE", "buffered")
+    with TestClient(app) as buffered_client:
+        buffered = _execution(story_id, {"q1": "o2"}, ["p0"], 3, False)
+        assert buffered_client.post("/api/story-executions/", json=buffered, headers=headers).status_code == 202
+    monkeypatch.setattr(execution_ingest, "EXECUTION_INGEST_MODE", "direct")
+
+    # 3. Bloco da importação em lote
+    imported = [
+        _execution(story_id, {"q1": "o1", "q2": ["b"]}, ["p0", "p1"], 45, True),
+        _execution(story_id, {"q1": "o1"}, ["p0", "p1", "p2"], 90, False),
+    ]
+    body = b"\n".join(orjson.dumps(execution) for execution in imported)
+    response = client.post("/api/story-executions/import", content=body, headers=headers)
+    assert response.json()["imported"] == 2
+
+
+def test_incremental_aggregates_match_rebuild(client, auth_headers, monkeypatch):
+    story_id = _create_story(client, auth_headers)
+    _write_through_every_path(client, auth_headers, story_id, monkeypatch)
+
+    analytics = client.get(f"/api/stories/{story_id}/analytics", headers=auth_headers).json()
+    assert analytics["executions_count"] == 4
+    assert analytics["completed_count"] == 2
+    assert analytics["completion_rate"] == 0.5
+    assert analytics["average_duration_minutes"] == (0 + 3 + 45 + 90) / 4
+    questions = {question["question_id"]: question for question in analytics["questions"]}
+    assert questions["q1"]["total_answers"] == 4
+    assert questions["q1"]["options"] == [{"option_id": "o1", "count": 3}, {"option_id": "o2", "count": 1}]
+    # Múltipla escolha: cada opção conta uma vez por execução (repetições ignoradas)
+    assert questions["q2"]["total_answers"] == 3
+    assert questions["q2"]["options"] == [{"option_id": "b", "count": 2}, {"option_id": "a", "count": 1}]
+    # Visitas: execuções que passaram pela página (p0 repetida na mesma execução conta uma vez)
+    assert analytics["page_visits"] == [
+        {"page_id": "p0", "count": 4}, {"page_id": "p1", "count": 3}, {"page_id": "p2", "count": 1}
+    ]
+    histogram = {bucket["start_minutes"]: bucket["count"] for bucket in analytics["duration_histogram"]}
+    assert histogram == {0: 1, 1: 0, 2: 1, 5: 0, 10: 0, 15: 0, 30: 1, 60: 1}
+    assert analytics["duration_histogram"][-1]["end_minutes"] is None
+
+    with SessionLocal() as db:
+        crud_analytics.rebuild_story_analytics(db, story_id)
+        db.commit()
+    assert client.get(f"/api/stories/{story_id}/analytics", headers=auth_headers).json() == analytics
+
+def test_last_pages_counts_incomplete_executions(client, auth_headers, monkeypatch):
+    story_id = _create_story(client, auth_headers)
+    _write_through_every_path(client, auth_headers, story_id, monkeypatch)
+
+    response = client.get(f"/api/stories/{story_id}/analytics/last-pages", headers=auth_headers)
+    assert response.json() == [
+        {"page_id": "p0", "executions": 2, "not_completed": 1},
+        {"page_id": "p1", "executions": 1, "not_completed": 0},
+        {"page_id": "p2", "executions": 1, "not_completed": 1},
+    ]
+
+def test_analytics_are_owner_only(client, auth_headers, other_auth_headers):
+    story_id = _create_story(client, auth_headers)
+    assert client.get(f"/api/stories/{story_id}/analytics", headers=other_auth_headers).status_code == 404
+    assert client.get(f"/api/stories/{story_id}/analytics/last-pages", headers=other_auth_headers).status_code == 404
+    assert client.get("/api/stories/999999/analytics", headers=auth_headers).status_code == 404
+
+def test_upserts_are_split_to_fit_the_parameter_limit(client, auth_headers, monkeypatch, query_counter):
+    story_id = _create_story(client, auth_headers)
+    monkeypatch.setattr(crud_analytics, "MAX_BIND_PARAMETERS", 8) # 2 linhas de (story_id, question_id, option_id, count)
+    answers = {f"q{index}": [f"a{index}", f"b{index}"] for index in range(5)} # 10 linhas de contagem
+    execution = _execution(story_id, answers, ["p0"], 1, True)
+
+    start = query_counter.count
+    assert client.post("/api/story-executions/", json=execution, headers=auth_headers).status_code == 201
+    upserts = [
+        parameters for statement, parameters in query_counter.executed[start:]
+        if statement.lstrip().upper().startswith("INSERT INTO STORY_ANALYTICS_ANSWERS")
+    ]
+    assert len(upserts) == 5
+    assert all(len(parameters) <= 8 for parameters in upserts)
+    questions = client.get(f"/api/stories/{story_id}/analytics", headers=auth_headers).json()["questions"]
+    assert sum(question["total_answers"] for question in questions) == 10
@@ -0,0 +1,55 @@
+# backend/tests/test_auth.py
+from datetime import timedelta
+
+from app import auth_utils, crud_users
+
+
+def test_token_cache_hits_are_exposed(client, auth_headers):
+    before = client.get("/api/users/cache/stats", headers=auth_headers).json()
+    for _ in range(5):
+        assert client.get("/api/users/me", headers=auth_headers).status_code == 200
+    after = client.get("/api/users/cache/stats", headers=auth_headers).json()
+    assert after["token_cache"]["hits"] - before["token_cache"]["hits"] >= 5
+    assert after["user_cache"]["hits"] - before["user_cache"]["hits"] >= 5
+    assert after["token_cache"]["enabled"] is True
+
+def test_cached_token_honours_exp():
+    token = auth_utils.create_access_token({"sub": "jogador@example.com"})
+    assert auth_utils.decode_access_token(token) == "jogador@example.com"
+    assert auth_utils.decode_access_token(token) == "jogador@example.com" # Do cache
+
+    # Entrada que sobreviveu ao "exp" do token (ex: TTL maior que o prazo do token)
+    expired = auth_utils.create_access_token({"sub": "jogador@example.com"}, expires_delta=timedelta(minutes=-1))
+    claims = auth_utils.jwt.get_unverified_claims(expired)
+    auth_utils.token_cache.set(expired, claims, ttl_seconds=3600)
+    assert auth_utils.decode_access_token(expired) is None
+
+def test_invalid_token_is_not_cached():
+    assert auth_utils.decode_access_token("nao.e.um.token") is None
+    assert auth_utils.get_token_cache_stats()["size"] == 0
+
+def test_register_returns_503_when_hash_pool_is_saturated(client, monkeypatch):
+    monkeypatch.setattr(auth_utils, "PASSWORD_HASH_MAX_PENDING", 0)
+    response = client.post("/api/users/register", json={"email": "novo@example.com", "name": "Novo", "password": "secret1"})
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
+
+def test_login_returns_503_when_hash_pool_is_saturated(client, auth_headers, monkeypatch):
+    monkeypatch.setattr(auth_utils, "PASSWORD_HASH_MAX_PENDING", 0)
+    response = client.post("/api/users/login", json={"email": "autor@example.com", "password": "secret1"})
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
+
+def test_register_hashes_in_password_pool(client, db, monkeypatch):
+    calls = []
+    original = auth_utils._run_in_password_pool
+
+    async def tracking_run(func, *args):
+        calls.append(func.__name__)
+        return await original(func, *args)
+
+    monkeypatch.setattr(auth_utils, "_run_in_password_pool", tracking_run)
+    response = client.post("/api/users/register", json={"email": "novo@example.com", "name": "Novo", "password": "secret1"})
+    assert response.status_code == 201, response.text
+    assert calls == ["get_password_hash"]
+    assert auth_utils.verify_password("secret1", crud_users.get_user_by_email(db, "novo@example.com").hashed_password)
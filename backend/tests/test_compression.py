@@ -0,0 +1,103 @@
+# backend/tests/test_compression.py
+import gzip
+
+import pytest
+from fastapi import FastAPI, Response
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+
+from app.compression import CompressionMiddleware, choose_encoding
+
+BODY = b"historia " * 500
+ETAG = '"story-1-v1-abc"'
+
+
+@pytest.mark.parametrize("accept_encoding, expected", [
+    ("gzip, br", "br"), # Vale a preferência do servidor, não a ordem do cliente
+    ("br;q=0, gzip", "gzip"),
+    ("gzip;q=0", None),
+    ("GZIP;q=0.5", "gzip"),
+    ("*", "br"),
+    ("*;q=0, gzip", "gzip"),
+    ("br;q=0, *", "zstd"),
+    ("gzip;q=abc", None), # q inválido conta como 0
+    ("identity", None),
+    ("", None),
+])
+def test_choose_encoding_respects_q_values(accept_encoding, expected):
+    assert choose_encoding(accept_encoding, ["br", "zstd", "gzip"]) == expected
+
+
+@pytest.fixture
+def compressed_client():
+    app = FastAPI()
+
+    @app.get("/story")
+    def story():
+        return Response(BODY, media_type="application/json", headers={"ETag": ETAG})
+
+    @app.get("/weak")
+    def weak():
+        return Response(BODY, media_type="application/json", headers={"ETag": f"W/{ETAG}"})
+
+    @app.get("/small")
+    def small():
+        return Response(b"{}", media_type="application/json", headers={"ETag": ETAG})
+
+    @app.get("/image")
+    def image():
+        return Response(BODY, media_type="image/png")
+
+    @app.get("/stream")
+    def stream():
+        return StreamingResponse(iter([BODY] * 4), media_type="text/csv")
+
+    app.add_middleware(CompressionMiddleware, minimum_size=100, encodings=["gzip"])
+    return TestClient(app)
+
+
+def test_compressed_response_gets_weak_etag_and_vary(compressed_client):
+    response = compressed_client.get("/story", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["etag"] == f"W/{ETAG}"
+    assert response.headers["vary"] == "Accept-Encoding"
+    assert response.content == BODY
+
+    assert compressed_client.get("/weak", headers={"Accept-Encoding": "gzip"}).headers["etag"] == f"W/{ETAG}"
+
+def test_uncompressed_responses_keep_strong_etag(compressed_client):
+    response = compressed_client.get("/story", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in response.headers
+    assert response.headers["etag"] == ETAG
+
+    response = compressed_client.get("/small", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in response.headers
+    assert response.headers["etag"] == ETAG
+
+def test_already_compressed_types_are_skipped(compressed_client):
+    response = compressed_client.get("/image", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in response.headers
+    assert response.content == BODY
+
+def test_streaming_response_is_compressed_in_chunks(compressed_client):
+    with compressed_client.stream("GET", "/stream", headers={"Accept-Encoding": "gzip"}) as response:
+        raw = b"".join(response.iter_raw())
+    assert response.headers["content-encoding"] == "gzip"
+    assert "content-length" not in response.headers
+    assert gzip.decompress(raw) == BODY * 4
+
+def test_story_endpoint_304_still_matches_weak_etag(client, auth_headers):
+    pages = [{"id": "p0", "title": "P0", "markdown": "texto longo " * 200}]
+    story_id = client.post(
+        "/api/stories/", json={"story_title": "S", "pages": pages, "start_page_client_id": "p0"}, headers=auth_headers
+    ).json()["story_id"]
+    response = client.get(f"/api/stories/{story_id}", headers={**auth_headers, "Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    etag = response.headers["etag"]
+    assert etag.startswith("W/")
+
+    revalidated = client.get(
+        f"/api/stories/{story_id}", headers={**auth_headers, "Accept-Encoding": "gzip", "If-None-Match": etag}
+    )
+    assert revalidated.status_code == 304
+    assert "content-encoding" not in revalidated.headers
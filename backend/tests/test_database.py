@@ -0,0 +1,40 @@
+# backend/tests/test_database.py
+import os
+import subprocess
+import sys
+
+from sqlalchemy.pool import AsyncAdaptedQueuePool, StaticPool
+
+from app import database
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_pool_sizing_only_for_queue_pools():
+    file_kwargs = database._engine_kwargs("sqlite:///./arquivo.db")
+    assert file_kwargs["pool_size"] == database.DB_POOL_SIZE
+    assert "max_overflow" in file_kwargs and "pool_timeout" in file_kwargs
+
+    async_kwargs = database._engine_kwargs("sqlite+aiosqlite:///./arquivo.db", AsyncAdaptedQueuePool)
+    assert async_kwargs["pool_size"] == database.DB_POOL_SIZE
+
+    for kwargs in (database._engine_kwargs("sqlite://"), database._engine_kwargs("sqlite+aiosqlite://", StaticPool)):
+        assert not {"pool_size", "max_overflow", "pool_timeout"} & set(kwargs)
+
+def test_in_memory_sqlite_profile_works_end_to_end():
+    # A configuração é lida na importação: roda em um processo separado com DATABASE_URL=sqlite://
+    script = (
+        "from fastapi.testclient import TestClient\n"
+        "from app.main import app\n"
+        "with TestClient(app) as c:\n"
+        "    assert c.post('/api/users/register', json={'email': 'm@example.com', 'name': 'M', 'password': 'secret1'}).status_code == 201\n"
+        "    token = c.post('/api/users/login', json={'email': 'm@example.com', 'password': 'secret1'}).json()['access_token']\n"
+        "    headers = {'Authorization': 'Bearer ' + token}\n"
+        "    pages = [{'id': 'p0', 'title': 'P0', 'markdown': 'fim'}]\n"
+        "    assert c.post('/api/stories/', json={'story_title': 'S', 'pages': pages}, headers=headers).status_code == 201\n"
+        "    assert len(c.get('/api/stories/', headers=headers).json()) == 1\n"
+        "print('MEMORY-OK')\n"
+    )
+    env = dict(os.environ, DATABASE_URL="sqlite://", BCRYPT_ROUNDS="4")
+    result = subprocess.run([sys.executable, "-c", script], cwd=BACKEND_DIR, env=env, capture_output=True, text=True, timeout=120)
+    assert "MEMORY-OK" in result.stdout, result.stderr[-2000:]
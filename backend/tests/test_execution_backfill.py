@@ -0,0 +1,82 @@
+# backend/tests/test_execution_backfill.py
+# Migração 5: as execuções gravadas antes das tabelas normalizadas (apenas answers_json /
+# pages_visited_json) ganham suas linhas em execution_answers e execution_page_visits.
+from sqlalchemy import create_engine
+
+from app import crud_executions, models_db
+from app.migrations import run_migrations
+
+
+def _legacy_database(tmp_path):
+    # Banco criado antes da normalização: execuções só com as colunas JSON
+    legacy_engine = create_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+    with legacy_engine.begin() as connection:
+        connection.exec_driver_sql("CREATE TABLE users (id INTEGER PRIMARY KEY, email VARCHAR, name VARCHAR, hashed_password VARCHAR)")
+        connection.exec_driver_sql("CREATE TABLE stories (id INTEGER PRIMARY KEY, title VARCHAR, creator_id INTEGER, start_page_client_id VARCHAR)")
+        connection.exec_driver_sql(
+            "CREATE TABLE story_executions (id INTEGER PRIMARY KEY, story_id INTEGER, player_user_id INTEGER, "
+            "start_time DATETIME, end_time DATETIME, duration_minutes INTEGER, answers_json TEXT, "
+            "pages_visited_json TEXT, story_title_at_play VARCHAR, player_name_at_play VARCHAR)"
+        )
+        connection.exec_driver_sql("INSERT INTO users (id, email, name, hashed_password) VALUES (1, 'a@example.com', 'A', 'x')")
+        connection.exec_driver_sql("INSERT INTO stories (id, title, creator_id, start_page_client_id) VALUES (1, 'S', 1, 'p0')")
+        executions = [
+            # Escolha única e múltipla escolha (com opção repetida), percurso que volta a uma página
+            (1, '{"q1": "o1", "q2": ["a", "b", "a"]}', '["p0", "p1", "p0"]'),
+            # JSON quebrado nas duas colunas: nenhuma linha normalizada
+            (2, '{"q1": ', '["p0"'),
+            # JSON válido, mas do tipo errado nas respostas
+            (3, '["o1"]', '["p0"]'),
+            (4, None, None),
+        ]
+        for execution_id, answers_json, pages_visited_json in executions:
+            connection.exec_driver_sql(
+                "INSERT INTO story_executions (id, story_id, player_user_id, start_time, duration_minutes, "
+                "answers_json, pages_visited_json) VALUES (?, 1, 1, '2024-01-01 00:00:00', 1, ?, ?)",
+                (execution_id, answers_json, pages_visited_json)
+            )
+    models_db.Base.metadata.create_all(bind=legacy_engine) # Como create_db_and_tables: só cria as tabelas que faltam
+    return legacy_engine
+
+def _detail_rows(connection):
+    answers = connection.exec_driver_sql(
+        "SELECT execution_id, question_id, option_id, story_id FROM execution_answers ORDER BY execution_id, question_id, option_id"
+    ).all()
+    visits = connection.exec_driver_sql(
+        "SELECT execution_id, seq, client_page_id, story_id FROM execution_page_visits ORDER BY execution_id, seq"
+    ).all()
+    return [tuple(row) for row in answers], [tuple(row) for row in visits]
+
+
+def test_migration_backfills_execution_details(tmp_path):
+    legacy_engine = _legacy_database(tmp_path)
+    assert 5 in run_migrations(legacy_engine)
+
+    with legacy_engine.connect() as connection:
+        answers, visits = _detail_rows(connection)
+        # Uma linha por opção escolhida
+        assert answers == [(1, "q1", "o1", 1), (1, "q2", "a", 1), (1, "q2", "b", 1)]
+        # Uma linha por posição do percurso, inclusive as páginas repetidas
+        assert visits == [(1, 0, "p0", 1), (1, 1, "p1", 1), (1, 2, "p0", 1), (3, 0, "p0", 1)]
+        # Agregados recalculados a partir das linhas normalizadas
+        assert connection.exec_driver_sql(
+            "SELECT executions_count FROM story_analytics_summary WHERE story_id = 1"
+        ).scalar() == 4
+
+    legacy_engine.dispose()
+
+def test_execution_details_backfill_is_idempotent(tmp_path):
+    legacy_engine = _legacy_database(tmp_path)
+    run_migrations(legacy_engine)
+    with legacy_engine.connect() as connection:
+        before = _detail_rows(connection)
+
+    # Nova execução do backfill: as execuções já normalizadas não são relidas e as que não
+    # geram linhas (JSON quebrado ou vazio) continuam sem nenhuma
+    with legacy_engine.begin() as connection:
+        assert crud_executions.backfill_execution_details(connection, batch_size=1) == 2
+    with legacy_engine.connect() as connection:
+        assert _detail_rows(connection) == before
+
+    assert run_migrations(legacy_engine) == []
+    legacy_engine.dispose()
@@ -0,0 +1,106 @@
+# backend/tests/test_execution_import.py
+# POST /api/story-executions/import: registros válidos gravados em blocos, inválidos reportados
+# por linha (NDJSON) ou posição (array JSON) sem interromper a importação.
+import orjson
+
+from app import crud_executions
+from app.routers import executions_router
+
+
+def _create_story(client, headers) -> int:
+    pages = [{"id": "p0", "title": "P0", "markdown": "fim"}]
+    response = client.post("/api/stories/", json={"story_title": "S", "pages": pages, "start_page_client_id": "p0"}, headers=headers)
+    assert response.status_code == 201, response.text
+    return response.json()["story_id"]
+
+def _execution(story_id: int, minute: int = 0) -> dict:
+    return {
+        "story_id": story_id, "start_time": f"2024-01-01T10:{minute:02d}:00", "end_time": None,
+        "duration_minutes": 1, "answers": {"q1": "o1"}, "pages_visited": ["p0"],
+    }
+
+def _ndjson(*lines) -> bytes:
+    return b"\n".join(line if isinstance(line, bytes) else orjson.dumps(line) for line in lines)
+
+def _import(client, headers, body: bytes, content_type: str = "application/x-ndjson"):
+    response = client.post(
+        "/api/story-executions/import", content=body, headers={**headers, "Content-Type": content_type}
+    )
+    assert response.status_code == 200, response.text
+    return response.json()
+
+def _saved_count(client, db, headers) -> int:
+    creator_id = client.get("/api/users/me", headers=headers).json()["id"]
+    return crud_executions.get_story_executions_for_creator_count(db, creator_id)
+
+
+def test_import_reports_errors_per_line_and_keeps_valid_lines(client, auth_headers, db):
+    story_id = _create_story(client, auth_headers)
+    invalid_schema = {**_execution(story_id), "duration_minutes": "muito"}
+    body = _ndjson(
+        _execution(story_id, 1),
+        b'{"story_id": ',               # 2: JSON inválido
+        b"",                            # 3: linha vazia (ignorada, mas contada)
+        invalid_schema,                 # 4: erro de validação
+        _execution(10**6),              # 5: história inexistente
+        _execution(story_id, 2),
+    )
+    result = _import(client, auth_headers, body)
+
+    assert result["imported"] == 2
+    assert result["failed"] == 3
+    assert result["errors_truncated"] is False
+    errors = {error["line"]: error["error"] for error in result["errors"]}
+    assert set(errors) == {2, 4, 5}
+    assert "duration_minutes" in errors[4]
+    assert errors[5] == f"História ID {10**6} não encontrada."
+    assert _saved_count(client, db, auth_headers) == 2
+
+def test_import_writes_in_chunks(client, auth_headers, db, monkeypatch):
+    story_id = _create_story(client, auth_headers)
+    monkeypatch.setattr(executions_router, "EXECUTION_IMPORT_CHUNK_SIZE", 2)
+    chunk_sizes = []
+    import_chunk = crud_executions.import_story_executions_chunk_async
+    async def recording_import_chunk(db, items, player_user_id):
+        chunk_sizes.append(len(items))
+        return await import_chunk(db, items, player_user_id=player_user_id)
+    monkeypatch.setattr(crud_executions, "import_story_executions_chunk_async", recording_import_chunk)
+
+    # A história inexistente (linha 4) cai no segundo bloco; a linha é a do arquivo, não a do bloco
+    lines = [_execution(story_id, minute) for minute in range(5)]
+    lines[3] = _execution(10**6)
+    result = _import(client, auth_headers, _ndjson(*lines))
+
+    assert chunk_sizes == [2, 2, 1] # O último bloco, incompleto, é gravado no fim
+    assert result["imported"] == 4
+    assert [error["line"] for error in result["errors"]] == [4]
+    assert _saved_count(client, db, auth_headers) == 4
+
+def test_import_truncates_reported_errors(client, auth_headers, monkeypatch):
+    story_id = _create_story(client, auth_headers)
+    monkeypatch.setattr(executions_router, "EXECUTION_IMPORT_MAX_REPORTED_ERRORS", 2)
+    result = _import(client, auth_headers, _ndjson(b"{", b"[", _execution(story_id), b"x"))
+
+    assert result["imported"] == 1
+    assert result["failed"] == 3
+    assert [error["line"] for error in result["errors"]] == [1, 2]
+    assert result["errors_truncated"] is True
+
+def test_import_accepts_a_json_array(client, auth_headers, db):
+    story_id = _create_story(client, auth_headers)
+    body = orjson.dumps([_execution(story_id, 1), {"story_id": story_id}, _execution(story_id, 2)])
+    result = _import(client, auth_headers, body, content_type="application/json")
+
+    assert result["imported"] == 2
+    assert [error["line"] for error in result["errors"]] == [2] # Posição no array
+    assert _saved_count(client, db, auth_headers) == 2
+
+def test_import_reports_a_malformed_json_array(client, auth_headers, db):
+    story_id = _create_story(client, auth_headers)
+    body = b"[" + orjson.dumps(_execution(story_id)) + b", ]"
+    result = _import(client, auth_headers, body, content_type="application/json")
+
+    # O elemento lido antes do erro é gravado; o erro do corpo é reportado na linha 0
+    assert result["imported"] == 1
+    assert result["errors"] == [{"line": 0, "error": "Vírgula sobrando antes do fim do array JSON."}]
+    assert _saved_count(client, db, auth_headers) == 1
@@ -0,0 +1,79 @@
+# backend/tests/test_executions.py
+from fastapi.testclient import TestClient
+
+from app import crud_executions, execution_ingest
+from app.main import app
+
+
+def _create_story(client, headers) -> int:
+    pages = [{"id": "p0", "title": "P0", "markdown": "fim"}]
+    response = client.post("/api/stories/", json={"story_title": "S", "pages": pages, "start_page_client_id": "p0"}, headers=headers)
+    assert response.status_code == 201, response.text
+    return response.json()["story_id"]
+
+def _execution(story_id: int) -> dict:
+    return {
+        "story_id": story_id, "start_time": "2024-01-01T10:00:00", "end_time": "2024-01-01T10:05:00",
+        "duration_minutes": 5, "answers": {}, "pages_visited": ["p0"],
+    }
+
+
+async def _failing_batch(db, executions):
+    raise RuntimeError("banco indisponível")
+
+def _creator_count(client, db, headers) -> int:
+    creator_id = client.get("/api/users/me", headers=headers).json()["id"]
+    return crud_executions.get_story_executions_for_creator_count(db, creator_id)
+
+def test_buffered_ingest_returns_an_ingest_id(client, auth_headers, db, monkeypatch, capsys):
+    story_id = _create_story(client, auth_headers)
+    monkeypatch.setattr(execution_ingest, "EXECUTION_INGEST_MODE", "buffered")
+    with TestClient(app) as buffered_client: # O lifespan inicia (e, ao sair, drena) a fila
+        response = buffered_client.post("/api/story-executions/", json=_execution(story_id), headers=auth_headers)
+        assert response.status_code == 202
+        assert response.json()["status"] == "queued"
+        ingest_id = response.json()["ingest_id"]
+        stats = buffered_client.get("/api/story-executions/ingest/stats", headers=auth_headers).json()
+        assert stats["durability"] == "queued"
+        assert stats["max_unconfirmed"] == execution_ingest.EXECUTION_INGEST_QUEUE_SIZE + execution_ingest.EXECUTION_INGEST_BATCH_SIZE
+    assert _creator_count(client, db, auth_headers) == 1
+    assert f"execuções gravadas: {ingest_id}" in capsys.readouterr().out # O ID liga a resposta ao log
+
+def test_buffered_ingest_logs_the_id_of_dropped_executions(client, auth_headers, monkeypatch, capsys):
+    story_id = _create_story(client, auth_headers)
+    monkeypatch.setattr(crud_executions, "create_story_executions_batch_async", _failing_batch)
+    monkeypatch.setattr(execution_ingest, "EXECUTION_INGEST_MODE", "buffered")
+    with TestClient(app) as buffered_client:
+        response = buffered_client.post("/api/story-executions/", json=_execution(story_id), headers=auth_headers)
+        assert response.status_code == 202
+        ingest_id = response.json()["ingest_id"]
+    assert f"Execução {ingest_id} (história ID {story_id}) descartada: banco indisponível" in capsys.readouterr().out
+
+def test_written_durability_waits_for_the_batch(client, auth_headers, db, monkeypatch):
+    story_id = _create_story(client, auth_headers)
+    monkeypatch.setattr(execution_ingest, "EXECUTION_INGEST_MODE", "buffered")
+    monkeypatch.setattr(execution_ingest, "EXECUTION_INGEST_DURABILITY", "written")
+    with TestClient(app) as buffered_client:
+        response = buffered_client.post("/api/story-executions/", json=_execution(story_id), headers=auth_headers)
+        assert response.status_code == 202
+        assert response.json()["status"] == "written"
+        assert response.json()["ingest_id"]
+        assert _creator_count(client, db, auth_headers) == 1 # Já gravada, antes de drenar a fila
+        stats = buffered_client.get("/api/story-executions/ingest/stats", headers=auth_headers).json()
+        assert (stats["unconfirmed"], stats["max_unconfirmed"]) == (0, 0)
+
+def test_written_durability_reports_dropped_executions(client, auth_headers, monkeypatch):
+    story_id = _create_story(client, auth_headers)
+    monkeypatch.setattr(crud_executions, "create_story_executions_batch_async", _failing_batch)
+    monkeypatch.setattr(execution_ingest, "EXECUTION_INGEST_MODE", "buffered")
+    monkeypatch.setattr(execution_ingest, "EXECUTION_INGEST_DURABILITY", "written")
+    with TestClient(app) as buffered_client:
+        response = buffered_client.post("/api/story-executions/", json=_execution(story_id), headers=auth_headers)
+    assert response.status_code == 500
+    assert "ingest_id" in response.json()["detail"]
+
+def test_direct_ingest_returns_the_saved_execution(client, auth_headers):
+    story_id = _create_story(client, auth_headers)
+    response = client.post("/api/story-executions/", json=_execution(story_id), headers=auth_headers)
+    assert response.status_code == 201
+    assert response.json()["id"] > 0
@@ -0,0 +1,132 @@
+# backend/tests/test_executions_export.py
+# GET /api/story-executions/export: execuções do criador em CSV ou NDJSON, com as respostas
+# e as páginas visitadas achatadas em colunas (ver executions_export.py).
+import csv
+import io
+
+import orjson
+
+from app import executions_export
+
+
+def _question(question_id: str, question_type: str, option_ids) -> dict:
+    return {
+        "id": question_id, "text": question_id, "type": question_type,
+        "options": [{"id": option_id, "text": option_id} for option_id in option_ids],
+    }
+
+def _create_story(client, headers, questions=()) -> int:
+    pages = [
+        {"id": "p0", "title": "P0", "markdown": "[[P1]]", "questions": list(questions)},
+        {"id": "p1", "title": "P1", "markdown": "fim"},
+    ]
+    response = client.post("/api/stories/", json={"story_title": "S", "pages": pages, "start_page_client_id": "p0"}, headers=headers)
+    assert response.status_code == 201, response.text
+    return response.json()["story_id"]
+
+def _post_execution(client, headers, story_id, start_time, answers, pages_visited, end_time=None) -> int:
+    execution = {
+        "story_id": story_id, "start_time": start_time, "end_time": end_time,
+        "duration_minutes": 5, "answers": answers, "pages_visited": pages_visited,
+    }
+    response = client.post("/api/story-executions/", json=execution, headers=headers)
+    assert response.status_code == 201, response.text
+    return response.json()["id"]
+
+def _export(client, headers, **params):
+    response = client.get("/api/story-executions/export", params=params, headers=headers)
+    assert response.status_code == 200, response.text
+    return response
+
+def _ndjson_rows(client, headers, **params):
+    body = _export(client, headers, format="ndjson", **params).content
+    return [orjson.loads(line) for line in body.splitlines()]
+
+
+def _seed(client, auth_headers, other_auth_headers) -> dict:
+    questions = [_question("q1", "single-choice", ["o1", "o2"]), _question("q2", "multiple-choice", ["a", "b"])]
+    story_id = _create_story(client, auth_headers, questions)
+    plain_story_id = _create_story(client, auth_headers)
+    other_story_id = _create_story(client, other_auth_headers)
+    return {
+        "story_id": story_id, "plain_story_id": plain_story_id, "other_story_id": other_story_id,
+        "first": _post_execution(
+            client, auth_headers, story_id, "2024-01-01T10:00:00",
+            {"q1": "o1", "q2": ["a", "b"], "qx": "z"}, ["p0", "p1"], end_time="2024-01-01T10:05:00"
+        ),
+        "second": _post_execution(client, auth_headers, story_id, "2024-01-02T10:00:00", {}, ["p0"]),
+        "plain": _post_execution(client, auth_headers, plain_story_id, "2024-01-03T10:00:00", {}, ["p0"]),
+        # Jogada pelo usuário autenticado, mas em uma história de outro criador
+        "other": _post_execution(client, auth_headers, other_story_id, "2024-01-04T10:00:00", {}, ["p0"]),
+    }
+
+
+def test_csv_export_flattens_answers_and_pages(client, auth_headers, other_auth_headers):
+    ids = _seed(client, auth_headers, other_auth_headers)
+    response = _export(client, auth_headers, format="csv")
+    assert response.headers["content-type"] == "text/csv; charset=utf-8"
+    assert response.headers["content-disposition"].endswith('.csv"')
+
+    reader = csv.DictReader(io.StringIO(response.text))
+    assert reader.fieldnames == executions_export.BASE_FIELDS + [
+        "answer:q1", "answer:q2", "answers_other", "pages_visited", "pages_visited_count"
+    ]
+    rows = {int(row["id"]): row for row in reader}
+    assert list(rows) == [ids["plain"], ids["second"], ids["first"]] # Mais recente primeiro
+
+    first = rows[ids["first"]]
+    assert first["answer:q1"] == "o1"
+    assert first["answer:q2"] == "a|b"
+    assert orjson.loads(first["answers_other"]) == {"qx": "z"} # Questão que não está nas histórias
+    assert first["pages_visited"] == "p0|p1"
+    assert first["pages_visited_count"] == "2"
+    assert first["start_time"] == "2024-01-01T10:00:00"
+    assert first["end_time"] == "2024-01-01T10:05:00"
+
+    second = rows[ids["second"]]
+    assert (second["answer:q1"], second["answer:q2"], second["answers_other"]) == ("", "", "")
+    assert second["end_time"] == ""
+
+def test_ndjson_export_rows(client, auth_headers, other_auth_headers):
+    ids = _seed(client, auth_headers, other_auth_headers)
+    rows = _ndjson_rows(client, auth_headers)
+    assert [row["id"] for row in rows] == [ids["plain"], ids["second"], ids["first"]]
+
+    first = rows[-1]
+    assert first["story_id"] == ids["story_id"]
+    assert first["answer:q1"] == "o1"
+    assert first["answer:q2"] == "a|b"
+    assert first["answers_other"] == '{"qx":"z"}'
+    assert first["pages_visited"] == "p0|p1"
+    assert first["pages_visited_count"] == 2
+    assert rows[1]["answer:q1"] is None
+    assert rows[1]["end_time"] is None
+
+def test_export_filters(client, auth_headers, other_auth_headers):
+    ids = _seed(client, auth_headers, other_auth_headers)
+
+    story_rows = _ndjson_rows(client, auth_headers, story_id=ids["story_id"])
+    assert [row["id"] for row in story_rows] == [ids["second"], ids["first"]]
+
+    # start_from é inclusivo e start_to, exclusivo
+    in_range = _ndjson_rows(client, auth_headers, start_from="2024-01-02T10:00:00", start_to="2024-01-03T10:00:00")
+    assert [row["id"] for row in in_range] == [ids["second"]]
+
+    # Colunas de respostas só das questões da história filtrada
+    plain_rows = _ndjson_rows(client, auth_headers, story_id=ids["plain_story_id"])
+    assert [row["id"] for row in plain_rows] == [ids["plain"]]
+    assert not any(field.startswith("answer:") for field in plain_rows[0])
+
+def test_export_never_includes_other_creators_executions(client, auth_headers, other_auth_headers):
+    ids = _seed(client, auth_headers, other_auth_headers)
+    assert ids["other"] not in {row["id"] for row in _ndjson_rows(client, auth_headers)}
+    # Filtrar pela história de outro criador não a expõe
+    assert _ndjson_rows(client, auth_headers, story_id=ids["other_story_id"]) == []
+
+    # O criador da outra história vê apenas a execução dela
+    assert [row["id"] for row in _ndjson_rows(client, other_auth_headers)] == [ids["other"]]
+
+def test_export_rejects_unknown_format(client, auth_headers):
+    response = client.get("/api/story-executions/export", params={"format": "xlsx"}, headers=auth_headers)
+    assert response.status_code == 400
+    assert "csv, ndjson" in response.json()["detail"]
@@ -0,0 +1,66 @@
+# backend/tests/test_fast_serialization.py
+# A leitura rápida (linhas -> dicionários -> orjson) deve produzir o mesmo JSON que o
+# caminho ORM + Pydantic (StoryPublic / StoryExecutionPublic), inclusive com dados ruins no banco.
+import datetime
+
+import orjson
+from sqlalchemy import text
+
+from app import crud_executions, crud_stories, crud_users, schemas
+
+
+def _create_story(db):
+    creator = crud_users.create_user(db, schemas.UserCreate(email="criador@example.com", password="secret1"))
+    pages = [
+        schemas.PageCreate(id="p0", title="P0", markdown="início [[P1]]", accentColor="#ff0000", questions=[
+            schemas.QuestionBase(id="q1", text="Cor?", type="single-choice", options=[schemas.QuestionOption(id="o1", text="Azul")])
+        ]),
+        schemas.PageCreate(id="p1", title="P1", markdown="fim"),
+    ]
+    return crud_stories.create_story(
+        db, schemas.StoryCreateSchema(story_title="História", pages=pages, start_page_client_id="p0"), creator.id
+    )
+
+def _orm_json(db, story_id: int) -> dict:
+    db.expire_all()
+    story = crud_stories.get_story_by_id(db, story_id, pages_loading="selectin")
+    return orjson.loads(schemas.StoryPublic.model_validate(story).model_dump_json())
+
+def _fast_json(db, story_id: int) -> dict:
+    return orjson.loads(crud_stories.dump_public_stories([crud_stories.get_story_public(db, story_id)]))[0]
+
+
+def test_fast_story_read_matches_orm_path(db):
+    story = _create_story(db)
+    fast = _fast_json(db, story.id)
+    assert fast == _orm_json(db, story.id)
+    assert [page["accentColor"] for page in fast["pages"]] == ["#ff0000", schemas.DEFAULT_ACCENT_COLOR]
+
+def test_fast_story_read_tolerates_bad_stored_json(db):
+    story = _create_story(db)
+    db.execute(text("UPDATE story_pages SET questions_json = '[{\"id\": ' WHERE client_page_id = 'p0'"))
+    db.execute(text("UPDATE story_pages SET questions_json = '{\"id\": 1}', accent_color = NULL WHERE client_page_id = 'p1'"))
+    db.commit()
+    fast = _fast_json(db, story.id)
+    assert fast == _orm_json(db, story.id)
+    assert [page["questions"] for page in fast["pages"]] == [[], []]
+    assert fast["pages"][1]["accentColor"] == schemas.DEFAULT_ACCENT_COLOR
+
+def test_fast_executions_read_tolerates_bad_stored_json(db):
+    story = _create_story(db)
+    crud_executions.create_story_execution(db, schemas.StoryExecutionCreate(
+        story_id=story.id, start_time=datetime.datetime(2024, 1, 1), duration_minutes=3,
+        answers={"q1": "o1"}, pages_visited=["p0", "p1"],
+    ), player_user_id=story.creator_id)
+    db.execute(text("UPDATE story_executions SET answers_json = 'nao e json', pages_visited_json = '{}'"))
+    db.commit()
+
+    items = crud_executions.get_story_executions_public_for_creator(db, story.creator_id)
+    fast = orjson.loads(orjson.dumps(items))
+    db.expire_all()
+    orm = [
+        orjson.loads(schemas.StoryExecutionPublic.model_validate(execution).model_dump_json())
+        for execution in crud_executions.get_story_executions_for_creator(db, story.creator_id)
+    ]
+    assert fast == orm
+    assert fast[0]["answers"] == {} and fast[0]["pages_visited"] == []
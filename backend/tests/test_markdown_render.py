@@ -0,0 +1,43 @@
+# backend/tests/test_markdown_render.py
+from sqlalchemy import text
+
+from app import markdown_render, migrations
+from app.database import engine
+from app.markdown_render import render_markdown
+
+
+def test_internal_link_gets_page_id_and_escaped_title():
+    html = render_markdown('Vá para [[Sala "A" & B]].')
+    assert (
+        '<a href="#" class="internal-player-link" data-link-title="Sala &quot;A&quot; &amp; B" '
+        'data-page-id="sala-a--b">Sala &quot;A&quot; &amp; B</a>'
+    ) in html
+
+def test_internal_link_is_not_expanded_inside_code():
+    assert render_markdown("Use `[[Título]]`.") == "<p>Use <code>[[Título]]</code>.</p>\n"
+    assert render_markdown("```\n[[Título]]\n```") == "<pre><code>[[Título]]\n</code></pre>\n"
+
+def test_internal_link_in_image_alt_keeps_attribute_intact():
+    assert render_markdown("![[[alt]]](http://x/y.png)") == '<p><img src="http://x/y.png" alt="alt" /></p>\n'
+
+def test_internal_link_does_not_nest_inside_links():
+    html = render_markdown("[ver [[Sala]]](http://example.com)")
+    assert html.count("<a ") == 1
+    assert ">ver [[Sala]]</a>" in html
+
+def test_external_links_open_in_new_tab_and_empty_titles_stay_text():
+    html = render_markdown("[site](http://example.com) [[ ]]")
+    assert 'target="_blank" rel="noopener noreferrer"' in html
+    assert "[[ ]]" in html
+
+def test_migration_rerenders_pages_from_older_renderer(client, auth_headers):
+    pages = [{"id": "p0", "title": "P0", "markdown": "`[[x]]`"}]
+    story_id = client.post(
+        "/api/stories/", json={"story_title": "S", "pages": pages, "start_page_client_id": "p0"}, headers=auth_headers
+    ).json()["story_id"]
+    with engine.begin() as conn: # Simula uma página renderizada pela versão anterior
+        conn.execute(text("UPDATE story_pages SET html = 'antigo', html_hash = 'antigo' WHERE story_id = :id"), {"id": story_id})
+        migrations._0009_story_pages_internal_links(conn)
+        html, html_hash = conn.execute(text("SELECT html, html_hash FROM story_pages WHERE story_id = :id"), {"id": story_id}).one()
+    assert html == "<p><code>[[x]]</code></p>\n"
+    assert html_hash == markdown_render.markdown_hash("`[[x]]`")
@@ -0,0 +1,88 @@
+# backend/tests/test_query_plans.py
+# As consultas do dashboard e da listagem de histórias devem usar os índices compostos
+# (filtro + ordenação pelo índice), sem varrer a tabela nem ordenar em uma B-tree temporária.
+import datetime
+
+import pytest
+from sqlalchemy import create_engine, inspect
+
+from app import crud_executions, crud_stories, crud_users, models_db, schemas
+from app.database import engine
+from app.migrations import run_migrations
+
+
+@pytest.fixture
+def creator_with_executions(db):
+    creator = crud_users.create_user(db, schemas.UserCreate(email="criador@example.com", name="Criador", password="secret1"))
+    story = crud_stories.create_story(
+        db,
+        schemas.StoryCreateSchema(story_title="S", pages=[schemas.PageCreate(id="p0", title="P0", markdown="fim")]),
+        creator.id
+    )
+    start = datetime.datetime(2024, 1, 1)
+    crud_executions.create_story_executions_batch(db, [
+        (schemas.StoryExecutionCreate(
+            story_id=story.id, start_time=start + datetime.timedelta(minutes=index), duration_minutes=1,
+            answers={}, pages_visited=["p0"]
+        ), creator.id)
+        for index in range(50)
+    ])
+    db.commit()
+    return creator.id
+
+def _query_plan(statement: str, parameters) -> str:
+    with engine.connect() as connection:
+        rows = connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters).all()
+    return "\n".join(row[-1] for row in rows)
+
+def _plan_of_select_on(query_counter, table_name: str) -> str:
+    selects = [
+        (statement, parameters) for statement, parameters in query_counter.executed
+        if statement.lstrip().upper().startswith("SELECT") and f"FROM {table_name}" in statement
+    ]
+    assert selects, f"nenhuma consulta em {table_name}"
+    return _query_plan(*selects[-1])
+
+
+@pytest.mark.parametrize("use_cursor", [False, True])
+def test_dashboard_query_uses_creator_index(db, query_counter, creator_with_executions, use_cursor):
+    after = (datetime.datetime(2024, 1, 1, 0, 30), 10**9) if use_cursor else None
+    items = crud_executions.get_story_executions_public_for_creator(db, creator_with_executions, limit=10, after=after)
+    assert len(items) == 10
+    plan = _plan_of_select_on(query_counter, "story_executions")
+    assert "ix_story_executions_creator_id_start_time_id" in plan
+    assert "TEMP B-TREE" not in plan
+    if use_cursor: # A leitura começa no cursor (faixa de start_time), não no início do índice
+        assert "start_time<?" in plan
+
+def test_dashboard_count_uses_creator_index(db, query_counter, creator_with_executions):
+    assert crud_executions.get_story_executions_for_creator_count(db, creator_with_executions) == 50
+    plan = _plan_of_select_on(query_counter, "story_executions")
+    assert "ix_story_executions_creator_id_start_time_id" in plan
+
+def test_story_listing_uses_creator_index(db, query_counter, creator_with_executions):
+    assert len(crud_stories.get_stories_public_by_creator_id(db, creator_with_executions)) == 1
+    plan = _plan_of_select_on(query_counter, "stories")
+    assert "ix_stories_creator_id_id" in plan
+    assert "TEMP B-TREE" not in plan
+
+def test_migrations_add_indexes_to_existing_database(tmp_path):
+    # Banco criado antes dos índices (apenas as tabelas, sem índices nem colunas novas)
+    legacy_engine = create_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+    with legacy_engine.begin() as connection:
+        connection.exec_driver_sql("CREATE TABLE users (id INTEGER PRIMARY KEY, email VARCHAR, name VARCHAR, hashed_password VARCHAR)")
+        connection.exec_driver_sql("CREATE TABLE stories (id INTEGER PRIMARY KEY, title VARCHAR, creator_id INTEGER, start_page_client_id VARCHAR)")
+        connection.exec_driver_sql(
+            "CREATE TABLE story_executions (id INTEGER PRIMARY KEY, story_id INTEGER, player_user_id INTEGER, "
+            "start_time DATETIME, end_time DATETIME, duration_minutes INTEGER, answers_json TEXT, "
+            "pages_visited_json TEXT, story_title_at_play VARCHAR, player_name_at_play VARCHAR)"
+        )
+    models_db.Base.metadata.create_all(bind=legacy_engine) # Como create_db_and_tables: só cria as tabelas que faltam
+    run_migrations(legacy_engine)
+
+    inspector = inspect(legacy_engine)
+    assert "ix_stories_creator_id_id" in {index["name"] for index in inspector.get_indexes("stories")}
+    execution_indexes = {index["name"] for index in inspector.get_indexes("story_executions")}
+    assert {"ix_story_executions_creator_id_start_time_id", "ix_story_executions_story_id_start_time_id"} <= execution_indexes
+    assert run_migrations(legacy_engine) == [] # Idempotente
+    legacy_engine.dispose()
@@ -0,0 +1,75 @@
+# backend/tests/test_story_cache.py
+# O cache de respostas é por processo: a versão da história no banco decide se a entrada
+# ainda vale, para que uma atualização feita por outro worker nunca deixe a resposta antiga em uso.
+from sqlalchemy import text
+
+from app import story_cache
+from app.database import engine
+
+
+def _create_story(client, headers, title="Original"):
+    pages = [{"id": "p0", "title": "P0", "markdown": "início [[P1]]"}, {"id": "p1", "title": "P1", "markdown": "fim"}]
+    response = client.post("/api/stories/", json={"story_title": title, "pages": pages, "start_page_client_id": "p0"}, headers=headers)
+    assert response.status_code == 201, response.text
+    return response.json()["story_id"]
+
+def _update_from_another_worker(story_id: int, title: str) -> None:
+    # Simula outro processo: muda o banco sem passar pelo cache deste processo
+    with engine.begin() as connection:
+        connection.execute(
+            text("UPDATE stories SET title = :title, content_version = content_version + 1, "
+                 "updated_at = CURRENT_TIMESTAMP WHERE id = :id"),
+            {"title": title, "id": story_id},
+        )
+
+
+def test_cache_hit_only_reads_the_version(client, auth_headers, query_counter):
+    story_id = _create_story(client, auth_headers)
+    client.get(f"/api/stories/{story_id}", headers=auth_headers)
+    start = query_counter.count
+    response = client.get(f"/api/stories/{story_id}", headers=auth_headers)
+    assert response.status_code == 200
+    statements = [statement for statement, _ in query_counter.executed[start:]]
+    assert len(statements) == 1 and "story_pages" not in statements[0]
+    assert story_cache.stats()["hits"] >= 1
+
+def test_update_by_another_worker_is_not_served_stale(client, auth_headers):
+    story_id = _create_story(client, auth_headers)
+    first = client.get(f"/api/stories/{story_id}", headers=auth_headers)
+    assert first.json()["title"] == "Original"
+
+    _update_from_another_worker(story_id, "Editada")
+
+    response = client.get(f"/api/stories/{story_id}", headers=auth_headers)
+    assert response.json()["title"] == "Editada"
+    assert response.headers["ETag"] != first.headers["ETag"]
+    conditional = client.get(f"/api/stories/{story_id}", headers=dict(auth_headers, **{"If-None-Match": first.headers["ETag"]}))
+    assert conditional.status_code == 200
+    batch = client.get(f"/api/stories/batch?ids={story_id}", headers=auth_headers)
+    assert batch.json()[0]["title"] == "Editada"
+
+def test_not_modified_uses_current_version(client, auth_headers):
+    story_id = _create_story(client, auth_headers)
+    etag = client.get(f"/api/stories/{story_id}", headers=auth_headers).headers["ETag"]
+    response = client.get(f"/api/stories/{story_id}", headers=dict(auth_headers, **{"If-None-Match": f"W/{etag}"}))
+    assert response.status_code == 304
+    assert response.headers["ETag"] == etag
+
+def test_deleted_story_is_not_served_from_cache(client, auth_headers):
+    story_id = _create_story(client, auth_headers)
+    client.get(f"/api/stories/{story_id}", headers=auth_headers)
+    with engine.begin() as connection: # Apagada por outro processo
+        connection.execute(text("DELETE FROM story_pages WHERE story_id = :id"), {"id": story_id})
+        connection.execute(text("DELETE FROM stories WHERE id = :id"), {"id": story_id})
+    assert client.get(f"/api/stories/{story_id}", headers=auth_headers).status_code == 404
+    assert client.get(f"/api/stories/batch?ids={story_id}", headers=auth_headers).json() == []
+
+def test_html_variant_is_cached_separately(client, auth_headers):
+    story_id = _create_story(client, auth_headers)
+    plain = client.get(f"/api/stories/{story_id}", headers=auth_headers)
+    with_html = client.get(f"/api/stories/{story_id}?include_html=true", headers=auth_headers)
+    assert "html" not in plain.json()["pages"][0]
+    assert "internal-player-link" in with_html.json()["pages"][0]["html"]
+    assert plain.headers["ETag"] != with_html.headers["ETag"]
+    again = client.get(f"/api/stories/{story_id}?include_html=true", headers=auth_headers)
+    assert again.content == with_html.content
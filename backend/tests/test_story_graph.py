@@ -0,0 +1,93 @@
+# backend/tests/test_story_graph.py
+# Análise do grafo de páginas (story_graph) e GET /api/stories/{id}/graph.
+from app import story_graph
+
+
+def test_links_use_the_frontend_page_ids():
+    markdown = "Vá para [[Sala de Estar]], [[ sala de estar ]] ou [[Fim!]]. [[]] é ignorado."
+    assert story_graph.extract_links(markdown) == ["sala-de-estar", "fim"]
+    assert story_graph.generate_page_id("  Ação   Final ") == "ao-final" # \w apenas ASCII, como no JavaScript
+    assert story_graph.extract_links(None) == []
+
+def test_analyze_graph():
+    adjacency = story_graph.build_adjacency([
+        ("inicio", "[[A]] [[B]] [[Nada]]"),
+        ("a", "[[B]]"),
+        ("b", "[[Inicio]] [[C]]"),
+        ("c", "fim"),
+        ("perdida", "[[A]]"),                    # Ninguém aponta para ela
+        ("a", "página repetida: vale a primeira"),
+    ])
+    assert adjacency == {"inicio": ["a", "b", "nada"], "a": ["b"], "b": ["inicio", "c"], "c": [], "perdida": ["a"]}
+
+    graph = story_graph.analyze_graph("inicio", adjacency)
+    assert graph["start_page_exists"] is True
+    assert graph["page_count"] == 5
+    assert graph["reachable"] == ["inicio", "a", "b", "c"] # Ordem da busca em largura
+    assert graph["unreachable"] == ["perdida"]
+    assert graph["depth"] == {"inicio": 0, "a": 1, "b": 1, "c": 2}
+    assert graph["max_depth"] == 2
+    assert graph["dead_ends"] == ["c"]
+    assert graph["broken_links"] == [{"page_id": "inicio", "target": "nada"}]
+
+def test_page_with_only_broken_links_is_a_dead_end():
+    graph = story_graph.analyze_graph("p0", story_graph.build_adjacency([("p0", "[[Sumiu]]")]))
+    assert graph["dead_ends"] == ["p0"]
+    assert graph["broken_links"] == [{"page_id": "p0", "target": "sumiu"}]
+
+def test_missing_start_page_leaves_every_page_unreachable():
+    adjacency = {"p0": ["p1"], "p1": []}
+    for start_page_client_id in (None, "nao-existe"):
+        graph = story_graph.analyze_graph(start_page_client_id, adjacency)
+        assert graph["start_page_exists"] is False
+        assert graph["reachable"] == []
+        assert graph["unreachable"] == ["p0", "p1"]
+        assert graph["depth"] == {}
+        assert graph["max_depth"] == 0
+
+def test_build_adjacency_reuses_unchanged_pages(monkeypatch):
+    previous = {"p0": ["guardado"], "p1": ["p0"]}
+    parsed = []
+    extract_links = story_graph.extract_links
+    monkeypatch.setattr(story_graph, "extract_links", lambda markdown: parsed.append(markdown) or extract_links(markdown))
+
+    adjacency = story_graph.build_adjacency(
+        [("p0", "[[P1]]"), ("p1", "[[P2]]"), ("p2", "fim")], previous=previous, unchanged={"p0", "p2"}
+    )
+    # p0 vem da análise anterior; p1 mudou e p2 não está nela: ambas são reprocessadas
+    assert adjacency == {"p0": ["guardado"], "p1": ["p2"], "p2": []}
+    assert parsed == ["[[P2]]", "fim"]
+
+
+def _story_body(pages):
+    return {"story_title": "S", "start_page_client_id": "p0", "pages": [
+        {"id": page_id, "title": page_id.upper(), "markdown": markdown} for page_id, markdown in pages
+    ]}
+
+def test_update_story_reprocesses_only_changed_pages(client, auth_headers, monkeypatch):
+    pages = [("p0", "[[P1]]"), ("p1", "[[P2]]"), ("p2", "fim")]
+    response = client.post("/api/stories/", json=_story_body(pages), headers=auth_headers)
+    story_id = response.json()["story_id"]
+
+    parsed = []
+    extract_links = story_graph.extract_links
+    monkeypatch.setattr(story_graph, "extract_links", lambda markdown: parsed.append(markdown) or extract_links(markdown))
+    pages[1] = ("p1", "[[P0]] [[Nova]]")
+    pages.append(("p3", "[[P0]]"))
+    assert client.put(f"/api/stories/{story_id}", json=_story_body(pages), headers=auth_headers).status_code == 200
+
+    assert sorted(parsed) == ["[[P0]]", "[[P0]] [[Nova]]"] # Só a página alterada e a nova
+    graph = client.get(f"/api/stories/{story_id}/graph", headers=auth_headers).json()
+    assert graph["adjacency"] == {"p0": ["p1"], "p1": ["p0", "nova"], "p2": [], "p3": ["p0"]}
+    assert graph["unreachable"] == ["p2", "p3"]
+    assert graph["broken_links"] == [{"page_id": "p1", "target": "nova"}]
+
+def test_graph_is_owner_only(client, auth_headers, other_auth_headers):
+    response = client.post("/api/stories/", json=_story_body([("p0", "fim")]), headers=auth_headers)
+    story_id = response.json()["story_id"]
+
+    response = client.get(f"/api/stories/{story_id}/graph", headers=auth_headers)
+    assert response.status_code == 200
+    assert response.json()["story_id"] == story_id
+    assert client.get(f"/api/stories/{story_id}/graph", headers=other_auth_headers).status_code == 404
+    assert client.get("/api/stories/999999/graph", headers=auth_headers).status_code == 404
@@ -0,0 +1,89 @@
+# backend/tests/test_story_loading.py
+# Regressão de N+1: o número de comandos SQL para listar histórias (com as páginas) não
+# pode depender do número de histórias.
+import pytest
+
+from app import crud_stories, crud_users, schemas
+
+
+def _create_user(db) -> int:
+    user = crud_users.create_user(db, schemas.UserCreate(email="criador@example.com", name="Criador", password="secret1"))
+    return user.id
+
+def _create_stories(db, creator_id: int, count: int) -> None:
+    for index in range(count):
+        pages = [
+            schemas.PageCreate(id=f"p{page}", title=f"Página {page}", markdown=f"texto [[Página {page + 1}]]")
+            for page in range(3)
+        ]
+        crud_stories.create_story(
+            db, schemas.StoryCreateSchema(story_title=f"História {index}", pages=pages, start_page_client_id="p0"), creator_id
+        )
+
+def _count_listing_queries(db, query_counter, creator_id: int, pages_loading: str) -> int:
+    db.expunge_all()
+    start = query_counter.count
+    stories = crud_stories.get_stories_by_creator_id(db, creator_id, pages_loading=pages_loading)
+    payload = [schemas.StoryPublic.model_validate(story).model_dump() for story in stories] # Toca em story.pages
+    assert all(len(story["pages"]) == 3 for story in payload)
+    return query_counter.count - start
+
+
+@pytest.mark.parametrize("pages_loading, expected_queries", [("selectin", 2), ("joined", 1)])
+def test_story_listing_query_count_is_constant(db, query_counter, pages_loading, expected_queries):
+    creator_id = _create_user(db)
+    _create_stories(db, creator_id, 2)
+    few = _count_listing_queries(db, query_counter, creator_id, pages_loading)
+    _create_stories(db, creator_id, 10)
+    many = _count_listing_queries(db, query_counter, creator_id, pages_loading)
+    assert few == many == expected_queries
+
+def test_lazy_loading_is_n_plus_one(db, query_counter):
+    # Referência: sem carregamento antecipado, cada história custa uma consulta a mais
+    creator_id = _create_user(db)
+    _create_stories(db, creator_id, 4)
+    assert _count_listing_queries(db, query_counter, creator_id, "lazy") == 1 + 4
+
+def test_stories_by_ids_query_count_is_constant(db, query_counter):
+    creator_id = _create_user(db)
+    _create_stories(db, creator_id, 6)
+    story_ids = [story["id"] for story in crud_stories.get_story_summaries_by_creator_id(db, creator_id)]
+    counts = []
+    for ids in (story_ids[:2], story_ids):
+        db.expunge_all()
+        start = query_counter.count
+        stories = crud_stories.get_stories_by_ids(db, ids)
+        assert sum(len(story.pages) for story in stories) == 3 * len(ids)
+        counts.append(query_counter.count - start)
+    assert counts == [2, 2]
+
+def test_story_by_id_joined_is_single_query(db, query_counter):
+    creator_id = _create_user(db)
+    _create_stories(db, creator_id, 1)
+    story_id = crud_stories.get_story_summaries_by_creator_id(db, creator_id)[0]["id"]
+    db.expunge_all()
+    start = query_counter.count
+    story = crud_stories.get_story_by_id(db, story_id, pages_loading="joined")
+    assert len(story.pages) == 3
+    assert query_counter.count - start == 1
+
+def test_list_endpoint_query_count_is_constant(client, auth_headers, query_counter):
+    def create(count):
+        for index in range(count):
+            pages = [{"id": f"p{page}", "title": f"P{page}", "markdown": "texto"} for page in range(3)]
+            response = client.post("/api/stories/", json={"story_title": f"S{index}", "pages": pages}, headers=auth_headers)
+            assert response.status_code == 201, response.text
+
+    def count_list_queries():
+        start = query_counter.count
+        response = client.get("/api/stories/", headers=auth_headers)
+        assert response.status_code == 200
+        return query_counter.count - start, len(response.json())
+
+    create(2)
+    client.get("/api/users/me", headers=auth_headers) # Aquece o cache de usuários
+    few, listed_few = count_list_queries()
+    create(10)
+    many, listed_many = count_list_queries()
+    assert (listed_few, listed_many) == (2, 12)
+    assert few == many
@@ -0,0 +1,46 @@
+# backend/tests/test_story_pages.py
+# Entrega paginada: manifesto (com requisições condicionais) e páginas sob demanda.
+
+
+def _create_story(client, headers):
+    pages = [
+        {"id": "inicio", "title": "Inicio", "markdown": "[[Meio]]"},
+        {"id": "meio", "title": "Meio", "markdown": "[[Fim]]"},
+        {"id": "fim", "title": "Fim", "markdown": "fim"},
+    ]
+    response = client.post("/api/stories/", json={"story_title": "S", "pages": pages, "start_page_client_id": "inicio"}, headers=headers)
+    assert response.status_code == 201, response.text
+    return response.json()["story_id"]
+
+
+def test_manifest_not_modified_skips_manifest_queries(client, auth_headers, query_counter):
+    story_id = _create_story(client, auth_headers)
+    response = client.get(f"/api/stories/{story_id}/manifest", headers=auth_headers)
+    assert response.status_code == 200
+    assert [page["links"] for page in response.json()["pages"]] == [["meio"], ["fim"], []]
+
+    start = query_counter.count
+    conditional = client.get(
+        f"/api/stories/{story_id}/manifest", headers=dict(auth_headers, **{"If-None-Match": response.headers["ETag"]})
+    )
+    assert conditional.status_code == 304
+    statements = [statement for statement, _ in query_counter.executed[start:]]
+    assert len(statements) == 1 and "story_pages" not in statements[0] and "graph_json" not in statements[0]
+
+def test_manifest_changes_with_the_story(client, auth_headers):
+    story_id = _create_story(client, auth_headers)
+    first = client.get(f"/api/stories/{story_id}/manifest", headers=auth_headers)
+    response = client.patch(f"/api/stories/{story_id}/pages/fim", json={"title": "Final"}, headers=auth_headers)
+    assert response.status_code == 200, response.text
+    second = client.get(f"/api/stories/{story_id}/manifest", headers=dict(auth_headers, **{"If-None-Match": first.headers["ETag"]}))
+    assert second.status_code == 200
+    assert second.json()["pages"][2]["title"] == "Final"
+
+def test_page_with_prefetch(client, auth_headers):
+    story_id = _create_story(client, auth_headers)
+    response = client.get(f"/api/stories/{story_id}/pages/inicio?prefetch=2", headers=auth_headers)
+    assert response.status_code == 200
+    body = response.json()
+    assert body["page"]["id"] == "inicio"
+    assert [page["id"] for page in body["prefetched"]] == ["meio", "fim"]
+    assert client.get(f"/api/stories/{story_id}/pages/nao-existe", headers=auth_headers).status_code == 404
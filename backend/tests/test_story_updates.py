@@ -0,0 +1,170 @@
+# backend/tests/test_story_updates.py
+# Salvamento incremental (crud_stories.update_story / update_story_page): só as páginas
+# que mudaram são gravadas, e um salvamento sem mudanças não muda a versão nem o ETag.
+import json
+
+from sqlalchemy import text
+
+from app import crud_stories, migrations
+from app.database import engine
+
+QUESTION = {"id": "q1", "text": "Ir à esquerda?", "type": "single-choice", "options": [{"id": "o1", "text": "Sim"}, {"id": "o2", "text": "Não"}]}
+
+
+def _pages():
+    return [
+        {"id": "p0", "title": "P0", "markdown": "início [[P1]]", "questions": [QUESTION]},
+        {"id": "p1", "title": "P1", "markdown": "meio [[P2]]"},
+        {"id": "p2", "title": "P2", "markdown": "fim"},
+    ]
+
+def _story_body(pages):
+    return {"story_title": "História", "pages": pages, "start_page_client_id": "p0"}
+
+def _create_story(client, headers) -> int:
+    response = client.post("/api/stories/", json=_story_body(_pages()), headers=headers)
+    assert response.status_code == 201, response.text
+    return response.json()["story_id"]
+
+def _put(client, headers, story_id, pages):
+    response = client.put(f"/api/stories/{story_id}", json=_story_body(pages), headers=headers)
+    assert response.status_code == 200, response.text
+    return response.json()
+
+def _page_rows(story_id: int) -> dict:
+    with engine.connect() as connection:
+        rows = connection.execute(
+            text("SELECT id, client_page_id, title, markdown, questions_json, position, content_hash, html "
+                 "FROM story_pages WHERE story_id = :id"),
+            {"id": story_id},
+        ).all()
+    return {row.client_page_id: row._asdict() for row in rows}
+
+def _content_version(story_id: int) -> int:
+    with engine.connect() as connection:
+        return connection.execute(text("SELECT content_version FROM stories WHERE id = :id"), {"id": story_id}).scalar_one()
+
+def _story_page_writes(query_counter, start: int) -> list:
+    return [
+        statement for statement, _ in query_counter.executed[start:]
+        if statement.lstrip().upper().startswith(("UPDATE STORY_PAGES", "INSERT INTO STORY_PAGES", "DELETE FROM STORY_PAGES"))
+    ]
+
+
+def test_unchanged_save_writes_nothing(client, auth_headers, query_counter):
+    story_id = _create_story(client, auth_headers)
+    before, version = _page_rows(story_id), _content_version(story_id)
+    etag = client.get(f"/api/stories/{story_id}", headers=auth_headers).headers["ETag"]
+
+    start = query_counter.count
+    response = _put(client, auth_headers, story_id, _pages())
+    assert _story_page_writes(query_counter, start) == []
+    assert _page_rows(story_id) == before
+    assert _content_version(story_id) == version
+    assert client.get(f"/api/stories/{story_id}", headers=auth_headers).headers["ETag"] == etag
+    assert [page["id"] for page in response["pages"]] == ["p0", "p1", "p2"]
+
+def test_editing_one_page_updates_only_that_row(client, auth_headers, query_counter):
+    story_id = _create_story(client, auth_headers)
+    before, version = _page_rows(story_id), _content_version(story_id)
+    pages = _pages()
+    pages[1]["markdown"] = "meio editado [[P2]]"
+
+    start = query_counter.count
+    _put(client, auth_headers, story_id, pages)
+    writes = _story_page_writes(query_counter, start)
+    assert len(writes) == 1 and writes[0].lstrip().upper().startswith("UPDATE")
+    after = _page_rows(story_id)
+    assert after["p0"] == before["p0"] and after["p2"] == before["p2"]
+    assert after["p1"]["id"] == before["p1"]["id"]
+    assert after["p1"]["markdown"] == "meio editado [[P2]]"
+    assert "meio editado" in after["p1"]["html"]
+    assert _content_version(story_id) == version + 1
+
+def test_reorder_changes_only_positions(client, auth_headers):
+    story_id = _create_story(client, auth_headers)
+    before = _page_rows(story_id)
+    pages = _pages()
+    response = _put(client, auth_headers, story_id, [pages[2], pages[0], pages[1]])
+
+    assert [page["id"] for page in response["pages"]] == ["p2", "p0", "p1"]
+    after = _page_rows(story_id)
+    assert [after[page_id]["position"] for page_id in ("p2", "p0", "p1")] == [0, 1, 2]
+    for page_id in before:
+        unchanged = {key: value for key, value in before[page_id].items() if key != "position"}
+        assert {key: after[page_id][key] for key in unchanged} == unchanged
+
+def test_dropped_pages_are_deleted_and_new_pages_inserted(client, auth_headers):
+    story_id = _create_story(client, auth_headers)
+    before = _page_rows(story_id)
+    pages = _pages()
+    new_page = {"id": "p3", "title": "P3", "markdown": "novo final"}
+    response = _put(client, auth_headers, story_id, [pages[0], new_page, pages[2]])
+
+    assert [page["id"] for page in response["pages"]] == ["p0", "p3", "p2"]
+    after = _page_rows(story_id)
+    assert set(after) == {"p0", "p2", "p3"}
+    assert after["p0"]["id"] == before["p0"]["id"] and after["p2"]["id"] == before["p2"]["id"]
+    assert after["p3"]["id"] not in {row["id"] for row in before.values()}
+    assert after["p3"]["html"] == "<p>novo final</p>\n"
+
+def test_legacy_duplicate_client_page_ids_collapse_to_one(client, auth_headers):
+    story_id = _create_story(client, auth_headers)
+    first_p1 = _page_rows(story_id)["p1"]["id"]
+    with engine.begin() as connection: # Histórias antigas podiam ter páginas com o mesmo client_page_id
+        connection.execute(
+            text("INSERT INTO story_pages (client_page_id, title, markdown, story_id, position) "
+                 "VALUES ('p1', 'P1 duplicada', 'cópia', :id, 9)"),
+            {"id": story_id},
+        )
+
+    _put(client, auth_headers, story_id, _pages())
+    with engine.connect() as connection:
+        ids = connection.execute(
+            text("SELECT id FROM story_pages WHERE story_id = :id AND client_page_id = 'p1'"), {"id": story_id}
+        ).scalars().all()
+    assert ids == [first_p1]
+
+def test_patch_page_updates_graph_and_missing_page_is_404(client, auth_headers):
+    story_id = _create_story(client, auth_headers)
+    graph = client.get(f"/api/stories/{story_id}/graph", headers=auth_headers).json()
+    assert graph["adjacency"]["p1"] == ["p2"]
+
+    response = client.patch(f"/api/stories/{story_id}/pages/p1", json={"markdown": "volta para [[P0]]"}, headers=auth_headers)
+    assert response.status_code == 200
+    assert response.json()["markdown"] == "volta para [[P0]]"
+    assert response.json()["title"] == "P1" # Campos não enviados são mantidos
+    graph = client.get(f"/api/stories/{story_id}/graph", headers=auth_headers).json()
+    assert graph["adjacency"] == {"p0": ["p1"], "p1": ["p0"], "p2": []}
+    assert graph["unreachable"] == ["p2"]
+
+    missing = client.patch(f"/api/stories/{story_id}/pages/nao-existe", json={"markdown": "x"}, headers=auth_headers)
+    assert missing.status_code == 404
+
+def test_migrated_legacy_page_saved_unchanged_keeps_version(client, auth_headers):
+    story_id = _create_story(client, auth_headers)
+    with engine.begin() as connection:
+        # Como as páginas gravadas antes da versão 6: json.dumps (com espaços e \u) e sem hash
+        connection.execute(
+            text("UPDATE story_pages SET questions_json = :questions, content_hash = NULL WHERE story_id = :id AND client_page_id = 'p0'"),
+            {"questions": json.dumps([QUESTION]), "id": story_id},
+        )
+        migrations._0006_story_pages_position_and_hash(connection)
+    version = _content_version(story_id)
+    _put(client, auth_headers, story_id, _pages())
+    assert _content_version(story_id) == version
+
+def test_hashes_from_old_migration_are_recomputed(client, auth_headers):
+    story_id = _create_story(client, auth_headers)
+    legacy_json = json.dumps([QUESTION])
+    with engine.begin() as connection:
+        # Hash calculado pela versão 6 original, sobre o texto não canônico
+        connection.execute(
+            text("UPDATE story_pages SET questions_json = :questions, content_hash = :content_hash "
+                 "WHERE story_id = :id AND client_page_id = 'p0'"),
+            {"questions": legacy_json, "content_hash": crud_stories.page_content_hash("P0", "início [[P1]]", "#3b82f6", legacy_json), "id": story_id},
+        )
+        migrations._0010_canonical_page_content_hash(connection)
+    version = _content_version(story_id)
+    _put(client, auth_headers, story_id, _pages())
+    assert _content_version(story_id) == version
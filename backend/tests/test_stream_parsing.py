@@ -0,0 +1,60 @@
+# backend/tests/test_stream_parsing.py
+import asyncio
+
+import orjson
+import pytest
+
+from app.stream_parsing import iter_json_array_records, iter_ndjson_records
+
+
+def _parse(parser, body: bytes, chunk_size: int):
+    async def chunks():
+        for start in range(0, len(body), chunk_size):
+            yield body[start:start + chunk_size]
+
+    async def collect():
+        return [record async for record in parser(chunks())]
+
+    return asyncio.run(collect())
+
+
+# Strings com caracteres estruturais e escapes, para pegar cortes em qualquer posição
+ARRAY_BODY = b' [ {"a": "x\\"]},", "b": [1, {"c": "\\\\"}]} , {"d": "\\\\\\""} ,[3] ] \n'
+ARRAY_RECORDS = [(1, b'{"a": "x\\"]},", "b": [1, {"c": "\\\\"}]}'), (2, b'{"d": "\\\\\\""}'), (3, b"[3]")]
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 3, 5, 7, 64, 4096])
+def test_json_array_records_survive_any_chunking(chunk_size):
+    assert _parse(iter_json_array_records, ARRAY_BODY, chunk_size) == ARRAY_RECORDS
+    for _, record in ARRAY_RECORDS:
+        orjson.loads(record)
+
+@pytest.mark.parametrize("body, message", [
+    (b'{"a": 1}', "array JSON"),
+    (b'[{"a": 1}', "incompleto"),
+    (b'[{"a": "]"}', "incompleto"),
+    (b'[1] x', "após o fim"),
+    (b'[{"a": 1}, ]', "Vírgula sobrando"),
+    (b'[1,\n]', "Vírgula sobrando"),
+])
+def test_json_array_rejects_malformed_bodies(body, message):
+    with pytest.raises(ValueError, match=message):
+        _parse(iter_json_array_records, body, 2)
+
+def test_json_array_accepts_empty_array():
+    assert _parse(iter_json_array_records, b" [ ] ", 1) == []
+
+def test_json_array_keeps_long_string_across_chunks():
+    long_text = "a\\\"" * 50_000
+    body = b'[{"x": "' + long_text.encode() + b'"}, 2]'
+    records = _parse(iter_json_array_records, body, 1024)
+    assert [position for position, _ in records] == [1, 2]
+    assert orjson.loads(records[0][1]) == {"x": 'a"' * 50_000}
+
+@pytest.mark.parametrize("chunk_size", [1, 3, 16, 4096])
+def test_ndjson_records_are_numbered_by_line(chunk_size):
+    body = b'{"a": 1}\n\n  {"b": 2}\r\n' + b'{"c": "' + b"x" * 10_000 + b'"}'
+    records = _parse(iter_ndjson_records, body, chunk_size)
+    assert [position for position, _ in records] == [1, 3, 4]
+    assert records[0][1] == b'{"a": 1}'
+    assert records[1][1] == b'{"b": 2}'
+    assert len(records[2][1]) == 10_009
@@ -0,0 +1,55 @@
+# backend/tests/test_user_cache.py
+# Cache de usuários autenticados (crud_users.user_cache): as alterações feitas pelo ORM
+# removem a entrada do usuário (eventos do mapper), para que o cache nunca sirva dados antigos.
+import pytest
+
+from app import crud_users, schemas
+
+
+@pytest.fixture
+def cached_user(db):
+    user = crud_users.create_user(db, schemas.UserCreate(email="cache@example.com", name="Cache", password="secret1"))
+    crud_users.get_user_by_email_cached(db, "cache@example.com")
+    assert crud_users.user_cache.get("cache@example.com") is not None
+    return user
+
+def _user_selects(query_counter) -> int:
+    return sum(1 for statement, _ in query_counter.executed if statement.lstrip().upper().startswith("SELECT") and "FROM users" in statement)
+
+
+def test_cache_hit_does_not_query_the_database(db, query_counter, cached_user):
+    start = _user_selects(query_counter)
+    user = crud_users.get_user_by_email_cached(db, "cache@example.com")
+    assert (user.id, user.email, user.hashed_password) == (cached_user.id, cached_user.email, cached_user.hashed_password)
+    assert _user_selects(query_counter) == start
+
+def test_password_change_evicts_the_cached_user(db, cached_user):
+    cached_user.hashed_password = "novo-hash"
+    db.commit()
+    assert crud_users.user_cache.get("cache@example.com") is None
+    assert crud_users.get_user_by_email_cached(db, "cache@example.com").hashed_password == "novo-hash"
+
+def test_email_change_evicts_the_old_key(db, cached_user):
+    # O evento after_update vê apenas o email novo; o antigo vem do histórico do atributo
+    cached_user.email = "novo@example.com"
+    db.commit()
+    assert crud_users.user_cache.get("cache@example.com") is None
+    assert crud_users.get_user_by_email_cached(db, "cache@example.com") is None
+    assert crud_users.get_user_by_email_cached(db, "novo@example.com").id == cached_user.id
+
+def test_delete_evicts_the_cached_user(db, cached_user):
+    db.delete(cached_user)
+    db.commit()
+    assert crud_users.user_cache.get("cache@example.com") is None
+    assert crud_users.get_user_by_email_cached(db, "cache@example.com") is None
+
+def test_disabled_cache_always_queries_the_database(db, query_counter, monkeypatch):
+    monkeypatch.setattr(crud_users, "USER_CACHE_ENABLED", False)
+    crud_users.create_user(db, schemas.UserCreate(email="cache@example.com", name="Cache", password="secret1"))
+
+    start = _user_selects(query_counter)
+    for _ in range(3):
+        assert crud_users.get_user_by_email_cached(db, "cache@example.com").email == "cache@example.com"
+    assert _user_selects(query_counter) == start + 3
+    assert len(crud_users.user_cache) == 0
+    assert crud_users.get_user_cache_stats()["enabled"] is False
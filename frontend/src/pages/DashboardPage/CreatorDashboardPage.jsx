@@ -40,25 +40,28 @@ function CreatorDashboardPage() {
       const newDefinitions = { ...storyDefinitions }; // Começa com as definições já carregadas
 
       let definitionsChanged = false;
-      for (const storyId of storyIdsToFetch) {
-        if (!newDefinitions[storyId]) { // Busca apenas se ainda não tiver
-          try {
-            const storyDefResponse = await fetch(`${API_URL}/api/stories/${storyId}`, {
-              method: 'GET',
-              headers: { 'Authorization': `Bearer ${token}` },
-            });
-            if (storyDefResponse.ok) {
-              newDefinitions[storyId] = await storyDefResponse.json();
-              definitionsChanged = true;
-            } else {
-              console.warn(`Não foi possível buscar a definição da história ID ${storyId}. Status: ${storyDefResponse.status}`);
-              newDefinitions[storyId] = null; 
-            }
-          } catch (storyErr) {
-            console.error(`Erro ao buscar definição da história ID ${storyId}:`, storyErr);
-            newDefinitions[storyId] = null;
+      // Busca apenas as que ainda não temos, todas em UMA requisição (endpoint /api/stories/batch)
+      const missingIds = storyIdsToFetch.filter(storyId => !newDefinitions[storyId]);
+      if (missingIds.length > 0) {
+        try {
+          const batchResponse = await fetch(`${API_URL}/api/stories/batch?ids=${missingIds.join(',')}`, {
+            method: 'GET',
+            headers: { 'Authorization': `Bearer ${token}` },
+          });
+          if (batchResponse.ok) {
+            const storiesFound = await batchResponse.json();
+            storiesFound.forEach(story => { newDefinitions[story.id] = story; });
+          } else {
+            console.warn(`Não foi possível buscar as definições das histórias ${missingIds.join(', ')}. Status: ${batchResponse.status}`);
           }
+        } catch (storyErr) {
+          console.error(`Erro ao buscar definições das histórias ${missingIds.join(', ')}:`, storyErr);
         }
+        // Histórias não retornadas (apagadas ou erro) ficam como null, como antes
+        missingIds.forEach(storyId => {
+          if (!newDefinitions[storyId]) newDefinitions[storyId] = null;
+        });
+        definitionsChanged = true;
       }
       if (definitionsChanged) {
         setStoryDefinitions(newDefinitions);
@@ -26,7 +26,8 @@ function HubPage() {
     }
 
     try {
-      const response = await fetch(`${API_URL}/api/stories`, {
+      // Lista resumida (sem o conteúdo das páginas); só precisamos de id, título e contagem de páginas
+      const response = await fetch(`${API_URL}/api/stories/summary`, {
         method: 'GET',
         headers: {
           'Authorization': `Bearer ${token}`,
@@ -168,7 +169,7 @@ function HubPage() {
               <li key={story.id} className="story-list-item">
                 <div className="story-info">
                   <h3>{story.title}</h3> {/* Usando story.title como corrigido */}
-                  <p>Páginas: {story.pages ? story.pages.length : 0}</p>
+                  <p>Páginas: {story.page_count ?? 0}</p>
                   {story.start_page_client_id && (
                     <p className="start-page-info-hub">
                         Página Inicial Designada ID: {story.start_page_client_id}
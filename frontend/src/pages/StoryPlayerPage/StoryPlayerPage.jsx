@@ -224,7 +224,7 @@ function StoryPlayerPage() {
             headers: { 'Content-Type': 'application/json', 'Authorization': `Bearer ${token}`},
             body: JSON.stringify(executionPayload),
         });
-        if (response.status === 201) { 
+        if (response.status === 201 || response.status === 202) { // 202: aceito na fila de gravação do servidor
             const savedExecution = await response.json();
             console.log("Resultados salvos:", savedExecution);
             alert(`História finalizada e resultados salvos! Tempo: ${executionPayload.duration_minutes.toFixed(2)} min.`);